@@ -0,0 +1,84 @@
+"""
+prueba de carga del endpoint /weather en modo wsgi (hilos) y asgi (event loop).
+
+levanta el openweathermap falso (fake_openweather.py) con demora fija y sirve
+la aplicacion con cache y almacen desactivados, de modo que cada solicitud
+descarga el clima y el pronostico. luego mantiene 'concurrency' solicitudes
+simultaneas durante 'duration' segundos y muestra un resumen json
+(solicitudes/s, percentiles, errores).
+
+el modo wsgi usa werkzeug con un pool fijo de hilos (como un worker gthread de
+gunicorn) y el modo asgi usa uvicorn; ambos en un solo proceso. con --target
+se mide un servidor ya levantado (ej. gunicorn o uvicorn con varios workers).
+
+requiere los paquetes de requirements-async.txt.
+
+uso (desde la raiz del proyecto):
+    python -m benchmarks.async_load_test [--mode asgi|wsgi|both] [--concurrency 200] [--duration 10] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+
+from benchmarks import fake_openweather
+from benchmarks.harness import make_config, run_load, serve
+
+
+def weather_requests():
+    """
+    solicitudes a /weather, cada una con una ciudad distinta para que no se agrupen.
+    """
+    counter = itertools.count()
+    return lambda: ("/weather", {"city": f"Ciudad {next(counter)}"}, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="prueba de carga de /weather en modo wsgi y asgi.")
+    parser.add_argument("--mode", choices=("asgi", "wsgi", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=200, help="solicitudes simultaneas")
+    parser.add_argument("--duration", type=float, default=10, help="segundos de carga por modo")
+    parser.add_argument("--latency", type=float, default=0.2, help="segundos de demora del openweathermap falso")
+    parser.add_argument("--wsgi-threads", type=int, default=32, help="hilos del servidor wsgi")
+    parser.add_argument("--upstream-connections", type=int, default=400, help="descargas simultaneas a openweathermap")
+    parser.add_argument("--target", help="url base de un servidor ya levantado (ignora --mode y --latency)")
+    args = parser.parse_args()
+
+    if args.target:
+        result = asyncio.run(run_load(args.target, args.concurrency, args.duration, weather_requests()))
+        print(json.dumps({"target": args.target, "concurrency": args.concurrency, **result}, indent=2))
+        return
+
+    upstream = fake_openweather.start(latency=args.latency)
+    config = make_config(
+        upstream.base_url,
+        upstream_connections=args.upstream_connections,
+        CITY_LOCATIONS_PATH="",
+        CACHE_BACKEND="memory",
+        CACHE_WEATHER_TTL=0,
+        CACHE_FORECAST_TTL=0,
+        CACHE_STALE_TTL=0,
+        STORE_ENABLED=False,
+        BREAKER_FAILURE_THRESHOLD=10 ** 6,
+    )
+    modes = ("wsgi", "asgi") if args.mode == "both" else (args.mode,)
+    results = {}
+    for mode in modes:
+        base_url, stop = serve(mode, config, wsgi_threads=args.wsgi_threads)
+        try:
+            results[mode] = asyncio.run(run_load(base_url, args.concurrency, args.duration, weather_requests()))
+        finally:
+            stop()
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "upstream_latency_ms": round(args.latency * 1000),
+        "upstream_connections": args.upstream_connections,
+        "wsgi_threads": args.wsgi_threads,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
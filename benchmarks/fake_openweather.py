@@ -0,0 +1,444 @@
+"""
+openweathermap falso para pruebas de carga y benchmarks.
+
+sirve /data/2.5/weather y /data/2.5/forecast con respuestas de la misma forma
+que la api real (coord, main, wind, clouds, sys, 40 intervalos de 3 horas,
+etc.), generadas de forma deterministica a partir del nombre de la ciudad, y
+acepta consultas por nombre (q), id o coordenadas (lat/lon), en unidades
+metric, imperial o standard y en espanol o ingles.
+
+permite simular una demora con variacion aleatoria y una fraccion de errores:
+401, 404, 429, 500, 502, 503 o 'timeout' (la respuesta tarda --timeout-delay
+segundos, mas que el timeout de lectura de la aplicacion).
+
+ademas expone:
+    GET  /__stats  contadores de solicitudes por endpoint y por codigo de estado.
+    POST /__reset  reiniciar los contadores.
+
+uso (desde la raiz del proyecto):
+    python -m benchmarks.fake_openweather [--port 8090] [--latency 0.15] [--jitter 0.05]
+                                          [--errors 500=0.02,timeout=0.01] [--api-key clave]
+
+y en el .env de la aplicacion:
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8090
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# errores que se pueden simular y su cuerpo, con la forma de la api real
+ERROR_BODIES = {
+    401: {"cod": 401, "message": "Invalid API key. Please see https://openweathermap.org/faq#error401 for more info."},
+    404: {"cod": "404", "message": "city not found"},
+    429: {"cod": 429, "message": "Your account is temporary blocked due to exceeding of requests limitation of your subscription type."},
+    500: {"cod": "500", "message": "Internal server error"},
+    502: {"cod": "502", "message": "Bad gateway"},
+    503: {"cod": "503", "message": "Service unavailable"},
+}
+TIMEOUT = "timeout"
+
+# condiciones posibles: (id, main, descripcion en espanol, descripcion en ingles, icono)
+CONDITIONS = [
+    (800, "Clear", "cielo claro", "clear sky", "01"),
+    (801, "Clouds", "algo de nubes", "few clouds", "02"),
+    (802, "Clouds", "nubes dispersas", "scattered clouds", "03"),
+    (804, "Clouds", "nubes", "overcast clouds", "04"),
+    (500, "Rain", "lluvia ligera", "light rain", "10"),
+    (501, "Rain", "lluvia moderada", "moderate rain", "10"),
+    (211, "Thunderstorm", "tormenta", "thunderstorm", "11"),
+    (701, "Mist", "niebla", "mist", "50"),
+]
+
+TIMEZONE = -10800 # argentina, utc-3
+
+
+def parse_errors(text):
+    """
+    leer las fracciones de error de un texto como '500=0.02,timeout=0.01'.
+
+    returns:
+        dict: codigo de estado (int) o 'timeout' -> fraccion de solicitudes.
+    """
+    errors = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, _, rate = item.partition("=")
+        key = TIMEOUT if name == TIMEOUT else int(name)
+        if key != TIMEOUT and key not in ERROR_BODIES:
+            raise ValueError(f"error no soportado: {name} (usar {', '.join(map(str, ERROR_BODIES))} o timeout)")
+        errors[key] = float(rate)
+    if sum(errors.values()) > 1:
+        raise ValueError("la suma de las fracciones de error no puede superar 1.")
+    return errors
+
+
+class FakeCity:
+    """
+    ciudad sintetica: ubicacion y clima base derivados del nombre.
+    """
+    def __init__(self, name):
+        self.name = name
+        seed = zlib.crc32(name.strip().lower().encode("utf-8"))
+        rng = random.Random(seed)
+        self.id = 3_000_000 + seed % 1_000_000
+        self.lat = round(rng.uniform(-55, -22), 4)
+        self.lon = round(rng.uniform(-73, -54), 4)
+        # mas frio hacia el sur
+        self.base_temp = 28 + (self.lat + 22) * 0.55 + rng.uniform(-2, 2)
+        self.humidity = rng.randint(35, 85)
+        self.population = rng.randint(2_000, 1_500_000)
+        self.seed = seed
+
+
+class FakeOpenWeather:
+    """
+    estado del servidor falso: opciones de simulacion, ciudades conocidas y contadores.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, errors=None, timeout_delay=30.0, api_key=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = dict(errors or {})
+        self.timeout_delay = timeout_delay
+        self.api_key = api_key
+        self._rng = random.Random(seed)
+        self._cities = {} # id -> FakeCity (las consultadas por nombre)
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._statuses = {}
+
+    # --- ciudades ---
+
+    def city_from_params(self, params):
+        """
+        resolver la ciudad consultada por q, id o lat/lon.
+
+        returns:
+            FakeCity: ciudad, o None si falta la ubicacion.
+        """
+        if params.get("q"):
+            city = FakeCity(params["q"].split(",")[0])
+            with self._lock:
+                self._cities[city.id] = city
+            return city
+        if params.get("id"):
+            try:
+                city_id = int(params["id"])
+            except ValueError:
+                return None
+            with self._lock:
+                city = self._cities.get(city_id)
+            if city is None:
+                # id aprendido en otra ejecucion: inventar una ciudad con ese id
+                city = FakeCity(f"Ciudad {city_id}")
+                city.id = city_id
+            return city
+        if params.get("lat") and params.get("lon"):
+            city = FakeCity(f"{float(params['lat']):.2f},{float(params['lon']):.2f}")
+            city.lat, city.lon = float(params["lat"]), float(params["lon"])
+            return city
+        return None
+
+    # --- simulacion ---
+
+    def pick_error(self):
+        """
+        elegir al azar si la solicitud falla y con que error.
+
+        returns:
+            int, str o None: codigo de estado, 'timeout' o None si responde bien.
+        """
+        if not self.errors:
+            return None
+        with self._lock:
+            draw = self._rng.random()
+        for error, rate in self.errors.items():
+            if draw < rate:
+                return error
+            draw -= rate
+        return None
+
+    def delay(self):
+        """
+        segundos de demora de una respuesta: latency +/- jitter.
+        """
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            offset = self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency + offset)
+
+    # --- contadores ---
+
+    def count(self, endpoint, status):
+        with self._lock:
+            self._calls[endpoint] = self._calls.get(endpoint, 0) + 1
+            self._statuses[str(status)] = self._statuses.get(str(status), 0) + 1
+
+    def stats(self):
+        """
+        devolver la configuracion y los contadores de solicitudes.
+        """
+        with self._lock:
+            return {
+                "calls": dict(self._calls),
+                "total": sum(self._calls.values()),
+                "statuses": dict(self._statuses),
+                "known_cities": len(self._cities),
+                "latency": self.latency,
+                "jitter": self.jitter,
+                "errors": {str(k): v for k, v in self.errors.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._statuses.clear()
+
+
+def _convert_temp(celsius, units):
+    if units == "imperial":
+        return round(celsius * 9 / 5 + 32, 2)
+    if units == "metric":
+        return round(celsius, 2)
+    return round(celsius + 273.15, 2) # standard (kelvin)
+
+
+def _convert_speed(mps, units):
+    return round(mps * 2.237, 2) if units == "imperial" else round(mps, 2)
+
+
+def _condition(rng, lang, is_day):
+    code, main, es, en, icon = rng.choice(CONDITIONS)
+    return {"id": code, "main": main, "description": es if lang == "es" else en, "icon": icon + ("d" if is_day else "n")}
+
+
+def _local_hour(ts):
+    return ((ts + TIMEZONE) % 86400) / 3600
+
+
+def _temp_at(city, ts, rng):
+    # ciclo diario: minima cerca de las 6, maxima cerca de las 15 (hora local)
+    return city.base_temp + 6 * math.sin((_local_hour(ts) - 9) / 24 * 2 * math.pi) + rng.uniform(-1.5, 1.5)
+
+
+def _sun_times(ts):
+    day_start = (ts + TIMEZONE) // 86400 * 86400 - TIMEZONE
+    return day_start + 7 * 3600, day_start + 19 * 3600
+
+
+def weather_payload(city, units, lang, now=None):
+    """
+    armar una respuesta de /data/2.5/weather para una ciudad.
+    """
+    now = int(now or time.time())
+    # los valores cambian cada 10 minutos, como las observaciones reales
+    rng = random.Random(city.seed ^ (now // 600))
+    sunrise, sunset = _sun_times(now)
+    temp = _temp_at(city, now, rng)
+    wind = rng.uniform(0.5, 12)
+    return {
+        "coord": {"lon": city.lon, "lat": city.lat},
+        "weather": [_condition(rng, lang, sunrise <= now < sunset)],
+        "base": "stations",
+        "main": {
+            "temp": _convert_temp(temp, units),
+            "feels_like": _convert_temp(temp - wind * 0.3, units),
+            "temp_min": _convert_temp(temp - rng.uniform(0, 2), units),
+            "temp_max": _convert_temp(temp + rng.uniform(0, 2), units),
+            "pressure": rng.randint(1002, 1025),
+            "humidity": max(5, min(100, city.humidity + rng.randint(-10, 10))),
+            "sea_level": rng.randint(1002, 1025),
+            "grnd_level": rng.randint(950, 1015),
+        },
+        "visibility": rng.choice((10000, 10000, 8000, 5000)),
+        "wind": {"speed": _convert_speed(wind, units), "deg": rng.randint(0, 359), "gust": _convert_speed(wind * 1.4, units)},
+        "clouds": {"all": rng.randint(0, 100)},
+        "dt": now - now % 600,
+        "sys": {"type": 2, "id": 2000000 + city.id % 100000, "country": "AR", "sunrise": sunrise, "sunset": sunset},
+        "timezone": TIMEZONE,
+        "id": city.id,
+        "name": city.name,
+        "cod": 200,
+    }
+
+
+def forecast_payload(city, units, lang, now=None):
+    """
+    armar una respuesta de /data/2.5/forecast (40 intervalos de 3 horas) para una ciudad.
+    """
+    now = int(now or time.time())
+    start = now // 10800 * 10800 + 10800
+    items = []
+    for i in range(40):
+        dt = start + i * 10800
+        # cada intervalo es estable mientras no cambie el pronostico (cada 3 horas)
+        rng = random.Random(city.seed ^ dt ^ (now // 10800))
+        temp = _temp_at(city, dt, rng)
+        condition = _condition(rng, lang, 6 <= _local_hour(dt) < 19)
+        wind = rng.uniform(0.5, 14)
+        item = {
+            "dt": dt,
+            "main": {
+                "temp": _convert_temp(temp, units),
+                "feels_like": _convert_temp(temp - wind * 0.3, units),
+                "temp_min": _convert_temp(temp - rng.uniform(0, 1.5), units),
+                "temp_max": _convert_temp(temp + rng.uniform(0, 1.5), units),
+                "pressure": rng.randint(1002, 1025),
+                "sea_level": rng.randint(1002, 1025),
+                "grnd_level": rng.randint(950, 1015),
+                "humidity": max(5, min(100, city.humidity + rng.randint(-15, 15))),
+                "temp_kf": 0,
+            },
+            "weather": [condition],
+            "clouds": {"all": rng.randint(0, 100)},
+            "wind": {"speed": _convert_speed(wind, units), "deg": rng.randint(0, 359), "gust": _convert_speed(wind * 1.5, units)},
+            "visibility": 10000,
+            "pop": round(rng.random() if condition["main"] in ("Rain", "Thunderstorm") else rng.random() * 0.3, 2),
+            "sys": {"pod": condition["icon"][-1]},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+        }
+        if condition["main"] in ("Rain", "Thunderstorm"):
+            item["rain"] = {"3h": round(rng.uniform(0.1, 8), 2)}
+        items.append(item)
+
+    sunrise, sunset = _sun_times(now)
+    return {
+        "cod": "200",
+        "message": 0,
+        "cnt": len(items),
+        "list": items,
+        "city": {
+            "id": city.id,
+            "name": city.name,
+            "coord": {"lat": city.lat, "lon": city.lon},
+            "country": "AR",
+            "population": city.population,
+            "timezone": TIMEZONE,
+            "sunrise": sunrise,
+            "sunset": sunset,
+        },
+    }
+
+
+def make_handler(state):
+    """
+    crear la clase que atiende las solicitudes http con el estado dado.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # conexiones keep-alive, como la api real
+        server_version = "fake-openweathermap"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if urlparse(self.path).path == "/__reset":
+                state.reset()
+                self.send_json(200, {"reset": True})
+            else:
+                self.send_json(404, {"cod": "404", "message": "Internal error"})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                self.send_json(200, state.stats())
+                return
+
+            endpoint = url.path.rsplit("/", 1)[-1]
+            if url.path not in ("/data/2.5/weather", "/data/2.5/forecast"):
+                self.send_json(404, {"cod": "404", "message": "Internal error"})
+                return
+
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            error = state.pick_error()
+            time.sleep(state.timeout_delay if error == TIMEOUT else state.delay())
+
+            if error is None and state.api_key is not None and params.get("appid") != state.api_key:
+                error = 401
+            city = state.city_from_params(params) if error is None else None
+            if error is None and city is None:
+                error = 404
+
+            if error is None:
+                units = params.get("units", "standard")
+                lang = params.get("lang", "en")
+                build = weather_payload if endpoint == "weather" else forecast_payload
+                status, body = 200, build(city, units, lang)
+            elif error == TIMEOUT:
+                status, body = 504, {"cod": "504", "message": "Gateway timeout"}
+            else:
+                status, body = error, ERROR_BODIES[error]
+
+            state.count(endpoint, TIMEOUT if error == TIMEOUT else status)
+            try:
+                self.send_json(status, body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass # el cliente ya se fue (ej. agoto su timeout)
+
+    return Handler
+
+
+class FakeOpenWeatherServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024 # el valor por defecto (5) descarta conexiones con mucha concurrencia
+
+
+def start(host="127.0.0.1", port=0, **options):
+    """
+    iniciar el servidor falso en un hilo.
+
+    args:
+        port (int): puerto; 0 elige uno libre.
+        **options: opciones de FakeOpenWeather (latency, jitter, errors, timeout_delay, api_key, seed).
+
+    returns:
+        FakeOpenWeatherServer: servidor ya iniciado; server.state tiene los contadores
+                               y server.base_url la url para OPENWEATHER_BASE_URL.
+    """
+    state = FakeOpenWeather(**options)
+    server = FakeOpenWeatherServer((host, port), make_handler(state))
+    server.state = state
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="openweathermap falso para pruebas de carga.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.15, help="segundos de demora de cada respuesta")
+    parser.add_argument("--jitter", type=float, default=0.05, help="variacion maxima (+/-) de la demora")
+    parser.add_argument("--errors", default="", help="fraccion de errores, ej. 401=0.01,500=0.02,timeout=0.01")
+    parser.add_argument("--timeout-delay", type=float, default=30.0, help="segundos de demora de un 'timeout'")
+    parser.add_argument("--api-key", help="si se indica, las solicitudes con otra clave reciben 401")
+    parser.add_argument("--seed", type=int, help="semilla para repetir la misma secuencia de errores")
+    args = parser.parse_args()
+
+    server = start(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, errors=parse_errors(args.errors),
+        timeout_delay=args.timeout_delay, api_key=args.api_key, seed=args.seed,
+    )
+    print(f"openweathermap falso en {server.base_url} (contadores en {server.base_url}/__stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+benchmark de la agrupacion diaria del pronostico.
+
+compara la implementacion original de group_forecast_by_day (una pasada con
+busquedas anidadas y split de 'dt_txt', copiada abajo) con aggregate_forecast,
+ciudad por ciudad y en lote con aggregate_forecasts, sobre pronosticos sinteticos de 40 intervalos con la forma de /data/2.5/forecast.
+
+uso (desde la raiz del proyecto):
+    python -m benchmarks.forecast_aggregation [--cities 500] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from weather_app.utils.forecast import aggregate_forecast, aggregate_forecasts
+
+CONDITIONS = [
+    ("cielo claro", "01"), ("algo de nubes", "02"), ("nubes dispersas", "03"),
+    ("nubes", "04"), ("lluvia ligera", "10"), ("tormenta", "11"),
+]
+
+
+def make_forecast(rng, start):
+    """
+    generar un pronostico sintetico de 5 dias en intervalos de 3 horas.
+    """
+    items = []
+    for i in range(40):
+        dt = start + i * 10800
+        description, icon = rng.choice(CONDITIONS)
+        temp = rng.uniform(-5, 35)
+        item = {
+            "dt": dt,
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+            "main": {
+                "temp": temp,
+                "temp_min": temp - rng.uniform(0, 2),
+                "temp_max": temp + rng.uniform(0, 2),
+                "humidity": rng.randint(20, 100),
+            },
+            "weather": [{"description": description, "icon": icon + ("d" if 9 <= (i * 3) % 24 <= 18 else "n")}],
+            "wind": {"speed": rng.uniform(0, 15)},
+            "pop": rng.random(),
+        }
+        if icon in ("10", "11"):
+            item["rain"] = {"3h": rng.uniform(0, 5)}
+        items.append(item)
+    return {"list": items, "city": {"name": "Ciudad", "timezone": -10800}}
+
+
+def legacy_group_forecast_by_day(forecast_data):
+    """
+    implementacion original de group_forecast_by_day (sin el manejo de errores).
+    """
+    daily = {}
+    for item in forecast_data["list"]:
+        date = item["dt_txt"].split(" ")[0]
+        temp_max = item["main"]["temp_max"]
+        temp_min = item["main"]["temp_min"]
+        desc = item["weather"][0]["description"]
+        icon = item["weather"][0]["icon"]
+        rain_mm = item.get("rain", {}).get("3h", 0)
+
+        if date not in daily:
+            daily[date] = {
+                "temp_max": temp_max,
+                "temp_min": temp_min,
+                "description": desc,
+                "icon": icon,
+                "rain_volume_mm": rain_mm,
+            }
+        else:
+            daily[date]["temp_max"] = max(daily[date]["temp_max"], temp_max)
+            daily[date]["temp_min"] = min(daily[date]["temp_min"], temp_min)
+            daily[date]["rain_volume_mm"] += rain_mm
+
+    return [{"date": d, **info} for d, info in sorted(daily.items())][:7]
+
+
+def best_of(repeat, fns):
+    """
+    ejecutar cada funcion repeat veces y devolver su menor tiempo en segundos.
+
+    las rondas se intercalan (una de cada funcion por vez), asi el ruido de la
+    maquina afecta a todas por igual y la relacion de tiempos es estable.
+    """
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            start = time.perf_counter()
+            fn()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark de la agrupacion diaria del pronostico.")
+    parser.add_argument("--cities", type=int, default=500, help="cantidad de pronosticos por ronda")
+    parser.add_argument("--repeat", type=int, default=20, help="rondas (se informa la mas rapida)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = int(time.time()) // 10800 * 10800
+    forecasts = [make_forecast(rng, start + rng.randrange(8) * 10800) for _ in range(args.cities)]
+
+    # verificar que ambas coinciden en los extremos cuando el dia local es el dia utc
+    utc = [dict(f, city={"timezone": 0}) for f in forecasts[:20]]
+    for old, new in zip(map(legacy_group_forecast_by_day, utc), map(aggregate_forecast, utc)):
+        assert [(d["date"], d["temp_max"], d["temp_min"]) for d in old] == \
+               [(d["date"], d["temp_max"], d["temp_min"]) for d in new]
+
+    legacy, single, batch = best_of(args.repeat, [
+        lambda: [legacy_group_forecast_by_day(f) for f in forecasts],
+        lambda: [aggregate_forecast(f) for f in forecasts],
+        lambda: aggregate_forecasts(forecasts),
+    ])
+
+    print(f"{args.cities} pronosticos de 40 intervalos, mejor de {args.repeat} rondas\n")
+    print(f"{'implementacion':<32} {'total ms':>10} {'us/ciudad':>10} {'ciudades/s':>12}")
+    rows = (
+        ("group_forecast_by_day original", legacy),
+        ("aggregate_forecast", single),
+        ("aggregate_forecasts (lote)", batch),
+    )
+    for name, seconds in rows:
+        print(
+            f"{name:<32} {seconds * 1000:>10.2f} {seconds / args.cities * 1e6:>10.1f} "
+            f"{args.cities / seconds:>12.0f}"
+        )
+    print("\naggregate_forecast calcula ademas temp media, humedad y viento maximos, pop y condicion dominante.")
+    print(f"relacion de tiempos: {single / legacy:.2f}x (por ciudad), {batch / legacy:.2f}x (lote)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+piezas comunes de las pruebas de carga: servir la aplicacion en el mismo
+proceso (wsgi o asgi), generar carga con un numero fijo de clientes
+simultaneos y resumir las latencias.
+
+la carga se genera con aiohttp (ver requirements-async.txt).
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from config import Config
+
+
+def make_config(base_url, upstream_connections=None, **overrides):
+    """
+    configuracion para medir: apunta al openweathermap falso y no usa el precalentador
+    ni el gobernador de cuota (el falso no tiene limite de llamadas).
+
+    args:
+        base_url (str): url del openweathermap falso (ver fake_openweather.start).
+        upstream_connections (int, optional): descargas simultaneas a openweathermap en ambos modos.
+        **overrides: otros valores de configuracion (ej. CACHE_WEATHER_TTL=0).
+
+    returns:
+        type: subclase de Config.
+    """
+    values = {
+        "DEBUG": False,
+        "OPENWEATHER_API_KEY": "benchmark",
+        "WEATHER_URL": f"{base_url}/data/2.5/weather",
+        "FORECAST_URL": f"{base_url}/data/2.5/forecast",
+        "PREWARM_ENABLED": False,
+        "QUOTA_ENABLED": False,
+    }
+    if upstream_connections:
+        values.update(
+            UPSTREAM_POOL_SIZE=upstream_connections,
+            UPSTREAM_MAX_WORKERS=upstream_connections,
+            UPSTREAM_ASYNC_MAX_CONNECTIONS=upstream_connections,
+        )
+    values.update(overrides)
+    return type("BenchmarkConfig", (Config,), values)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"el servidor no respondio en el puerto {port}")
+
+
+def serve_wsgi(config, port, threads):
+    """
+    servir la aplicacion flask con werkzeug y un pool fijo de 'threads' hilos,
+    como un worker gthread de gunicorn.
+
+    returns:
+        callable: funcion sin argumentos que detiene el servidor.
+    """
+    from werkzeug.serving import BaseWSGIServer
+    from weather_app import create_app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 1024
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING) # no registrar cada solicitud
+    server = PooledWSGIServer("127.0.0.1", port, create_app(config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wait_until_up(port)
+
+    def stop():
+        server.shutdown()
+        server.pool.shutdown(wait=False, cancel_futures=True)
+    return stop
+
+
+def serve_asgi(config, port):
+    """
+    servir la aplicacion quart con uvicorn en un hilo aparte.
+
+    returns:
+        callable: funcion sin argumentos que detiene el servidor.
+    """
+    import uvicorn
+    from weather_app.asgi import create_asgi_app
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_asgi_app(config), host="127.0.0.1", port=port, log_level="warning", backlog=1024,
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    wait_until_up(port)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return stop
+
+
+def serve(mode, config, wsgi_threads=32):
+    """
+    servir la aplicacion en un puerto libre.
+
+    returns:
+        tuple: (url base, funcion que detiene el servidor).
+    """
+    port = free_port()
+    stop = serve_wsgi(config, port, wsgi_threads) if mode == "wsgi" else serve_asgi(config, port)
+    return f"http://127.0.0.1:{port}", stop
+
+
+def percentile(sorted_values, p):
+    """
+    percentil p (0-100) de una lista ya ordenada, por el metodo del rango mas cercano.
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def summarize(latencies, errors, elapsed, received=0):
+    """
+    resumir una corrida: solicitudes, errores, throughput y percentiles en ms.
+
+    args:
+        latencies (list): segundos de cada solicitud exitosa.
+        errors (dict): codigo de estado o tipo de excepcion -> cantidad.
+        elapsed (float): segundos de la corrida.
+        received (int): bytes recibidos (cuerpos, tal como viajaron).
+    """
+    latencies = sorted(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "requests": len(latencies) + sum(errors.values()),
+        "ok": len(latencies),
+        "errors": dict(errors),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+        "bytes_received": received,
+    }
+
+
+async def run_load(base_url, concurrency, duration, next_request, ok_statuses=(200,)):
+    """
+    mantener 'concurrency' clientes enviando solicitudes durante 'duration' segundos.
+
+    args:
+        base_url (str): url base del servidor.
+        concurrency (int): solicitudes simultaneas.
+        duration (float): segundos de carga.
+        next_request (callable): funcion sin argumentos que devuelve (ruta, params, headers)
+                                 de la proxima solicitud.
+        ok_statuses (tuple): codigos que cuentan como exitosos (ej. 200 y 304).
+
+    returns:
+        dict: resumen (ver summarize).
+    """
+    latencies = []
+    errors = {}
+    received = 0
+    # sin descompresion automatica: se mide lo que viaja por la red
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(base_url, connector=connector, timeout=timeout, auto_decompress=False) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal received
+            while time.perf_counter() < deadline:
+                path, params, headers = next_request()
+                start = time.perf_counter()
+                try:
+                    async with client.get(path, params=params, headers=headers) as res:
+                        body = await res.read()
+                        key = None if res.status in ok_statuses else str(res.status)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    body, key = b"", type(e).__name__
+                received += len(body)
+                if key is None:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[key] = errors.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed, received)
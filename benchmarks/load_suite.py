@@ -0,0 +1,265 @@
+"""
+suite de carga de punta a punta: /weather, /cities_by_province y archivos estaticos.
+
+levanta el openweathermap falso (fake_openweather.py) y la aplicacion en el
+mismo proceso (modo wsgi o asgi), y para cada escenario y nivel de
+concurrencia mide throughput, latencia p50/p95/p99 y las llamadas que llegaron
+a openweathermap. los resultados se guardan en json para comparar corridas.
+
+escenarios:
+    weather   /weather con ciudades reales elegidas al azar (el cache se llena con el uso).
+    cities    /cities_by_province con provincias al azar.
+    static    css, js y geojson de static/ con Accept-Encoding br/gzip.
+
+uso (desde la raiz del proyecto):
+    python -m benchmarks.load_suite [--mode wsgi|asgi] [--scenarios weather,cities,static]
+                                    [--concurrency 1,10,50] [--duration 10]
+                                    [--latency 0.15] [--jitter 0.05] [--errors 500=0.01,timeout=0.005]
+                                    [--cold] [--output benchmarks/results/corrida.json]
+                                    [--compare benchmarks/results/anterior.json]
+
+con --target se mide un servidor ya levantado (ej. gunicorn con varios workers
+y OPENWEATHER_BASE_URL apuntando a un fake_openweather); --upstream indica la
+url de ese openweathermap falso para leer sus contadores.
+
+requiere los paquetes de requirements-async.txt.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import urllib.request
+from datetime import datetime, timezone
+
+from benchmarks import fake_openweather
+from benchmarks.harness import make_config, run_load, serve
+from weather_app import PROJECT_ROOT
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+# archivos estaticos que descarga la pagina (url relativa a static/)
+STATIC_ASSETS = [
+    "css/style.css",
+    "js/main.js",
+    "js/map/mapHandler.js",
+    "data/cities_by_province.json",
+    "data/argentina_provincias/argentina_provincias.z8.geojson",
+    "data/islas_malvinas/islas_malvinas.z8.geojson",
+]
+
+ACCEPT_ENCODING = {"Accept-Encoding": "br, gzip"}
+
+
+def load_cities():
+    """
+    leer las provincias y ciudades de static/data/cities_by_province.json.
+
+    returns:
+        tuple: (lista de provincias, lista de ciudades).
+    """
+    with open(os.path.join(PROJECT_ROOT, "static", "data", "cities_by_province.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    provinces = list(data)
+    cities = sorted({city["name"] for entries in data.values() for city in entries})
+    return provinces, cities
+
+
+def static_assets():
+    """
+    archivos de STATIC_ASSETS que existen en esta copia del proyecto.
+    """
+    return [path for path in STATIC_ASSETS if os.path.exists(os.path.join(PROJECT_ROOT, "static", path))]
+
+
+def make_scenarios(rng, city_count=None):
+    """
+    armar los escenarios: nombre -> funcion que devuelve (ruta, params, headers).
+
+    args:
+        rng (random.Random): generador para elegir ciudades, provincias y archivos.
+        city_count (int, optional): usar solo las primeras N ciudades (mas aciertos de cache).
+    """
+    provinces, cities = load_cities()
+    if city_count:
+        cities = cities[:city_count]
+    assets = static_assets()
+    return {
+        "weather": lambda: ("/weather", {"city": rng.choice(cities)}, ACCEPT_ENCODING),
+        "cities": lambda: ("/cities_by_province", {"province": rng.choice(provinces)}, ACCEPT_ENCODING),
+        "static": lambda: (f"/static/{rng.choice(assets)}", None, ACCEPT_ENCODING),
+    }
+
+
+def read_upstream_stats(url):
+    """
+    leer los contadores del openweathermap falso, o None si no responde.
+    """
+    try:
+        with urllib.request.urlopen(f"{url}/__stats", timeout=5) as res:
+            return json.load(res)
+    except OSError:
+        return None
+
+
+def upstream_delta(before, after):
+    """
+    llamadas a openweathermap entre dos lecturas de los contadores.
+    """
+    if before is None or after is None:
+        return None
+    calls = {
+        endpoint: count - before["calls"].get(endpoint, 0)
+        for endpoint, count in after["calls"].items()
+    }
+    statuses = {
+        status: count - before["statuses"].get(status, 0)
+        for status, count in after["statuses"].items()
+        if count - before["statuses"].get(status, 0)
+    }
+    return {"calls": calls, "total": sum(calls.values()), "statuses": statuses}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(base_url, upstream_url, scenarios, levels, duration, warmup, seed, city_count=None):
+    """
+    ejecutar cada escenario en cada nivel de concurrencia.
+
+    returns:
+        list: un resultado por (escenario, concurrencia).
+    """
+    results = []
+    for name in scenarios:
+        for concurrency in levels:
+            requests = make_scenarios(random.Random(seed), city_count)[name]
+            if warmup:
+                asyncio.run(run_load(base_url, concurrency, warmup, requests))
+            before = read_upstream_stats(upstream_url) if upstream_url else None
+            summary = asyncio.run(run_load(base_url, concurrency, duration, requests))
+            after = read_upstream_stats(upstream_url) if upstream_url else None
+            result = {"scenario": name, "concurrency": concurrency, **summary, "upstream": upstream_delta(before, after)}
+            results.append(result)
+            print(
+                f"{name:<8} c={concurrency:<4} {result['requests_per_second']:>8.1f} req/s  "
+                f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                f"errores {sum(result['errors'].values())}  "
+                f"upstream {result['upstream']['total'] if result['upstream'] else '-'}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def compare(baseline, current):
+    """
+    mostrar la variacion de throughput y latencias respecto de una corrida anterior.
+    """
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\ncomparacion con {baseline['meta'].get('git_commit')} ({baseline['meta'].get('started_at')})")
+    print(f"{'escenario':<10} {'c':>4} {'req/s':>24} {'p50 ms':>24} {'p95 ms':>24} {'p99 ms':>24}")
+
+    def cell(old, new):
+        if old is None or new is None:
+            return f"{'-':>24}"
+        change = f"{(new - old) / old * 100:+.0f}%" if old else ""
+        return f"{old:>8} -> {new:<8}{change:>6}"
+
+    for result in current["results"]:
+        old = previous.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"{result['scenario']:<10} {result['concurrency']:>4} "
+            f"{cell(old['requests_per_second'], result['requests_per_second'])} "
+            f"{cell(old['p50_ms'], result['p50_ms'])} {cell(old['p95_ms'], result['p95_ms'])} "
+            f"{cell(old['p99_ms'], result['p99_ms'])}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="suite de carga de punta a punta con openweathermap falso.")
+    parser.add_argument("--mode", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--scenarios", default="weather,cities,static", help="escenarios separados por coma")
+    parser.add_argument("--concurrency", default="1,10,50", help="niveles de concurrencia separados por coma")
+    parser.add_argument("--duration", type=float, default=10, help="segundos de medicion por escenario y nivel")
+    parser.add_argument("--warmup", type=float, default=2, help="segundos de carga previa sin medir")
+    parser.add_argument("--latency", type=float, default=0.15, help="segundos de demora del openweathermap falso")
+    parser.add_argument("--jitter", type=float, default=0.05, help="variacion maxima (+/-) de la demora")
+    parser.add_argument("--errors", default="", help="fraccion de errores del falso, ej. 500=0.01,timeout=0.005")
+    parser.add_argument("--cold", action="store_true", help="sin cache ni almacen: cada /weather va a openweathermap")
+    parser.add_argument("--cities", type=int, help="usar solo las primeras N ciudades")
+    parser.add_argument("--wsgi-threads", type=int, default=32, help="hilos del servidor wsgi")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--target", help="url base de un servidor ya levantado")
+    parser.add_argument("--upstream", help="url del openweathermap falso que usa --target")
+    parser.add_argument("--output", help="archivo json de resultados (por defecto benchmarks/results/<fecha>.json)")
+    parser.add_argument("--compare", help="archivo json de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(make_scenarios(random.Random()))
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    started_at = datetime.now(timezone.utc)
+    meta = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+    }
+
+    if args.target:
+        results = run_suite(
+            args.target, args.upstream, scenarios, levels, args.duration, args.warmup, args.seed, args.cities,
+        )
+    else:
+        upstream = fake_openweather.start(
+            latency=args.latency, jitter=args.jitter, errors=fake_openweather.parse_errors(args.errors), seed=args.seed,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            overrides = {
+                "CACHE_BACKEND": "memory",
+                "CITY_LOCATIONS_PATH": os.path.join(tmp, "city_locations.json"),
+                "STORE_PATH": os.path.join(tmp, "weather_store.sqlite3"),
+            }
+            if args.cold:
+                overrides.update(CACHE_WEATHER_TTL=0, CACHE_FORECAST_TTL=0, CACHE_STALE_TTL=0, STORE_ENABLED=False)
+            base_url, stop = serve(args.mode, make_config(upstream.base_url, **overrides), wsgi_threads=args.wsgi_threads)
+            try:
+                results = run_suite(
+                    base_url, upstream.base_url, scenarios, levels, args.duration, args.warmup, args.seed, args.cities,
+                )
+            finally:
+                stop()
+                upstream.shutdown()
+
+    report = {"meta": meta, "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, started_at.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"resultados guardados en {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
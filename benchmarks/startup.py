@@ -0,0 +1,228 @@
+"""
+benchmark de arranque de un worker: importar la aplicacion, crearla con
+create_app y responder la primera solicitud.
+
+cada repeticion corre en un proceso python nuevo, como un worker de gunicorn
+recien creado o reciclado con --max-requests, y mide por separado:
+
+    process   tiempo total del proceso, incluido el arranque del interprete.
+    import    importar weather_app y config (incluye load_dotenv).
+    create    create_app / create_asgi_app: blueprints, almacen y tareas de fondo.
+    first     primera solicitud a --path (carga perezosa de datos, primer json).
+
+ademas corre una vez con -X importtime y lista los modulos de primer nivel que
+mas tardan en importarse. la primera repeticion no se cuenta (--warmup), para
+que no se mida la compilacion a .pyc despues de editar el codigo.
+
+uso (desde la raiz del proyecto):
+    python -m benchmarks.startup [--mode wsgi|asgi] [--repeat 10] [--top 15]
+                                 [--path "/cities_by_province?province=Cordoba"]
+                                 [--output benchmarks/results/arranque.json]
+                                 [--compare benchmarks/results/anterior.json]
+
+el modo asgi requiere los paquetes de requirements-async.txt.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from weather_app import PROJECT_ROOT
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+PHASES = ("process", "import", "create", "first")
+
+# codigo que corre en cada proceso nuevo; imprime una linea json con los tiempos
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+mode, path, tmp = sys.argv[1:4]
+if mode == "asgi":
+    from weather_app.asgi import create_asgi_app as factory
+else:
+    from weather_app import create_app as factory
+from config import Config
+imported = time.perf_counter()
+
+config = type("StartupConfig", (Config,), {
+    "DEBUG": False,
+    "OPENWEATHER_API_KEY": "benchmark",
+    "PREWARM_ENABLED": False,
+    "QUOTA_ENABLED": False,
+    "CITY_LOCATIONS_PATH": tmp + "/city_locations.json",
+    "STORE_PATH": tmp + "/weather_store.sqlite3",
+    "METRICS_DIR": tmp,
+})
+app = factory(config)
+created = time.perf_counter()
+
+if mode == "asgi":
+    import asyncio
+
+    async def first_request():
+        async with app.test_app():
+            return (await app.test_client().get(path)).status_code
+
+    status = asyncio.run(first_request())
+else:
+    status = app.test_client().get(path).status_code
+answered = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - started,
+    "create": created - imported,
+    "first": answered - created,
+    "status": status,
+}))
+"""
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_child(mode, path, importtime=False):
+    """
+    arrancar la aplicacion en un proceso nuevo.
+
+    returns:
+        tuple: (tiempos en segundos por fase, stderr del proceso).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += ["-c", _CHILD, mode, path, tmp]
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"el proceso de arranque fallo:\n{completed.stderr[-2000:]}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["process"] = elapsed
+    return timings, completed.stderr
+
+
+def slowest_imports(stderr, top):
+    """
+    leer la salida de -X importtime y devolver los modulos de primer nivel mas lentos.
+
+    returns:
+        list: dicts {"module", "cumulative_ms", "self_ms"} ordenados de mayor a menor.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # los modulos importados por otro aparecen indentados: solo interesan los de primer nivel
+        if not self_us.strip().isdigit() or name.startswith("  "):
+            continue
+        modules.append({
+            "module": name.strip(),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 1),
+            "self_ms": round(int(self_us) / 1000, 1),
+        })
+    modules.sort(key=lambda module: module["cumulative_ms"], reverse=True)
+    return modules[:top]
+
+
+def summarize(runs):
+    """
+    resumir las repeticiones: mediana, minimo y maximo de cada fase en milisegundos.
+    """
+    summary = {}
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        summary[phase] = {
+            "median_ms": round(statistics.median(values), 1),
+            "min_ms": round(min(values), 1),
+            "max_ms": round(max(values), 1),
+        }
+    return summary
+
+
+def compare(baseline, current):
+    """
+    mostrar la variacion de la mediana de cada fase respecto de una corrida anterior.
+    """
+    print(f"\ncomparacion con {baseline['meta'].get('git_commit')} ({baseline['meta'].get('started_at')})")
+    for phase in PHASES:
+        old = baseline["summary"].get(phase, {}).get("median_ms")
+        new = current["summary"][phase]["median_ms"]
+        if old is None:
+            continue
+        change = f"{(new - old) / old * 100:+.0f}%" if old else ""
+        print(f"{phase:<8} {old:>8} -> {new:<8} ms {change:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tiempo de arranque de un worker e importacion de modulos.")
+    parser.add_argument("--mode", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--repeat", type=int, default=10, help="procesos medidos")
+    parser.add_argument("--warmup", type=int, default=1, help="procesos previos sin medir")
+    parser.add_argument("--path", default="/cities_by_province?province=Cordoba", help="primera solicitud")
+    parser.add_argument("--top", type=int, default=15, help="modulos mas lentos a listar")
+    parser.add_argument("--output", help="archivo json de resultados (por defecto benchmarks/results/startup-<fecha>.json)")
+    parser.add_argument("--compare", help="archivo json de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    meta = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+    }
+
+    for _ in range(args.warmup):
+        run_child(args.mode, args.path)
+    runs = []
+    for i in range(args.repeat):
+        timings, _ = run_child(args.mode, args.path)
+        runs.append(timings)
+        print(
+            f"#{i + 1:<3} " + "  ".join(f"{phase} {timings[phase] * 1000:7.1f} ms" for phase in PHASES)
+            + f"  status {timings['status']}",
+            file=sys.stderr,
+        )
+    _, importtime = run_child(args.mode, args.path, importtime=True)
+
+    summary = summarize(runs)
+    imports = slowest_imports(importtime, args.top)
+    print("\nmediana (min - max):")
+    for phase, values in summary.items():
+        print(f"{phase:<8} {values['median_ms']:>8} ms  ({values['min_ms']} - {values['max_ms']})")
+    print("\nimportaciones mas lentas (primer nivel, acumulado):")
+    for module in imports:
+        print(f"{module['cumulative_ms']:>8} ms  {module['module']}")
+
+    report = {"meta": meta, "summary": summary, "runs": runs, "imports": imports}
+    output = args.output or os.path.join(RESULTS_DIR, "startup-" + started_at.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"resultados guardados en {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Carga las variables de entorno desde el archivo .env
@@ -17,9 +18,138 @@ class Config:
 
     # Configuración para la API de OpenWeatherMap.
     # La clave de la API se obtiene de la variable de entorno 'OPENWEATHER_API_KEY'.
+    # OPENWEATHER_BASE_URL permite apuntar a otro servidor (ej. benchmarks/fake_openweather.py).
     OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
-    WEATHER_URL   = "http://api.openweathermap.org/data/2.5/weather"
-    FORECAST_URL  = "http://api.openweathermap.org/data/2.5/forecast"
+    OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org").rstrip("/")
+    WEATHER_URL   = f"{OPENWEATHER_BASE_URL}/data/2.5/weather"
+    FORECAST_URL  = f"{OPENWEATHER_BASE_URL}/data/2.5/forecast"
+    OPENWEATHER_UNITS = "metric"
+    OPENWEATHER_LANG  = "es"
+    # Tabla de ciudades resueltas a id/coordenadas de OpenWeatherMap, generada con
+    # weather_app/utils/data_conversion/build_city_locations.py. Sin ella las ciudades
+    # se consultan por nombre ("<ciudad>,AR"); con CITY_LOCATIONS_REQUIRED la aplicación
+    # no arranca si falta el archivo.
+    CITY_LOCATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "data", "city_locations.json")
+    CITY_LOCATIONS_REQUIRED = os.getenv("CITY_LOCATIONS_REQUIRED", "0") == "1"
+    # Límites de las provincias (GeoJSON en resolución completa) con los que /reverse_geocode
+    # ubica un punto del mapa; cada worker los indexa en su primera consulta a esa ruta.
+    PROVINCE_BOUNDARIES_PATHS = [
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "data", "argentina_provincias", "argentina_provincias.geojson"),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "data", "islas_malvinas", "islas_malvinas.geojson"),
+    ]
+    # Límites de llamadas por minuto y por día del plan contratado de OpenWeatherMap
+    # (0 = sin límite diario).
+    OPENWEATHER_CALLS_PER_MINUTE = int(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60"))
+    OPENWEATHER_CALLS_PER_DAY    = int(os.getenv("OPENWEATHER_CALLS_PER_DAY", "0"))
+
+    # Gobernador de cuota: reparte esos límites entre todos los workers con baldes de
+    # fichas guardados en QUOTA_PATH. Los lotes y el trabajo de fondo solo pueden usar
+    # la cuota que excede su reserva (fracción de cada límite guardada para los usuarios);
+    # una solicitud sin cuota espera hasta QUOTA_MAX_WAIT segundos y luego recibe los
+    # últimos datos guardados o un 429.
+    QUOTA_ENABLED          = os.getenv("QUOTA_ENABLED", "1") == "1"
+    QUOTA_PATH             = os.getenv("QUOTA_PATH", os.path.join(tempfile.gettempdir(), "app-clima-quota.db"))
+    QUOTA_BATCH_RESERVE    = float(os.getenv("QUOTA_BATCH_RESERVE", "0.1"))
+    QUOTA_PREFETCH_RESERVE = float(os.getenv("QUOTA_PREFETCH_RESERVE", "0.3"))
+    QUOTA_MAX_WAIT         = float(os.getenv("QUOTA_MAX_WAIT", "2"))
+
+    # Cliente HTTP hacia OpenWeatherMap: conexiones keep-alive reutilizadas por worker
+    # y solicitudes de clima actual y pronóstico en paralelo.
+    UPSTREAM_POOL_SIZE       = int(os.getenv("UPSTREAM_POOL_SIZE", "20"))
+    UPSTREAM_MAX_WORKERS     = int(os.getenv("UPSTREAM_MAX_WORKERS", "20"))
+    UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3.05"))
+    UPSTREAM_READ_TIMEOUT    = float(os.getenv("UPSTREAM_READ_TIMEOUT", "10"))
+    UPSTREAM_REFRESH_WORKERS = int(os.getenv("UPSTREAM_REFRESH_WORKERS", "4"))
+    # Conexiones simultáneas del cliente aiohttp del modo ASGI (weather_app/asgi.py);
+    # las solicitudes que excedan este número esperan su turno.
+    UPSTREAM_ASYNC_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_ASYNC_MAX_CONNECTIONS", "100"))
+
+    # Circuito hacia OpenWeatherMap: tras BREAKER_FAILURE_THRESHOLD errores seguidos
+    # (5xx, conexión o timeout) las solicitudes fallan de inmediato durante
+    # BREAKER_RECOVERY_TIMEOUT segundos; luego se prueban BREAKER_HALF_OPEN_MAX_CALLS.
+    BREAKER_FAILURE_THRESHOLD   = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RECOVERY_TIMEOUT    = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", "30"))
+    BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv("BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+
+    # Endpoint /weather/batch: ciudades por solicitud y consultas simultáneas por lote.
+    BATCH_MAX_CITIES      = int(os.getenv("BATCH_MAX_CITIES", "50"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+    # Endpoint /weather/province: consultas simultáneas y segundos máximos por ciudad.
+    PROVINCE_STREAM_CONCURRENCY = int(os.getenv("PROVINCE_STREAM_CONCURRENCY", "8"))
+    PROVINCE_CITY_TIMEOUT       = float(os.getenv("PROVINCE_CITY_TIMEOUT", "8"))
+
+    # Precalentador del cache: refresca en segundo plano las ciudades por defecto de cada
+    # provincia (y las pedidas recientemente) usando como máximo PREWARM_QUOTA_SHARE de la
+    # cuota por minuto. Con varios workers solo corre el que obtiene PREWARM_LOCK_PATH.
+    PREWARM_ENABLED     = os.getenv("PREWARM_ENABLED", "0") == "1"
+    PREWARM_ALL_CITIES  = os.getenv("PREWARM_ALL_CITIES", "0") == "1"
+    PREWARM_INTERVAL    = int(os.getenv("PREWARM_INTERVAL", str(8 * 60)))
+    PREWARM_QUOTA_SHARE = float(os.getenv("PREWARM_QUOTA_SHARE", "0.2"))
+    PREWARM_LOCK_PATH   = os.getenv("PREWARM_LOCK_PATH", os.path.join(tempfile.gettempdir(), "app-clima-prewarm.lock"))
+
+    # Configuración del cache de respuestas de OpenWeatherMap.
+    # 'memory' guarda las respuestas en cada proceso; 'redis' las comparte entre
+    # todos los workers de gunicorn (requiere el paquete 'redis').
+    CACHE_BACKEND      = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL    = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_MAX_ENTRIES  = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+    # Tiempo de vida en segundos: el clima actual cambia en minutos, el pronóstico cada 3 horas.
+    CACHE_WEATHER_TTL  = int(os.getenv("CACHE_WEATHER_TTL", str(10 * 60)))
+    CACHE_FORECAST_TTL = int(os.getenv("CACHE_FORECAST_TTL", str(60 * 60)))
+    # Segundos extra que se conserva una entrada vencida para servirla como
+    # "datos desactualizados" mientras se refresca o si OpenWeatherMap no responde.
+    CACHE_STALE_TTL    = int(os.getenv("CACHE_STALE_TTL", str(6 * 60 * 60)))
+
+    # Almacén persistente (SQLite en modo WAL) de las respuestas crudas de OpenWeatherMap.
+    # Lo comparten todos los workers y sobrevive a reinicios; al iniciar, cada worker
+    # precarga en el cache las respuestas recientes.
+    STORE_ENABLED           = os.getenv("STORE_ENABLED", "1") == "1"
+    STORE_PATH              = os.getenv("STORE_PATH", os.path.join(tempfile.gettempdir(), "app-clima-weather.db"))
+    STORE_RETENTION_SECONDS = int(os.getenv("STORE_RETENTION_SECONDS", str(48 * 60 * 60)))
+    STORE_MAX_ROWS_PER_CITY = int(os.getenv("STORE_MAX_ROWS_PER_CITY", "48"))
+    STORE_COMPACT_INTERVAL  = int(os.getenv("STORE_COMPACT_INTERVAL", str(10 * 60)))
+
+    # Archivos estáticos (GeoJSON, JSON, JS y CSS). Las URLs generadas con
+    # url_for('static') llevan '?v=<hash del contenido>' y se cachean como inmutables;
+    # el resto se revalida con ETag después de STATIC_MAX_AGE segundos.
+    STATIC_MAX_AGE           = int(os.getenv("STATIC_MAX_AGE", "0"))
+    STATIC_IMMUTABLE_MAX_AGE = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", str(365 * 24 * 60 * 60)))
+    # Con STATIC_RECHECK=1 cada solicitud compara el archivo con el disco y lo reindexa si
+    # cambió; sin definir (None) solo se hace en modo debug.
+    STATIC_RECHECK = os.getenv("STATIC_RECHECK") == "1" if os.getenv("STATIC_RECHECK") else None
+
+    # Respuestas dinámicas. Las JSON/HTML de más de COMPRESS_MIN_SIZE bytes se comprimen
+    # con brotli (si está instalado el paquete 'brotli') o gzip según Accept-Encoding.
+    COMPRESS_MIN_SIZE       = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+    COMPRESS_GZIP_LEVEL     = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    # Segundos que navegadores e intermediarios pueden reutilizar /cities_by_province e /is_province
+    # (el clima usa lo que le queda de vigencia en el cache).
+    CITIES_MAX_AGE          = int(os.getenv("CITIES_MAX_AGE", str(60 * 60)))
+    # Reportes de clima ya armados y serializados que se conservan por worker; se
+    # descartan solos cuando cambian los datos de OpenWeatherMap de la ciudad.
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "512"))
+
+    # Serialización JSON de las respuestas: 'auto' usa orjson si está instalado,
+    # 'orjson' lo exige y 'default' usa el módulo json de la biblioteca estándar.
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Métricas en formato Prometheus (/metrics). Cada worker escribe las suyas en
+    # METRICS_DIR cada METRICS_FLUSH_INTERVAL segundos y /metrics suma las de todos
+    # ('' = solo las del worker que responde); cada servidor usa su propia subcarpeta
+    # y las de servidores que ya terminaron se borran solas. SERVER_TIMING_ENABLED agrega a cada
+    # respuesta el encabezado Server-Timing con la duración de cada etapa.
+    METRICS_DIR            = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "app-clima-metrics"))
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    SERVER_TIMING_ENABLED  = os.getenv("SERVER_TIMING_ENABLED", "0") == "1"
+    # Endpoints internos (/status/* y /metrics): apagados (404) si no se define
+    # INTERNAL_ENDPOINTS_TOKEN; con el token exigen 'Authorization: Bearer <token>'.
+    # No se exponen por CORS a otros orígenes.
+    INTERNAL_ENDPOINTS_TOKEN = os.getenv("INTERNAL_ENDPOINTS_TOKEN", "")
+    # Perfilador por muestreo que se enciende en tiempo de ejecución desde /status/profile.
+    PROFILER_ENABLED     = os.getenv("PROFILER_ENABLED", "0") == "1"
+    PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "300"))
 
 class DevelopmentConfig(Config):
     """
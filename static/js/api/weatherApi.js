@@ -28,4 +28,4 @@ export async function fetchWeather(ciudad) {
         handleRequestError(err, 'error al obtener datos del clima');
         // el error es relanzado por handleRequestError, asi que esta funcion no devuelve nada aqui
     }
-}
\ No newline at end of file
+}
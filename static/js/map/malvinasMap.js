@@ -23,7 +23,7 @@ export function addMalvinasLayer(on_province_click) {
     }
 
     // realiza una peticion para obtener el archivo geojson de las islas malvinas.
-    fetch('/static/data/islas_malvinas/islas_malvinas.geojson')
+    fetch('/static/data/islas_malvinas/islas_malvinas.z8.geojson')
         .then(res => {
             // verifica si la respuesta de la peticion fue exitosa.
             if (!res.ok) {
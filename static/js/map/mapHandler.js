@@ -44,7 +44,7 @@ export function initializeMap(on_province_click) {
 
     /* argar geojson de provincias */
     // realiza una peticion para obtener el archivo geojson que contiene los limites de las provincias.
-    fetch('/static/data/argentina_provincias/argentina_provincias.geojson')
+    fetch('/static/data/argentina_provincias/argentina_provincias.z8.geojson')
         .then(res => {
             // verifica si la respuesta es ok (status 200-299).
             if (!res.ok) {
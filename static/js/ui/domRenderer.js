@@ -8,6 +8,7 @@ const current_desc            = document.getElementById('currentDescription');
 const current_icon            = document.getElementById('currentIcon');
 const weekly_box              = document.getElementById('weeklyForecast');
 const error_div               = document.getElementById('errorMessage');
+const stale_notice            = document.getElementById('staleNotice');
 
 // referencias a elementos del dom para el desplegable de seleccion de ciudades.
 const city_dropdown_container = document.getElementById('cityDropdownContainer');
@@ -49,6 +50,7 @@ export function hideResult(){
  * @param {number} data.current_weather.temp - la temperatura actual.
  * @param {string} data.current_weather.description - la descripcion del clima.
  * @param {string} data.current_weather.icon - el codigo del icono del clima.
+ * @param {boolean} [data.stale] - true si el servidor respondio con datos desactualizados.
  */
 export function fillCurrent(data){
     city_name_span.textContent  = data.city;
@@ -56,6 +58,8 @@ export function fillCurrent(data){
     current_desc.textContent    = data.current_weather.description;
     // construye la url del icono del clima usando el codigo proporcionado.
     current_icon.src            = `http://openweathermap.org/img/wn/${data.current_weather.icon}@2x.png`;
+    // muestra el aviso de datos desactualizados solo si el servidor lo indica.
+    stale_notice.classList.toggle('hidden', !data.stale);
 }
 
 /**
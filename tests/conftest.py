@@ -0,0 +1,66 @@
+"""
+fixtures comunes: la aplicacion (modo wsgi) apuntando a un openweathermap falso
+en el mismo proceso, con almacen, cuota y metricas en una carpeta temporal.
+"""
+
+import pytest
+
+from benchmarks import fake_openweather
+from config import Config
+from weather_app import create_app
+
+
+@pytest.fixture
+def upstream():
+    """
+    openweathermap falso sin demora; upstream.state.errors simula fallas.
+    """
+    server = fake_openweather.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def make_config(upstream, tmp_path):
+    """
+    fabrica de configuraciones: make_config(**overrides) crea la clase de configuracion de prueba.
+    """
+    def factory(**overrides):
+        values = {
+            "DEBUG": False,
+            "TESTING": True,
+            "OPENWEATHER_API_KEY": "test",
+            "WEATHER_URL": f"{upstream.base_url}/data/2.5/weather",
+            "FORECAST_URL": f"{upstream.base_url}/data/2.5/forecast",
+            "CACHE_BACKEND": "memory",
+            "PREWARM_ENABLED": False,
+            "QUOTA_ENABLED": False,
+            "QUOTA_PATH": str(tmp_path / "quota.db"),
+            "STORE_PATH": str(tmp_path / "store.db"),
+            "CITY_LOCATIONS_PATH": str(tmp_path / "city_locations.json"),
+            "METRICS_DIR": str(tmp_path / "metrics"),
+            "PREWARM_LOCK_PATH": str(tmp_path / "prewarm.lock"),
+        }
+        values.update(overrides)
+        return type("TestConfig", (Config,), values)
+    return factory
+
+
+@pytest.fixture
+def make_app(make_config):
+    """
+    fabrica de aplicaciones: make_app(**overrides) crea una aplicacion de prueba.
+    """
+    def factory(**overrides):
+        return create_app(make_config(**overrides))
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,102 @@
+"""
+rutas del modo asgi (quart + aiohttp); se omiten si faltan los paquetes de requirements-async.txt.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("quart")
+pytest.importorskip("aiohttp")
+
+from weather_app.asgi import create_asgi_app
+
+
+@pytest.fixture
+def asgi_app(make_config):
+    return create_asgi_app(make_config())
+
+
+def request(app, method, path, **kwargs):
+    """
+    hacer una solicitud a la aplicacion asgi y devolver (respuesta, cuerpo).
+    """
+    async def run():
+        async with app.test_app():
+            response = await app.test_client().open(path, method=method, **kwargs)
+            return response, await response.get_data()
+    return asyncio.run(run())
+
+
+def test_weather_returns_the_report(asgi_app):
+    response, body = request(asgi_app, "GET", "/weather?city=Cordoba")
+
+    assert response.status_code == 200
+    assert set(json.loads(body)) == {"city", "current_weather", "weekly_forecast", "stale"}
+
+
+def test_weather_replies_304_for_the_current_etag(asgi_app, upstream):
+    first, _ = request(asgi_app, "GET", "/weather?city=Cordoba")
+    calls = upstream.state.stats()["total"]
+
+    again, body = request(asgi_app, "GET", "/weather?city=Cordoba", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert body == b""
+    assert upstream.state.stats()["total"] == calls
+
+
+@pytest.mark.parametrize("query", ["", "?city=%20"])
+def test_weather_rejects_a_blank_city_without_calling_upstream(asgi_app, upstream, query):
+    response, body = request(asgi_app, "GET", f"/weather{query}")
+
+    assert response.status_code == 400
+    assert json.loads(body)["error"] == "parametro 'city' es requerido."
+    assert upstream.state.stats()["total"] == 0
+
+
+def test_weather_maps_upstream_errors(asgi_app, upstream):
+    upstream.state.errors = {401: 1.0}
+
+    response, body = request(asgi_app, "GET", "/weather?city=Rosario")
+
+    assert response.status_code == 401
+    assert json.loads(body)["error"] == "clave de api openweathermap invalida o faltante."
+
+
+def test_batch_returns_one_result_per_city_in_order(asgi_app):
+    response, body = request(asgi_app, "POST", "/weather/batch", json={"cities": ["Cordoba", "Mendoza"]})
+
+    results = json.loads(body)["results"]
+    assert response.status_code == 200
+    assert [result["status"] for result in results] == [200, 200]
+
+
+def test_batch_requires_a_non_empty_list(asgi_app):
+    response, _ = request(asgi_app, "POST", "/weather/batch", json={"cities": []})
+
+    assert response.status_code == 400
+
+
+def test_province_stream_sends_one_line_per_city(asgi_app):
+    response, body = request(asgi_app, "GET", "/weather/province?province=Tierra del Fuego")
+
+    lines = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert lines and all(line["status"] == 200 for line in lines)
+
+
+@pytest.mark.parametrize("query, status", [("", 400), ("?province=Atlantida", 404)])
+def test_province_stream_error_paths(asgi_app, query, status):
+    response, body = request(asgi_app, "GET", f"/weather/province{query}")
+
+    assert response.status_code == status
+    assert "error" in json.loads(body)
+
+
+def test_metrics_is_internal(asgi_app):
+    response, _ = request(asgi_app, "GET", "/metrics")
+
+    assert response.status_code == 404
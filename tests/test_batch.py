@@ -0,0 +1,48 @@
+import pytest
+
+
+def test_batch_returns_one_result_per_city_in_order(client):
+    response = client.post("/weather/batch", json={"cities": ["Cordoba", "Rosario"]})
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == [200, 200]
+    assert [r["city"] for r in results] == ["Cordoba", "Rosario"]
+
+
+@pytest.mark.parametrize("body", [["Córdoba"], "Córdoba", 3, None])
+def test_batch_rejects_bodies_that_are_not_objects(client, body):
+    response = client.post("/weather/batch", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_batch_rejects_invalid_body_json(client):
+    response = client.post("/weather/batch", data="{", content_type="application/json")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("cities", [None, [], "Cordoba", {"a": 1}])
+def test_batch_requires_a_non_empty_list(client, cities):
+    response = client.post("/weather/batch", json={"cities": cities})
+
+    assert response.status_code == 400
+
+
+def test_batch_reports_invalid_city_indexes(client):
+    response = client.post("/weather/batch", json={"cities": ["Cordoba", " ", 3]})
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == {"invalid_indexes": [1, 2]}
+
+
+def test_batch_limits_the_number_of_cities(make_app):
+    client = make_app(BATCH_MAX_CITIES=2).test_client()
+
+    response = client.post("/weather/batch", json={"cities": ["a", "b", "c"]})
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == {"cities": "recibidas 3"}
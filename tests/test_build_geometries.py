@@ -0,0 +1,40 @@
+"""
+pasos puros del script de geometrias; se omiten si falta geopandas.
+"""
+
+import importlib
+import os
+
+import pytest
+
+pytest.importorskip("geopandas")
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), os.pardir, "weather_app", "utils", "data_conversion")
+
+
+@pytest.fixture
+def build(monkeypatch):
+    # el script importa sus vecinos como modulos de primer nivel
+    monkeypatch.syspath_prepend(SCRIPTS)
+    return importlib.import_module("build_geometries")
+
+
+SQUARE = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]
+
+
+def test_quantize_ring_closes_the_ring_and_drops_repeated_points(build):
+    ring = [[0.001, 0.0], [0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]
+
+    assert build.quantize_ring(ring, 1) == SQUARE
+
+
+@pytest.mark.parametrize("ring", [[], [[0.0, 0.0], [0.01, 0.0], [0.0, 0.0]]])
+def test_quantize_ring_drops_degenerate_rings(build, ring):
+    assert build.quantize_ring(ring, 1) is None
+
+
+def test_quantize_geometry_skips_empty_rings_and_parts(build):
+    geometry = {"type": "MultiPolygon", "coordinates": [[SQUARE, []], [], [[]]]}
+
+    assert build.quantize_geometry(geometry, 1) == {"type": "Polygon", "coordinates": [SQUARE]}
+    assert build.quantize_geometry(None, 1) is None
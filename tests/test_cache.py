@@ -0,0 +1,68 @@
+import time
+
+from weather_app.services.cache import FORECAST, WEATHER, MemoryCacheBackend, WeatherCache, make_cache_key
+
+
+def test_memory_backend_evicts_the_least_recently_used_entry():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a") # "b" pasa a ser la menos usada
+
+    backend.set("c", 3, ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.evictions == 1
+
+
+def test_memory_backend_drops_expired_entries():
+    backend = MemoryCacheBackend()
+    backend.set("a", 1, ttl=0.01)
+
+    time.sleep(0.02)
+
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_cache_key_ignores_accents_case_and_spaces():
+    assert make_cache_key(WEATHER, "Córdoba", "metric", "es") == make_cache_key(WEATHER, " CORDOBA ", "metric", "es")
+    assert make_cache_key(WEATHER, "Cordoba", "metric", "es") != make_cache_key(FORECAST, "Cordoba", "metric", "es")
+    assert make_cache_key(WEATHER, "Cordoba", "metric", "es") != make_cache_key(WEATHER, "Cordoba", "imperial", "es")
+
+
+def test_weather_cache_keeps_expired_entries_for_stale_reads():
+    cache = WeatherCache(MemoryCacheBackend(), weather_ttl=10, forecast_ttl=10, stale_ttl=60)
+    cache.set(WEATHER, "Cordoba", "metric", "es", {"temp": 20}, stored_at=time.time() - 30)
+
+    assert cache.get(WEATHER, "Cordoba", "metric", "es") is None
+    assert cache.get_stale(WEATHER, "Cordoba", "metric", "es") == {"temp": 20}
+    assert cache.stats()["misses"] == 1
+
+
+def test_weather_cache_does_not_store_entries_older_than_the_stale_window():
+    cache = WeatherCache(MemoryCacheBackend(), weather_ttl=10, forecast_ttl=10, stale_ttl=5)
+
+    cache.set(WEATHER, "Cordoba", "metric", "es", {"temp": 20}, stored_at=time.time() - 30)
+
+    assert cache.get_stale(WEATHER, "Cordoba", "metric", "es") is None
+
+
+def test_weather_cache_freshness_counts_down_the_ttl():
+    cache = WeatherCache(MemoryCacheBackend(), weather_ttl=600, forecast_ttl=3600)
+
+    assert cache.freshness(WEATHER, time.time() - 100) in (499, 500)
+    assert cache.freshness(FORECAST, time.time() - 4000) == 0
+
+
+def test_repeated_lookups_are_served_from_the_cache(client, upstream):
+    first = client.get("/weather?city=Cordoba")
+    calls = upstream.state.stats()["total"]
+
+    second = client.get("/weather?city=córdoba")
+
+    assert first.status_code == second.status_code == 200
+    assert calls == 2 # clima actual y pronostico
+    assert upstream.state.stats()["total"] == calls
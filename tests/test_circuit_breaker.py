@@ -0,0 +1,112 @@
+import time
+
+from weather_app.services import openweather
+from weather_app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["opened_count"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_a_limited_number_of_probes_through():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01, half_open_max_calls=1)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.release_probe() # la prueba termino sin respuesta del servicio (ej. 404)
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened_count"] == 2
+
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_upstream_server_errors_open_the_breaker(make_app, upstream):
+    app = make_app(BREAKER_FAILURE_THRESHOLD=1)
+    upstream.state.errors = {500: 1.0}
+
+    assert app.test_client().get("/weather?city=Salta").status_code >= 500
+    assert app.extensions["upstream_breaker"].state == OPEN
+
+
+def test_open_breaker_rejects_without_calling_upstream(app, client, upstream):
+    breaker = app.extensions["upstream_breaker"] = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+
+    response = client.get("/weather?city=Jujuy")
+
+    assert response.status_code == 503
+    assert upstream.state.stats()["total"] == 0
+
+
+def test_client_errors_do_not_open_the_breaker(make_app, upstream):
+    app = make_app(BREAKER_FAILURE_THRESHOLD=1)
+    upstream.state.errors = {404: 1.0}
+
+    app.test_client().get("/weather?city=Atlantida")
+
+    assert app.extensions["upstream_breaker"].state == CLOSED
+
+
+def test_expired_entries_are_served_stale_while_upstream_is_down(make_app, upstream):
+    client = make_app(CACHE_WEATHER_TTL=0, CACHE_FORECAST_TTL=0, CACHE_STALE_TTL=600).test_client()
+    assert client.get("/weather?city=Neuquen").get_json()["stale"] is False
+    upstream.state.errors = {500: 1.0}
+
+    response = client.get("/weather?city=Neuquen")
+
+    assert response.status_code == 200
+    assert response.get_json()["stale"] is True
+
+
+def test_unexpected_errors_in_a_probe_reopen_the_breaker(app, client, monkeypatch):
+    breaker = app.extensions["upstream_breaker"] = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    def unreadable(*args):
+        raise ValueError("respuesta ilegible")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(openweather, "_fetch_missing", unreadable)
+        assert client.get("/weather?city=Salta").status_code == 500
+
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+    assert client.get("/weather?city=Salta").status_code == 200
+    assert breaker.state == CLOSED
@@ -0,0 +1,66 @@
+import pytest
+
+from weather_app.utils.city_index import CityIndex, fold
+
+CITIES = {
+    "Córdoba": [{"name": "Córdoba", "default": True}, {"name": "Río Cuarto"}, {"name": "San Francisco"}],
+    "Santa Fe": [{"name": "Rosario", "default": True}, {"name": "San Justo"}],
+    "Buenos Aires": [{"name": "San Justo"}],
+}
+
+
+@pytest.fixture
+def index():
+    return CityIndex(CITIES)
+
+
+def test_fold_ignores_accents_case_and_spaces():
+    assert fold("  RÍO   Cuarto ") == fold("rio cuarto")
+
+
+def test_canonical_names_are_accent_insensitive(index):
+    assert index.canonical_province("cordoba") == "Córdoba"
+    assert index.canonical_city("RIO CUARTO") == "Río Cuarto"
+    assert index.canonical_province("Atlantida") is None
+
+
+def test_city_province_prefers_the_given_province(index):
+    assert index.city_province("San Justo", "buenos aires") == "Buenos Aires"
+    assert index.city_province("San Justo", "Córdoba") == "Santa Fe" # no esta listada ahi
+    assert index.city_province("Atlantida") is None
+
+
+def test_suggest_lists_prefix_matches_first(index):
+    names = [entry["name"] for entry in index.suggest("san")]
+
+    assert set(names[:2]) == {"San Francisco", "San Justo"}
+    assert index.suggest("   ") == []
+
+
+def test_suggest_tolerates_typos(index):
+    assert "Rosario" in [entry["name"] for entry in index.suggest("rosaro")]
+
+
+def test_suggest_endpoint_clamps_the_limit(client):
+    response = client.get("/suggest?q=san&limit=500")
+
+    assert response.status_code == 200
+    assert response.get_json()["query"] == "san"
+    assert 0 < len(response.get_json()["suggestions"]) <= 50
+
+
+def test_suggest_endpoint_without_query_returns_no_suggestions(client):
+    assert client.get("/suggest").get_json() == {"query": "", "suggestions": []}
+
+
+@pytest.mark.parametrize("query, expected", [("?name=CORDOBA", True), ("?name=Atlantida", False), ("", False)])
+def test_is_province(client, query, expected):
+    assert client.get(f"/is_province{query}").get_json() == {"is_province": expected}
+
+
+@pytest.mark.parametrize("query, status", [("", 400), ("?province=Atlantida", 404)])
+def test_cities_by_province_error_paths(client, query, status):
+    response = client.get(f"/cities_by_province{query}")
+
+    assert response.status_code == status
+    assert "error" in response.get_json()
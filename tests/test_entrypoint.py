@@ -0,0 +1,15 @@
+def test_gunicorn_entrypoint_has_the_metrics_instrumentation(monkeypatch):
+    # gunicorn sirve 'run:app': debe medir las solicitudes igual que create_app
+    import run
+
+    hooks = [f.__name__ for f in run.app.before_request_funcs.get(None, [])]
+    assert "metrics_before_request" in hooks
+    assert "metrics" in run.app.blueprints
+
+    monkeypatch.setitem(run.app.config, "INTERNAL_ENDPOINTS_TOKEN", "t")
+    client = run.app.test_client()
+    client.get("/cities_by_province?province=Cordoba")
+    response = client.get("/metrics", headers={"Authorization": "Bearer t"})
+
+    assert response.status_code == 200
+    assert 'http_requests_total{endpoint="/cities_by_province"' in response.get_data(as_text=True)
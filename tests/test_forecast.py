@@ -0,0 +1,87 @@
+import pytest
+
+from weather_app.exceptions.server_errors import InternalServerError
+from weather_app.utils.forecast import aggregate_forecasts, group_forecast_by_day
+
+# 2024-01-01 00:00 utc
+MIDNIGHT_UTC = 1704067200
+
+
+def item(dt, temp, description="nubes", icon="04d", rain=None):
+    data = {
+        "dt": dt,
+        "main": {"temp": temp, "temp_max": temp + 1, "temp_min": temp - 1, "humidity": 50},
+        "weather": [{"description": description, "icon": icon}],
+        "wind": {"speed": 3},
+        "pop": 0.2,
+    }
+    if rain is not None:
+        data["rain"] = {"3h": rain}
+    return data
+
+
+def test_intervals_are_grouped_by_local_day():
+    # 01:00 utc del 1 de enero son las 22:00 del 31 de diciembre en argentina (utc-3)
+    forecast = {"city": {"timezone": -10800}, "list": [
+        item(MIDNIGHT_UTC + 3600, 20),
+        item(MIDNIGHT_UTC + 4 * 3600, 10, rain=1.5),
+        item(MIDNIGHT_UTC + 7 * 3600, 14, rain=0.5),
+    ]}
+
+    days = group_forecast_by_day(forecast)
+
+    assert [day["date"] for day in days] == ["2023-12-31", "2024-01-01"]
+    assert days[1]["temp_max"] == 15
+    assert days[1]["temp_min"] == 9
+    assert days[1]["temp_mean"] == 12
+    assert days[1]["rain_volume_mm"] == 2.0
+
+
+def test_dominant_condition_prefers_the_day_icon():
+    forecast = {"list": [
+        item(MIDNIGHT_UTC, 10, "lluvia ligera", "10n"),
+        item(MIDNIGHT_UTC + 3 * 3600, 10, "lluvia ligera", "10d"),
+        item(MIDNIGHT_UTC + 6 * 3600, 10, "cielo claro", "01d"),
+    ]}
+
+    day = group_forecast_by_day(forecast)[0]
+
+    assert (day["description"], day["icon"]) == ("lluvia ligera", "10d")
+
+
+def test_days_are_limited_to_max_days():
+    forecast = {"list": [item(MIDNIGHT_UTC + d * 86400, 10) for d in range(6)]}
+
+    assert len(group_forecast_by_day(forecast, max_days=3)) == 3
+
+
+def test_unexpected_structure_raises_internal_server_error():
+    with pytest.raises(InternalServerError):
+        group_forecast_by_day({"list": [{"dt": MIDNIGHT_UTC}]})
+
+
+def test_unordered_intervals_are_grouped_like_ordered_ones():
+    ordered = [item(MIDNIGHT_UTC + h * 3600, 10 + h, rain=0.5) for h in range(0, 72, 3)]
+    shuffled = ordered[::-1]
+
+    assert group_forecast_by_day({"list": shuffled}) == group_forecast_by_day({"list": ordered})
+
+
+def test_missing_optional_fields_count_as_zero():
+    bare = {
+        "dt": MIDNIGHT_UTC,
+        "main": {"temp_max": 12, "temp_min": 8},
+        "weather": [{"description": "nubes", "icon": "04d"}],
+        "wind": None,
+    }
+
+    day = group_forecast_by_day({"list": [bare, item(MIDNIGHT_UTC + 3 * 3600, 10)]})[0]
+
+    assert day["temp_mean"] == 11
+    assert (day["humidity_max"], day["wind_speed_max"], day["pop"], day["rain_volume_mm"]) == (50, 3, 0.2, 0)
+
+
+def test_aggregate_forecasts_returns_one_list_per_city_in_order():
+    forecasts = [{"list": [item(MIDNIGHT_UTC, temp)]} for temp in (5, 25)]
+
+    assert [days[0]["temp_max"] for days in aggregate_forecasts(forecasts)] == [6, 26]
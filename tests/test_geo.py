@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from weather_app.services.geo import ProvinceLocator
+from weather_app.services.locations import location_key
+
+# dos provincias cuadradas vecinas, con [lon, lat] como en el geojson
+WEST = [[[-70, -40], [-65, -40], [-65, -35], [-70, -35], [-70, -40]]]
+EAST = [[[-65, -40], [-60, -40], [-60, -35], [-65, -35], [-65, -40]]]
+
+
+def test_province_locator_is_built_on_the_first_reverse_geocode(app, client):
+    assert "province_locator" not in app.extensions
+    assert client.get("/status/geo").status_code == 404 # endpoints internos apagados
+
+    response = client.get("/reverse_geocode?lat=-31.42&lon=-64.18")
+
+    assert response.status_code == 200
+    assert response.get_json()["province"] == "Córdoba"
+    assert "province_locator" in app.extensions
+
+
+def test_geo_status_does_not_build_the_locator(make_app):
+    app = make_app(INTERNAL_ENDPOINTS_TOKEN="t")
+
+    response = app.test_client().get("/status/geo", headers={"Authorization": "Bearer t"})
+
+    assert response.get_json() == {"loaded": False}
+    assert "province_locator" not in app.extensions
+
+
+@pytest.mark.parametrize("lat, lon, province, city", [
+    (-31.42, -64.18, "Córdoba", "Cordoba"),
+    (-32.89, -68.84, "Mendoza", "Mendoza"),
+    (-31.63, -60.70, "Santa Fe", "Santa Fe"),
+])
+def test_reverse_geocode_falls_back_to_the_default_city_of_the_shipped_data(make_app, tmp_path, lat, lon, province, city):
+    # sin tabla de coordenadas generada, como en el repositorio
+    client = make_app(CITY_LOCATIONS_PATH=str(tmp_path / "missing.json")).test_client()
+
+    response = client.get(f"/reverse_geocode?lat={lat}&lon={lon}&weather=1")
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["province"] == province
+    assert body["city"] == {"name": city, "lat": None, "lon": None, "distance_km": None}
+    assert "current_weather" in body["weather"]
+
+
+def test_reverse_geocode_picks_the_nearest_city_of_the_table(make_app, tmp_path):
+    table = tmp_path / "city_locations.json"
+    table.write_text(json.dumps({"Córdoba": {
+        "Cordoba": {"id": 1, "lat": -31.4135, "lon": -64.1811},
+        "Rio Cuarto": {"id": 2, "lat": -33.1307, "lon": -64.3499},
+    }}), encoding="utf-8")
+    client = make_app(CITY_LOCATIONS_PATH=str(table)).test_client()
+
+    city = client.get("/reverse_geocode?lat=-33.0&lon=-64.3").get_json()["city"]
+
+    assert city["name"] == "Río Cuarto"
+    assert city["distance_km"] < 20
+
+
+def test_reverse_geocode_rejects_invalid_coordinates(client):
+    response = client.get("/reverse_geocode?lat=abc&lon=200")
+
+    assert response.status_code == 400
+    assert set(response.get_json()["errors"]) == {"lat", "lon"}
+
+
+def test_reverse_geocode_outside_every_province_is_not_found(client):
+    assert client.get("/reverse_geocode?lat=0&lon=0").status_code == 404
+
+
+def test_reverse_geocode_requires_both_coordinates(client):
+    response = client.get("/reverse_geocode?lat=-31.4")
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "parametros 'lat' y 'lon' son requeridos."
+
+
+def make_locator():
+    cities = {"Oeste": [{"name": "A"}, {"name": "B"}], "Este": [{"name": "C"}]}
+    coordinates = {
+        location_key("A", "Oeste"): {"lat": -36, "lon": -69},
+        location_key("B", "Oeste"): {"lat": -39, "lon": -66},
+        # C no tiene coordenadas en la tabla
+    }
+    return ProvinceLocator([("Oeste", WEST), ("Este", EAST)], cities, coordinates)
+
+
+def test_locator_finds_the_province_and_the_nearest_listed_city():
+    locator = make_locator()
+
+    result = locator.locate(-38.5, -66.5)
+
+    assert result["province"] == "Oeste"
+    assert result["city"]["name"] == "B"
+
+
+def test_locator_falls_back_to_the_default_city_without_coordinates():
+    locator = make_locator()
+
+    assert locator.locate(-37, -62)["city"] == {"name": "C", "lat": None, "lon": None, "distance_km": None}
+    assert locator.locate(-20, -62) is None
+    assert locator.stats()["lookups"] == 2
+    assert locator.stats()["misses"] == 1
+    assert locator.stats()["cities_with_coordinates"] == 2
@@ -0,0 +1,58 @@
+import gzip
+
+
+def test_weather_replies_304_for_the_current_etag(client, upstream):
+    first = client.get("/weather?city=Cordoba")
+    calls = upstream.state.stats()["total"]
+
+    again = client.get("/weather?city=Cordoba", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith("W/")
+    assert first.cache_control.max_age > 0
+    assert again.status_code == 304
+    assert again.data == b""
+    assert upstream.state.stats()["total"] == calls
+
+
+def test_weather_ignores_an_old_etag(client):
+    response = client.get("/weather?city=Cordoba", headers={"If-None-Match": 'W/"old"'})
+
+    assert response.status_code == 200
+    assert response.get_json()["city"]
+
+
+def test_cities_by_province_replies_304_for_the_cities_version(client):
+    first = client.get("/cities_by_province?province=Cordoba")
+
+    by_etag = client.get("/cities_by_province?province=Cordoba", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert by_etag.status_code == 304
+
+
+def test_is_province_replies_304_for_the_cities_version(client):
+    first = client.get("/is_province?name=Mendoza")
+
+    again = client.get("/is_province?name=Mendoza", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+
+
+def test_json_is_compressed_when_accepted(make_app):
+    client = make_app(COMPRESS_MIN_SIZE=0).test_client()
+
+    response = client.get("/weather?city=Cordoba", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"weekly_forecast" in gzip.decompress(response.data)
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_json_is_not_compressed_without_accept_encoding(make_app):
+    client = make_app(COMPRESS_MIN_SIZE=0).test_client()
+
+    response = client.get("/weather?city=Cordoba", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["city"]
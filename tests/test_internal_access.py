@@ -0,0 +1,65 @@
+import pytest
+
+TOKEN = "s3creto"
+
+
+@pytest.fixture
+def internal_client(make_app):
+    return make_app(INTERNAL_ENDPOINTS_TOKEN=TOKEN).test_client()
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/status/cache", "/status/profile"])
+def test_internal_endpoints_are_disabled_without_a_token(client, path):
+    assert client.get(path).status_code == 404
+    assert client.post("/status/profile?seconds=5").status_code == 404
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer otro"}, {"Authorization": TOKEN}])
+def test_internal_endpoints_require_the_bearer_token(internal_client, headers):
+    response = internal_client.get("/status/cache", headers=headers)
+
+    assert response.status_code == 401
+    assert "error" in response.get_json()
+
+
+def test_internal_endpoints_answer_with_the_token(internal_client):
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+
+    assert internal_client.get("/status/cache", headers=headers).status_code == 200
+    response = internal_client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert "http_requests_total" in response.get_data(as_text=True)
+
+
+def test_cors_is_only_sent_for_public_routes(internal_client):
+    headers = {"Origin": "https://example.com", "Authorization": f"Bearer {TOKEN}"}
+
+    public = internal_client.get("/cities_by_province?province=Cordoba", headers=headers)
+    internal = internal_client.get("/metrics", headers=headers)
+
+    assert public.headers.get("Access-Control-Allow-Origin") in ("*", "https://example.com")
+    assert "Access-Control-Allow-Origin" not in internal.headers
+
+
+@pytest.mark.parametrize("query", [
+    "seconds=5&interval=nan", "seconds=5&interval=inf", "seconds=5&interval=0.0001", "seconds=5&interval=-1",
+    "seconds=nan", "seconds=inf", "seconds=0", "seconds=abc",
+])
+def test_profiler_rejects_invalid_durations_and_intervals(make_app, query):
+    client = make_app(INTERNAL_ENDPOINTS_TOKEN=TOKEN, PROFILER_ENABLED=True).test_client()
+
+    response = client.post(f"/status/profile?{query}", headers={"Authorization": f"Bearer {TOKEN}"})
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_profiler_starts_with_a_valid_interval(make_app):
+    client = make_app(INTERNAL_ENDPOINTS_TOKEN=TOKEN, PROFILER_ENABLED=True).test_client()
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+
+    response = client.post("/status/profile?seconds=5&interval=0.001", headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()["interval_seconds"] == 0.001
+    assert client.delete("/status/profile", headers=headers).status_code == 200
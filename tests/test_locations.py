@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from weather_app.services.locations import CityLocations, load_locations_table, location_key
+from weather_app.services.store import WeatherStore
+
+
+def weather_payload(city_id, country, name="Merlo"):
+    return {"id": city_id, "name": name, "coord": {"lat": -34.66, "lon": -58.73}, "sys": {"country": country}}
+
+
+def test_unresolved_cities_are_queried_with_the_country_code():
+    locations = CityLocations()
+
+    assert locations.query_params("Merlo", "Buenos Aires") == {"q": "Merlo,AR"}
+    assert locations.query_params("Merlo") == {"q": "Merlo,AR"}
+    assert locations.query_params("Puerto Argentino", "Islas Malvinas") == {"q": "Puerto Argentino,FK"}
+
+
+def test_learn_rejects_results_from_another_country():
+    locations = CityLocations()
+
+    assert not locations.learn("Merlo", weather_payload(1, "US"), "Buenos Aires")
+    assert locations.get("Merlo", "Buenos Aires") is None
+    assert locations.query_params("Merlo", "Buenos Aires") == {"q": "Merlo,AR"}
+    assert locations.stats()["rejected"] == 1
+
+
+def test_learn_keys_homonymous_cities_by_province():
+    locations = CityLocations()
+
+    assert locations.learn("Merlo", weather_payload(1, "AR"), "Buenos Aires")
+    assert locations.learn("Merlo", weather_payload(2, "AR"), "San Luis")
+
+    assert locations.cache_name("Merlo", "Buenos Aires") == "#1"
+    assert locations.cache_name("merlo", "san luis") == "#2"
+    assert locations.query_params("Merlo", "San Luis") == {"id": 2}
+
+
+def test_stored_locations_without_province_or_country_are_ignored(tmp_path):
+    store = WeatherStore(str(tmp_path / "store.db"))
+    store.put_location("merlo", {"id": 1, "country": "AR"}) # version anterior: solo por nombre
+    store.put_location(location_key("Merlo", "San Luis"), {"id": 2, "country": "US"})
+    store.put_location(location_key("Merlo", "Buenos Aires"), {"id": 3, "country": "AR"})
+
+    locations = CityLocations(store=store)
+
+    assert locations.get("Merlo") is None
+    assert locations.get("Merlo", "San Luis") is None
+    assert locations.get("Merlo", "Buenos Aires")["id"] == 3
+
+
+def test_locations_table_is_keyed_by_province_and_city(tmp_path):
+    path = tmp_path / "city_locations.json"
+    path.write_text(json.dumps({
+        "Buenos Aires": {"Merlo": {"id": 1, "lat": -34.66, "lon": -58.73}},
+        "San Luis": {"Merlo": {"id": 2, "lat": -32.34, "lon": -65.01}},
+    }), encoding="utf-8")
+
+    locations = CityLocations(table=load_locations_table(str(path)))
+
+    assert locations.query_params("Merlo", "Buenos Aires") == {"id": 1}
+    assert locations.query_params("Merlo", "San Luis") == {"id": 2}
+
+
+def test_missing_table_fails_at_startup_when_required(make_app, tmp_path):
+    with pytest.raises(RuntimeError):
+        make_app(CITY_LOCATIONS_REQUIRED=True, CITY_LOCATIONS_PATH=str(tmp_path / "missing.json"))
+
+
+def test_weather_request_learns_the_city_under_its_province(app, client):
+    response = client.get("/weather?city=cordoba")
+
+    assert response.status_code == 200
+    with app.app_context():
+        from weather_app.services.locations import get_city_locations
+        assert get_city_locations().get("Córdoba", "Córdoba")["country"] == "AR"
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from weather_app.services.metrics import MetricsRegistry
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write_snapshot(directory, pid, counters, written_at=None):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"metrics-{pid}-test.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "pid": pid,
+            "written_at": written_at or time.time(),
+            "counters": [["http_requests_total", [["endpoint", "/weather"], ["status", "200"]], value] for value in counters],
+            "gauges": [["http_requests_in_flight", [["endpoint", "/weather"]], 3]],
+            "histograms": [],
+        }, f)
+    return path
+
+
+def requests_total(merged):
+    return merged["counters"].get(("http_requests_total", (("endpoint", "/weather"), ("status", "200"))), 0)
+
+
+def test_dead_worker_snapshots_are_folded_into_the_retired_totals(tmp_path):
+    registry = MetricsRegistry()
+    registry.configure(str(tmp_path))
+    registry.inc("http_requests_total", endpoint="/weather", status=200)
+    server = registry.server_directory()
+    dead = write_snapshot(server, dead_pid(), [5])
+
+    merged = registry.collect()
+
+    assert requests_total(merged) == 6
+    assert merged["workers"] == 1
+    assert ("http_requests_in_flight", (("endpoint", "/weather"),)) not in merged["gauges"]
+    assert not os.path.exists(dead)
+    # la copia acumulada no se vuelve a sumar en la siguiente lectura
+    assert requests_total(registry.collect()) == 6
+
+
+def test_snapshot_of_a_reused_pid_is_not_counted_as_running(tmp_path):
+    registry = MetricsRegistry()
+    registry.configure(str(tmp_path))
+    # el pid existe (es este proceso de prueba) pero la copia no se actualiza hace rato
+    write_snapshot(registry.server_directory(), os.getppid(), [2], written_at=time.time() - 3600)
+
+    merged = registry.collect()
+
+    assert requests_total(merged) == 2
+    assert merged["workers"] == 1
+
+
+def test_each_process_writes_its_own_snapshot_file(tmp_path):
+    registry = MetricsRegistry()
+    registry.configure(str(tmp_path))
+    registry.flush()
+
+    files = os.listdir(registry.server_directory())
+
+    assert len(files) == 1
+    assert files[0].startswith(f"metrics-{os.getpid()}-")
+
+
+def test_directories_of_stopped_servers_are_removed(tmp_path):
+    registry = MetricsRegistry()
+    registry.configure(str(tmp_path))
+    stopped = tmp_path / f"server-{dead_pid()}"
+    write_snapshot(str(stopped), dead_pid(), [7])
+
+    registry.remove_stopped_servers()
+
+    assert not stopped.exists()
+    assert requests_total(registry.collect()) == 0
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.mark.parametrize("attempt", range(5))
+def test_weather_error_wins_when_both_calls_fail(client, upstream, attempt):
+    upstream.state.errors = {401: 1.0}
+
+    response = client.get("/weather?city=Rosario")
+
+    assert response.status_code == 401
+    # el mensaje del pronostico dice "... faltante para pronostico."
+    assert response.get_json()["error"] == "clave de api openweathermap invalida o faltante."
@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+from weather_app.services import prewarmer
+from weather_app.services.cities import get_cities_data
+from weather_app.services.prewarmer import Prewarmer, note_city_request
+from weather_app.services.store import get_weather_store
+
+
+@pytest.fixture(autouse=True)
+def forget_recent_requests(monkeypatch):
+    # los pedidos recientes del worker son globales del modulo
+    monkeypatch.setattr(prewarmer, "_recent", prewarmer.OrderedDict())
+
+
+def test_leader_sees_cities_requested_in_other_workers(app, monkeypatch):
+    with app.app_context():
+        note_city_request("rosario")
+        # otro worker: no comparte la memoria de este, solo el almacen
+        monkeypatch.setattr(prewarmer, "_recent", prewarmer.OrderedDict())
+
+        cities = Prewarmer(app, get_cities_data()).priority_cities()
+
+    assert ("rosario", "Santa Fe") in cities
+    defaults = sum(1 for province_cities in get_cities_data().values() for c in province_cities if c.get("default"))
+    assert cities.index(("rosario", "Santa Fe")) >= defaults
+
+
+def test_requests_are_written_once_per_interval_per_worker(app, monkeypatch):
+    writes = []
+    with app.app_context():
+        store = get_weather_store()
+        monkeypatch.setattr(store, "note_request", lambda *args: writes.append(args))
+        note_city_request("Rosario")
+        note_city_request("Rosario")
+        note_city_request("Parana")
+
+    assert [args[1] for args in writes] == ["Rosario", "Parana"]
+
+
+def test_recent_cities_stay_in_the_worker_without_store(make_app):
+    app = make_app(STORE_ENABLED=False)
+    with app.app_context():
+        note_city_request("Ushuaia")
+        cities = Prewarmer(app, get_cities_data()).priority_cities()
+
+    assert ("Ushuaia", "Tierra del Fuego") in cities
+
+
+def test_only_cities_found_upstream_are_recorded(app, client, upstream):
+    upstream.state.errors = {404: 1.0}
+    assert client.get("/weather?city=Rosarioo").status_code == 404
+
+    upstream.state.errors = {}
+    assert client.get("/weather?city=Rosario").status_code == 200
+
+    with app.app_context():
+        recent = prewarmer._recent_cities()
+    assert [city for city, _ in recent] == ["Rosario"]
+
+
+def test_unexpected_errors_fail_only_their_city(app, monkeypatch):
+    def fetch(city, **kwargs):
+        if city == "Rosario":
+            raise RuntimeError("respuesta ilegible")
+
+    monkeypatch.setattr(prewarmer, "get_weather_and_forecast", fetch)
+    warmer = Prewarmer(app, {"Santa Fe": [{"name": "Rosario", "default": True}, {"name": "Parana", "default": True}]})
+    warmer.seconds_per_call = 0
+
+    warmer.run_once()
+
+    assert warmer.status["refreshed"] == 1
+    assert warmer.status["failed"] == 1
+    assert warmer.status["last_error"] == "Rosario: respuesta ilegible"
+    assert warmer.status["running"] is False
+
+
+def test_a_failed_cycle_does_not_stop_the_thread(app, monkeypatch):
+    warmer = Prewarmer(app, {})
+    warmer.interval = 0
+    cycles = []
+
+    def run_once():
+        cycles.append(1)
+        if len(cycles) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        warmer.stop()
+
+    monkeypatch.setattr(warmer, "run_once", run_once)
+    warmer.start()
+    warmer._thread.join(timeout=5)
+
+    assert len(cycles) == 2
+    assert not warmer._thread.is_alive()
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from weather_app.services.cities import get_cities_data
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_province_stream_sends_one_line_per_listed_city(app, client):
+    response = client.get("/weather/province?province=cordoba")
+
+    lines = read_lines(response)
+    with app.app_context():
+        listed = [city["name"] for city in get_cities_data()["Córdoba"]]
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert sorted(line["city"] for line in lines) == sorted(listed)
+    assert all(line["status"] == 200 and "data" in line for line in lines)
+
+
+def test_province_stream_reports_city_errors_per_line(client, upstream):
+    upstream.state.errors = {404: 1.0}
+
+    response = client.get("/weather/province?province=Tierra del Fuego")
+
+    lines = read_lines(response)
+    assert response.status_code == 200
+    assert lines and all(line["status"] == 404 and "error" in line for line in lines)
+
+
+@pytest.mark.parametrize("query, status", [("", 400), ("?province=", 400), ("?province=Atlantida", 404)])
+def test_province_stream_error_paths(client, upstream, query, status):
+    response = client.get(f"/weather/province{query}")
+
+    assert response.status_code == status
+    assert "error" in response.get_json()
+    assert upstream.state.stats()["total"] == 0
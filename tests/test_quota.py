@@ -0,0 +1,72 @@
+import asyncio
+
+from weather_app.services.quota import BATCH, INTERACTIVE, PREFETCH, QuotaGovernor
+
+
+def test_calls_are_denied_once_the_bucket_is_empty(tmp_path):
+    governor = QuotaGovernor(str(tmp_path / "quota.db"), calls_per_minute=4)
+
+    assert governor.acquire(2)
+    assert governor.acquire(2)
+    assert not governor.acquire(1)
+    assert governor.stats()["granted"][INTERACTIVE] == 2
+    assert governor.stats()["denied"][INTERACTIVE] == 1
+
+
+def test_low_priorities_cannot_use_the_reserve(tmp_path):
+    governor = QuotaGovernor(str(tmp_path / "quota.db"), calls_per_minute=10, reserves={BATCH: 0.2, PREFETCH: 0.5})
+
+    assert governor.acquire(5, PREFETCH)
+    assert not governor.acquire(1, PREFETCH) # quedan 5, la reserva del precalentador es 5
+    assert governor.acquire(3, BATCH)
+    assert not governor.acquire(1, BATCH) # quedan 2, la reserva de los lotes es 2
+    assert governor.acquire(2, INTERACTIVE)
+
+
+def test_bucket_is_shared_between_governors_on_the_same_file(tmp_path):
+    path = str(tmp_path / "quota.db")
+    first = QuotaGovernor(path, calls_per_minute=3)
+    second = QuotaGovernor(path, calls_per_minute=3) # otro worker: no vuelve a llenar el balde
+
+    assert first.acquire(2)
+    assert not second.acquire(2)
+    assert second.acquire(1)
+
+
+def test_calls_wait_for_refill_up_to_the_max_wait(tmp_path):
+    # 600 por minuto = una ficha cada 0.1 segundos
+    governor = QuotaGovernor(str(tmp_path / "quota.db"), calls_per_minute=600, max_waits={INTERACTIVE: 1.0})
+    assert governor.acquire(600)
+
+    assert governor.acquire(1)
+    assert governor.stats()["waited_seconds"] > 0
+
+
+def test_async_acquire_follows_the_same_bucket(tmp_path):
+    governor = QuotaGovernor(str(tmp_path / "quota.db"), calls_per_minute=2)
+
+    results = asyncio.run(governor.acquire_async(2)), asyncio.run(governor.acquire_async(1))
+
+    assert results == (True, False)
+
+
+def test_exhaust_empties_the_minute_bucket(tmp_path):
+    governor = QuotaGovernor(str(tmp_path / "quota.db"), calls_per_minute=60)
+
+    governor.exhaust()
+
+    assert not governor.acquire(1)
+    assert governor.retry_after(1) >= 1
+    assert governor.stats()["upstream_limited"] == 1
+
+
+def test_weather_returns_429_when_the_quota_is_exhausted(make_app, upstream):
+    app = make_app(QUOTA_ENABLED=True, OPENWEATHER_CALLS_PER_MINUTE=2, QUOTA_MAX_WAIT=0)
+    client = app.test_client()
+
+    assert client.get("/weather?city=Cordoba").status_code == 200
+    response = client.get("/weather?city=Rosario")
+
+    assert response.status_code == 429
+    assert response.get_json()["retry_after"] >= 1
+    assert upstream.state.stats()["total"] == 2
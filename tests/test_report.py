@@ -0,0 +1,36 @@
+import pytest
+
+from weather_app.exceptions.server_errors import InternalServerError
+from weather_app.services.openweather import WeatherBundle
+from weather_app.services.report import format_weather_report
+
+WEATHER = {"name": "Córdoba", "main": {"temp": 21.5}, "weather": [{"description": "cielo claro", "icon": "01d"}]}
+
+
+def bundle(weather=WEATHER, forecast=None, stale=False):
+    return WeatherBundle(weather, forecast or {"list": []}, stale, {"weather": 1.0, "forecast": 1.0}, "cordoba|metric|es")
+
+
+def test_report_has_the_api_shape():
+    report = format_weather_report(bundle(stale=True))
+
+    assert report == {
+        "city": "Córdoba",
+        "current_weather": {"temp": 21.5, "description": "cielo claro", "icon": "01d"},
+        "weekly_forecast": [],
+        "stale": True,
+    }
+
+
+def test_forecast_errors_are_not_wrapped_twice():
+    with pytest.raises(InternalServerError) as error:
+        format_weather_report(bundle(forecast={"list": [{"dt": 0}]}))
+
+    assert error.value.message.startswith("error al procesar datos de pronostico")
+
+
+def test_unexpected_weather_data_is_an_internal_server_error():
+    with pytest.raises(InternalServerError) as error:
+        format_weather_report(bundle(weather={"name": "Córdoba"}))
+
+    assert error.value.message.startswith("error interno inesperado")
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weather_app.services.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_with_the_same_key_run_once():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"temp": 20}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "cordoba", fetch)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "cordoba", fetch) for _ in range(3)]
+        wait_for(lambda: flight.stats()["coalesced"] == 3)
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executions": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_followers_receive_the_leader_error():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream caido")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "cordoba", fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, "cordoba", fail)
+        wait_for(lambda: flight.stats()["coalesced"] == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    # la clave se libera: la siguiente llamada vuelve a ejecutar
+    assert flight.do("cordoba", lambda: "ok") == "ok"
+    assert flight.stats()["executions"] == 2
+
+
+def test_different_keys_do_not_share_a_call():
+    flight = SingleFlight()
+
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_async_calls_with_the_same_key_run_once():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"temp": 20}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("cordoba", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert calls == [1]
+    assert all(result == {"temp": 20} for result in results)
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_cancelling_one_waiter_does_not_cancel_the_shared_call():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("cordoba", fetch))
+        second = asyncio.ensure_future(flight.do("cordoba", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "ok"
+
+
+def test_concurrent_requests_for_a_city_share_upstream_calls(client, upstream):
+    upstream.state.latency = 0.2
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda _: client.get("/weather?city=Mendoza"), range(4)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert upstream.state.stats()["total"] == 2
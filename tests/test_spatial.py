@@ -0,0 +1,51 @@
+import random
+
+from weather_app.utils.spatial import STRtree, haversine_km, point_in_polygon, point_in_ring, ring_bbox
+
+SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+HOLE = [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+
+
+def test_point_in_ring_uses_the_even_odd_rule():
+    assert point_in_ring(5, 5, SQUARE)
+    assert not point_in_ring(11, 5, SQUARE)
+    assert not point_in_ring(5, -1, SQUARE)
+
+
+def test_points_inside_a_hole_are_outside_the_polygon():
+    assert point_in_polygon(2, 2, [SQUARE, HOLE])
+    assert not point_in_polygon(5, 5, [SQUARE, HOLE])
+
+
+def test_ring_bbox():
+    assert ring_bbox(HOLE) == (4, 4, 6, 6)
+
+
+def test_haversine_distance_between_known_cities():
+    # cordoba - buenos aires, unos 646 km
+    assert 640 < haversine_km(-31.4135, -64.1811, -34.6037, -58.3816) < 655
+    assert haversine_km(-31.4, -64.2, -31.4, -64.2) == 0
+
+
+def test_strtree_returns_the_same_candidates_as_a_linear_scan():
+    rng = random.Random(7)
+    items = []
+    for i in range(200):
+        x, y = rng.uniform(-70, -55), rng.uniform(-55, -22)
+        items.append(((x, y, x + rng.uniform(0.1, 3), y + rng.uniform(0.1, 3)), i))
+    tree = STRtree(items, node_capacity=4)
+
+    for _ in range(200):
+        x, y = rng.uniform(-72, -53), rng.uniform(-57, -20)
+        expected = {value for (min_x, min_y, max_x, max_y), value in items if min_x <= x <= max_x and min_y <= y <= max_y}
+        assert set(tree.query_point(x, y)) == expected
+
+    assert tree.size == 200
+    assert tree.height >= 3
+
+
+def test_empty_strtree_has_no_candidates():
+    tree = STRtree([])
+
+    assert tree.query_point(0, 0) == []
+    assert tree.size == 0
@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+from flask import Flask
+
+from weather_app.services import static_assets
+from weather_app.services.static_assets import MANIFEST_NAME, init_static_assets
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+@pytest.fixture
+def static_root(tmp_path):
+    """
+    carpeta static con un geojson, su variante .gz y el manifiesto que la registra.
+    """
+    root = tmp_path / "static"
+    (root / "data").mkdir(parents=True)
+    data = b'{"type":"FeatureCollection","features":[]}'
+    (root / "data" / "map.geojson").write_bytes(data)
+    (root / "data" / "map.geojson.gz").write_bytes(gzip.compress(data, mtime=0))
+    (root / MANIFEST_NAME).write_text(json.dumps({"data/map.geojson": content_hash(data)}), encoding="utf-8")
+    return root
+
+
+def make_static_app(root, **config):
+    app = Flask(__name__, static_folder=str(root))
+    app.config.update(config)
+    init_static_assets(app)
+    return app
+
+
+def test_precompressed_variant_keeps_the_original_filename(static_root):
+    client = make_static_app(static_root).test_client()
+
+    response = client.get("/static/data/map.geojson", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Type"] == "application/geo+json"
+    assert response.headers["Content-Disposition"] == "inline; filename=map.geojson"
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_variant_is_used_even_if_older_than_the_original(static_root):
+    # un checkout o una copia pueden dejar el .gz con fecha anterior al original
+    original = static_root / "data" / "map.geojson"
+    os.utime(static_root / "data" / "map.geojson.gz", (1, 1))
+    os.utime(original, (2_000_000_000, 2_000_000_000))
+    client = make_static_app(static_root).test_client()
+
+    response = client.get("/static/data/map.geojson", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_variant_of_other_content_is_not_sent(static_root):
+    (static_root / "data" / "map.geojson").write_bytes(b'{"type":"FeatureCollection","features":[{}]}')
+    app = make_static_app(static_root)
+
+    response = app.test_client().get("/static/data/map.geojson", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.data == b'{"type":"FeatureCollection","features":[{}]}'
+    assert app.extensions["static_assets"].stats()["stale_variants"] == 1
+
+
+def test_variants_are_ignored_without_a_manifest(static_root):
+    (static_root / MANIFEST_NAME).unlink()
+    client = make_static_app(static_root).test_client()
+
+    response = client.get("/static/data/map.geojson", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.parametrize("recheck", [False, True])
+@pytest.mark.parametrize("path", ["data/map.geojson.gz", MANIFEST_NAME])
+def test_variants_and_manifest_are_not_served_by_their_own_url(static_root, recheck, path):
+    client = make_static_app(static_root, STATIC_RECHECK=recheck).test_client()
+
+    assert client.get(f"/static/{path}").status_code == 404
+
+
+def test_requests_are_served_from_the_index_without_touching_the_disk(static_root, monkeypatch):
+    client = make_static_app(static_root).test_client()
+    stat, touched = os.stat, []
+
+    def recording_stat(path, *args, **kwargs):
+        if str(path).startswith(str(static_root)):
+            touched.append(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(static_assets.os, "stat", recording_stat)
+    response = client.get("/static/data/map.geojson", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert touched == []
+    assert response.content_length == (static_root / "data" / "map.geojson.gz").stat().st_size
+    assert gzip.decompress(response.data) == (static_root / "data" / "map.geojson").read_bytes()
+
+
+def test_recheck_serves_files_changed_after_startup(static_root):
+    app = make_static_app(static_root, STATIC_RECHECK=True)
+    (static_root / "data" / "new.json").write_bytes(b"[]")
+
+    response = app.test_client().get("/static/data/new.json")
+
+    assert response.status_code == 200
+    assert response.data == b"[]"
+    assert make_static_app(static_root).extensions["static_assets"].recheck is False
+
+
+def test_etag_revalidation_and_immutable_urls(static_root):
+    app = make_static_app(static_root)
+    client = app.test_client()
+    with app.test_request_context():
+        from flask import url_for
+        url = url_for("static", filename="data/map.geojson")
+
+    first = client.get(url)
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert "v=" in url
+    assert first.cache_control.immutable
+    assert again.status_code == 304
+    assert app.extensions["static_assets"].stats()["not_modified"] == 1
+
+
+def test_shipped_manifest_matches_the_shipped_geometries(client):
+    response = client.get(
+        "/static/data/argentina_provincias/argentina_provincias.z5.geojson", headers={"Accept-Encoding": "br, gzip"},
+    )
+
+    assert response.headers["Content-Encoding"] in ("br", "gzip")
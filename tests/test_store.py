@@ -0,0 +1,25 @@
+import sqlite3
+
+from weather_app.services.store import WeatherStore, get_weather_store
+
+
+def test_an_unopenable_store_starts_the_worker_without_it(make_app, tmp_path):
+    # un directorio no es una base sqlite valida
+    app = make_app(STORE_PATH=str(tmp_path))
+
+    response = app.test_client().get("/weather?city=Cordoba")
+
+    assert response.status_code == 200
+    with app.app_context():
+        assert get_weather_store() is None
+
+
+def test_store_read_errors_at_startup_leave_the_cache_cold(make_app, upstream, monkeypatch):
+    def locked(self, max_age):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(WeatherStore, "recent", locked)
+    app = make_app()
+
+    assert app.test_client().get("/weather?city=Cordoba").status_code == 200
+    assert upstream.state.stats()["total"] == 2
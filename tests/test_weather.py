@@ -0,0 +1,28 @@
+import pytest
+
+
+def test_weather_returns_the_report(client):
+    response = client.get("/weather?city=cordoba")
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert set(report) == {"city", "current_weather", "weekly_forecast", "stale"}
+    assert report["stale"] is False
+
+
+@pytest.mark.parametrize("query", ["", "?city=", "?city=%20%20", "?city=%09"])
+def test_weather_rejects_a_missing_or_blank_city_without_calling_upstream(client, upstream, query):
+    response = client.get(f"/weather{query}")
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "parametro 'city' es requerido."
+    assert upstream.state.stats()["total"] == 0
+
+
+def test_weather_maps_upstream_not_found(client, upstream):
+    upstream.state.errors = {404: 1.0}
+
+    response = client.get("/weather?city=Atlantida")
+
+    assert response.status_code == 404
+    assert "error" in response.get_json()
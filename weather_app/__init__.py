@@ -1,18 +1,81 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 from config import DevelopmentConfig
 
+# carpetas static/ y templates/ en la raiz del proyecto (fuera del paquete weather_app)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 def create_app(config_object=DevelopmentConfig):
-    app = Flask(__name__)
+    app = Flask(
+        __name__,
+        static_folder=os.path.join(PROJECT_ROOT, "static"),
+        template_folder=os.path.join(PROJECT_ROOT, "templates"),
+    )
     app.config.from_object(config_object)
 
-    CORS(app)
+    # Tabla de ubicaciones de las ciudades (obligatoria con CITY_LOCATIONS_REQUIRED)
+    check_city_locations(app)
+
+    # CORS solo para las rutas públicas: /status/* y /metrics no responden a otros orígenes
+    from weather_app.services.internal_access import PUBLIC_PATHS
+    CORS(app, resources={PUBLIC_PATHS: {}})
+
+    # Serialización JSON (orjson si está instalado)
+    register_json(app)
+
+    # Métricas de cada solicitud (antes que la compresión, para medir los bytes enviados)
+    register_metrics(app)
+
+    # Archivos estáticos con ETag por contenido y variantes precomprimidas
+    register_static_assets(app)
+
+    # Compresión de las respuestas JSON
+    register_compression(app)
 
     # Registro de blueprints
     register_blueprints(app)
 
+    # Tareas en segundo plano
+    start_background_tasks(app)
+
     return app
 
 def register_blueprints(app):
+    from weather_app.routes.pages import pages_bp
     from weather_app.routes.weather import weather_bp
+    from weather_app.routes.status import status_bp
+    from weather_app.routes.metrics import metrics_bp
+    app.register_blueprint(pages_bp)
     app.register_blueprint(weather_bp)
+    app.register_blueprint(status_bp)
+    app.register_blueprint(metrics_bp)
+
+def check_city_locations(app):
+    from weather_app.services.locations import check_locations_table
+    check_locations_table(app)
+
+def register_json(app):
+    from weather_app.services.json_provider import init_json
+    init_json(app)
+
+def register_metrics(app):
+    from weather_app.services.metrics import init_metrics
+    from weather_app.services.profiler import init_profiler
+    init_metrics(app)
+    init_profiler(app)
+
+def register_static_assets(app):
+    from weather_app.services.static_assets import init_static_assets
+    init_static_assets(app)
+
+def register_compression(app):
+    from weather_app.services.http_cache import init_compression
+    init_compression(app)
+
+def start_background_tasks(app):
+    from weather_app.services.prewarmer import start_prewarmer
+    from weather_app.services.store import warm_cache_from_store
+    warm_cache_from_store(app)
+    start_prewarmer(app)
@@ -0,0 +1,95 @@
+import asyncio
+import os
+
+from quart import Quart, Response, g, render_template, request
+
+from config import DevelopmentConfig
+from weather_app import PROJECT_ROOT, create_app
+
+# modo asgi: sirve las rutas de clima con quart sobre un event loop, de modo que
+# las descargas a openweathermap (aiohttp) no ocupan un hilo por solicitud.
+# requiere los paquetes de requirements-async.txt. ejecutar con:
+#     uvicorn --factory weather_app.asgi:create_asgi_app
+
+
+def create_asgi_app(config_object=DevelopmentConfig):
+    """
+    crear la aplicacion asgi.
+
+    la aplicacion flask de create_app guarda los servicios compartidos (cache,
+    almacen, circuito, precalentador) y se conserva en app.extensions["flask_app"];
+    las rutas asincronas activan su contexto en cada solicitud. los endpoints
+    /status/* siguen disponibles solo en modo wsgi.
+
+    args:
+        config_object (type): clase de configuracion (ver config.py).
+
+    returns:
+        Quart: aplicacion asgi.
+    """
+    flask_app = create_app(config_object)
+
+    app = Quart(
+        __name__,
+        static_folder=os.path.join(PROJECT_ROOT, "static"),
+        template_folder=os.path.join(PROJECT_ROOT, "templates"),
+    )
+    app.config.from_object(config_object)
+    app.extensions["flask_app"] = flask_app
+
+    from weather_app.routes.weather_async import weather_async_bp
+    app.register_blueprint(weather_async_bp)
+
+    @app.route("/")
+    async def index():
+        return await render_template("index.html")
+
+    @app.route("/metrics")
+    async def metrics():
+        # mismas metricas que /metrics en modo wsgi, sumadas entre workers
+        from weather_app.routes.metrics import PROMETHEUS_CONTENT_TYPE
+        from weather_app.services.internal_access import check_internal_access
+        from weather_app.services.metrics import prometheus_text
+
+        check_internal_access(app.config, request.headers)
+        with flask_app.app_context():
+            body = await asyncio.to_thread(prometheus_text)
+        return Response(body, content_type=PROMETHEUS_CONTENT_TYPE)
+
+    from weather_app.services.metrics import begin_request, finish_request, end_request
+
+    @app.before_request
+    async def metrics_before_request():
+        g._metrics = begin_request(request, app.config)
+
+    @app.after_request
+    async def metrics_after_request(response):
+        state = g.get("_metrics")
+        return finish_request(state, response) if state else response
+
+    @app.teardown_request
+    async def metrics_teardown_request(error=None):
+        state = g.pop("_metrics", None)
+        if state:
+            end_request(state)
+
+    @app.after_request
+    async def add_cors_headers(response):
+        # mismo comportamiento que flask-cors en el modo wsgi: solo las rutas publicas
+        from weather_app.services.internal_access import is_internal_path
+        if is_internal_path(request.path):
+            return response
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        if request.method == "OPTIONS":
+            response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+            allowed = request.headers.get("Access-Control-Request-Headers")
+            if allowed:
+                response.headers["Access-Control-Allow-Headers"] = allowed
+        return response
+
+    @app.after_serving
+    async def close_upstream_client():
+        from weather_app.services.http_client import close_async_client
+        await close_async_client()
+
+    return app
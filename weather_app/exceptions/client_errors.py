@@ -44,4 +44,11 @@ class ValidationError(BadRequestError):
     """
     def __init__(self, message="error de validacion", errors=None):
         # 'errors' puede ser un diccionario con detalles de validacion por campo
-        super().__init__(message, payload={"errors": errors} if errors else None) # llamar constructor padre
\ No newline at end of file
+        super().__init__(message, payload={"errors": errors} if errors else None) # llamar constructor padre
+
+class TooManyRequestsError(APIError):
+    """
+    manejar limites de solicitudes agotados (codigo 429).
+    """
+    def __init__(self, message="demasiadas solicitudes", payload=None):
+        super().__init__(message, status_code=429, payload=payload) # llamar constructor padre
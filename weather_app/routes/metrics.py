@@ -0,0 +1,27 @@
+from flask import Blueprint, current_app, request
+
+from weather_app.services.internal_access import check_internal_access
+from weather_app.services.metrics import prometheus_text
+
+# crear un blueprint llamado "metrics" para exponer las metricas en formato prometheus
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.before_request
+def require_internal_token():
+    # endpoint interno: apagado sin INTERNAL_ENDPOINTS_TOKEN (ver internal_access.py)
+    check_internal_access(current_app.config, request.headers)
+
+# tipo de contenido del formato de texto de prometheus
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """
+    endpoint para que prometheus lea las metricas de todos los workers.
+
+    returns:
+        text: contadores, indicadores e histogramas en formato de texto de prometheus.
+    """
+    return current_app.response_class(prometheus_text(), content_type=PROMETHEUS_CONTENT_TYPE)
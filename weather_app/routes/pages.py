@@ -0,0 +1,12 @@
+from flask import Blueprint, render_template
+
+# crear un blueprint llamado "pages" para las paginas html del frontend
+pages_bp = Blueprint("pages", __name__)
+
+
+@pages_bp.route("/")
+def index():
+    """
+    pagina principal: renderizar la plantilla 'index.html' (templates/).
+    """
+    return render_template("index.html")
@@ -0,0 +1,201 @@
+from flask import Blueprint, jsonify, current_app, request
+
+from weather_app.services.cache import get_weather_cache
+from weather_app.services.circuit_breaker import get_circuit_breaker
+from weather_app.exceptions.client_errors import BadRequestError
+from weather_app.services.geo import peek_province_locator
+from weather_app.services.internal_access import check_internal_access
+from weather_app.services.locations import get_city_locations
+from weather_app.services.profiler import get_profiler
+from weather_app.services.quota import get_quota_governor
+from weather_app.services.report_cache import get_report_cache
+from weather_app.services.singleflight import get_singleflight
+from weather_app.services.static_assets import get_static_assets
+from weather_app.services.store import get_weather_store
+
+# crear un blueprint llamado "status" para exponer el estado interno del servicio
+status_bp = Blueprint("status", __name__, url_prefix="/status")
+
+
+@status_bp.before_request
+def require_internal_token():
+    # endpoints internos: apagados sin INTERNAL_ENDPOINTS_TOKEN (ver internal_access.py)
+    check_internal_access(current_app.config, request.headers)
+
+
+@status_bp.route("/cache")
+def cache_status():
+    """
+    endpoint para consultar el uso del cache de respuestas de openweathermap.
+
+    returns:
+        json: backend, cantidad de entradas, aciertos, fallos y ttl configurados.
+    """
+    return jsonify(get_weather_cache().stats())
+
+
+@status_bp.route("/reports")
+def reports_status():
+    """
+    endpoint para consultar el cache de reportes ya serializados.
+
+    returns:
+        json: entradas, bytes en memoria (json y variantes comprimidas), aciertos e invalidaciones.
+    """
+    return jsonify(get_report_cache().stats())
+
+
+@status_bp.route("/singleflight")
+def singleflight_status():
+    """
+    endpoint para consultar cuantas solicitudes a openweathermap se agruparon.
+
+    returns:
+        json: descargas ejecutadas, solicitudes agrupadas y descargas en curso.
+    """
+    return jsonify(get_singleflight().stats())
+
+
+@status_bp.route("/breaker")
+def breaker_status():
+    """
+    endpoint para consultar el estado del circuito hacia openweathermap.
+
+    returns:
+        json: estado del circuito, errores consecutivos y solicitudes rechazadas.
+    """
+    return jsonify(get_circuit_breaker().stats())
+
+
+@status_bp.route("/quota")
+def quota_status():
+    """
+    endpoint para consultar la cuota de llamadas a openweathermap.
+
+    returns:
+        json: { "enabled": false } si esta deshabilitado, o las fichas restantes por
+              minuto y por dia (compartidas entre workers) y las llamadas autorizadas,
+              rechazadas y esperadas por prioridad en este worker.
+    """
+    governor = get_quota_governor()
+    if governor is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **governor.stats()})
+
+
+@status_bp.route("/store")
+def store_status():
+    """
+    endpoint para consultar el almacen persistente de respuestas.
+
+    returns:
+        json: { "enabled": false } si esta deshabilitado, o su tamaño y contadores.
+    """
+    store = get_weather_store()
+    if store is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **store.stats()})
+
+
+@status_bp.route("/locations")
+def locations_status():
+    """
+    endpoint para consultar cuantas ciudades estan resueltas a id o coordenadas.
+
+    returns:
+        json: ciudades resueltas, con id y aprendidas en tiempo de ejecucion.
+    """
+    return jsonify(get_city_locations().stats())
+
+
+@status_bp.route("/geo")
+def geo_status():
+    """
+    endpoint para consultar el indice de provincias de /reverse_geocode.
+
+    returns:
+        json: provincias y poligonos indexados, consultas y su duracion promedio,
+              o {"loaded": false} si este worker todavia no atendio /reverse_geocode.
+    """
+    locator = peek_province_locator()
+    if locator is None:
+        return jsonify({"loaded": False})
+    return jsonify({"loaded": True, **locator.stats()})
+
+
+@status_bp.route("/prewarm")
+def prewarm_status():
+    """
+    endpoint para consultar el estado del precalentador del cache.
+
+    returns:
+        json: { "enabled": false } si esta deshabilitado, o el resultado del ultimo ciclo.
+    """
+    prewarmer = current_app.extensions.get("prewarmer")
+    if prewarmer is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **prewarmer.read_status()})
+
+
+@status_bp.route("/static")
+def static_status():
+    """
+    endpoint para consultar el servidor de archivos estaticos.
+
+    returns:
+        json: { "enabled": false } si no se inicializo, o los archivos indexados y los contadores de respuestas.
+    """
+    assets = get_static_assets()
+    if assets is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **assets.stats()})
+
+
+@status_bp.route("/profile", methods=["GET", "POST", "DELETE"])
+def profile_status():
+    """
+    endpoint para encender (POST), apagar (DELETE) o consultar (GET) el perfilador
+    por muestreo en todos los workers.
+
+    query params (POST):
+        seconds (float): segundos de medicion (por defecto 30, maximo PROFILER_MAX_SECONDS).
+        interval (float): segundos entre muestras (por defecto 0.01, minimo 0.001).
+
+    returns:
+        json: { "enabled": false } si esta deshabilitado, o el estado del perfilador en este worker.
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        return jsonify({"enabled": False})
+    if request.method == "POST":
+        try:
+            seconds = float(request.args.get("seconds", 30))
+            interval = float(request.args.get("interval", 0.01))
+        except ValueError:
+            raise BadRequestError("parametros 'seconds' e 'interval' deben ser numeros.")
+        try:
+            profiler.start(seconds, interval)
+        except ValueError as e:
+            # nan, infinito, no positivo o intervalo menor que MIN_INTERVAL
+            raise BadRequestError(str(e))
+    elif request.method == "DELETE":
+        profiler.stop()
+    else:
+        profiler.sync()
+    return jsonify({"enabled": True, **profiler.stats()})
+
+
+@status_bp.route("/profile/stacks")
+def profile_stacks():
+    """
+    endpoint para descargar las pilas medidas por el perfilador, sumadas entre workers.
+
+    returns:
+        text: una linea 'hilo;archivo:funcion;... muestras' por pila (formato colapsado
+              de flamegraph.pl y speedscope), de la mas frecuente a la menos frecuente.
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        return jsonify({"enabled": False})
+    lines = [f"{stack} {count}" for stack, count in profiler.stacks().most_common()]
+    return current_app.response_class("\n".join(lines) + "\n", mimetype="text/plain")
@@ -1,83 +1,193 @@
-import requests
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 import json  # Importar el módulo json
-import os    # Importar el módulo os
+import logging
 from ..exceptions.base import APIError # importar clase base de error
 
 # importar servicios y utilidades
-from weather_app.services.openweather import get_weather_and_forecast
-from weather_app.utils.forecast import group_forecast_by_day
+from weather_app.services.cache import get_weather_cache
+from weather_app.services.cities import get_cities_data, get_cities_version, get_city_index
+from weather_app.services.http_cache import conditional_json
+from weather_app.services.metrics import timed
+from weather_app.services.report_cache import get_report_cache
+from weather_app.services.report import (
+    build_weather_report, error_payload, format_weather_report, load_weather_bundle, report_max_age,
+    report_version,
+)
+from weather_app.services.fanout import iter_city_reports, city_result
+from weather_app.services.geo import get_province_locator
+from weather_app.services.prewarmer import note_city_request
 
 # importar clases de excepcion personalizadas
-from weather_app.exceptions.client_errors import BadRequestError, NotFoundError
-from weather_app.exceptions.server_errors import InternalServerError # importar error de servidor
+from weather_app.exceptions.client_errors import BadRequestError, NotFoundError, ValidationError
 
 # crear un blueprint llamado "weather" para agrupar las rutas relacionadas
 weather_bp = Blueprint("weather", __name__)
 
-def load_cities_data():
-    """
-    cargar los datos de las ciudades por provincia desde un archivo json estatico.
-    """
-    # construir la ruta al archivo json de ciudades
-    # asume que el archivo esta en 'static/data/cities_by_province.json'
-    base_dir = os.path.abspath(os.path.dirname(__file__))
-    json_path = os.path.join(base_dir, '..', '..', 'static', 'data', 'cities_by_province.json')
-    
-    try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # registrar error si el archivo no se encuentra
-        print(f"error: no se encontro el archivo de ciudades en {json_path}")
-        # lanzar un error interno del servidor si los datos criticos no estan
-        raise InternalServerError("datos de ciudades no disponibles en el servidor.")
-    except json.JSONDecodeError:
-        # registrar error si el json no es valido
-        print(f"error: el archivo de ciudades {json_path} no es un json valido.")
-        # lanzar un error interno del servidor si los datos estan corruptos
-        raise InternalServerError("datos de ciudades corruptos en el servidor.")
-
-# cargar los datos de las ciudades una vez al iniciar la aplicacion.
-# si hay un error al cargar, la excepcion se propagara y sera manejada por flask.
-CITIES_DATA = load_cities_data()
+logger = logging.getLogger(__name__)
+
+# los datos de ciudades (cities_by_province.json), su indice y su version se
+# cargan en el primer uso con services/cities.py, no al importar este modulo
+
+
+def canonical_city_name(city):
+    """
+    devolver el nombre canonico de una ciudad listada, o el nombre recibido sin espacios extra.
+
+    usar siempre el mismo nombre para una ciudad hace que sus variantes de escritura
+    compartan cache, almacen y solicitudes agrupadas hacia openweathermap.
+    """
+    return get_city_index().canonical_city(city) or " ".join(city.split())
 
 
 @weather_bp.route("/weather")
 def get_weather():
     """
     endpoint para obtener el clima actual y el pronostico semanal de una ciudad.
+
+    query params:
+        city (str): nombre de la ciudad.
+        province (str, optional): provincia de la ciudad, para nombres listados en varias.
     """
-    city = request.args.get("city")
+    city = (request.args.get("city") or "").strip()
     if not city:
-        # lanzar badrequesterror si el parametro 'city' falta
+        # lanzar badrequesterror si el parametro 'city' falta o esta en blanco
+        # (antes de gastar cuota de openweathermap en una consulta vacia)
         raise BadRequestError("parametro 'city' es requerido.")
 
-    try:
-        # obtener datos de clima y pronostico del servicio openweather
-        weather_data, forecast_data = get_weather_and_forecast(city)
-        # agrupar y transformar los datos del pronostico
-        forecast_list = group_forecast_by_day(forecast_data)
-
-        # devolver respuesta json exitosa
-        return jsonify({
-            "city": weather_data["name"],
-            "current_weather": {
-                "temp": weather_data["main"]["temp"],
-                "description": weather_data["weather"][0]["description"],
-                "icon": weather_data["weather"][0]["icon"],
-            },
-            "weekly_forecast": forecast_list,
-        })
-
-    except APIError as e:
-        # capturar cualquier apierror lanzado por get_weather_and_forecast
-        # flask lo manejara globalmente con el manejador registrado en __init__.py
-        raise e
-    except Exception as e:
-        # capturar cualquier otra excepcion inesperada y lanzarla como internalservererror
-        # para que el manejador global la capture
-        raise InternalServerError(f"error interno inesperado: {str(e)}")
+    city = canonical_city_name(city)
+
+    # cada etapa se mide en weather_stage_seconds (ver /metrics) y en Server-Timing
+    with timed("load"):
+        bundle = load_weather_bundle(city, province=request.args.get("province"))
+
+    # registrar la ciudad para que el precalentador la mantenga en cache; solo
+    # despues de obtener sus datos, para no refrescar nombres mal escritos
+    note_city_request(city, request.args.get("province"))
+    version = report_version(bundle)
+
+    def build():
+        # reutilizar el reporte ya serializado mientras no cambien los datos de origen
+        report_cache = get_report_cache()
+        with timed("report"):
+            entry = report_cache.report(bundle, version, format_weather_report)
+        with timed("serialize"):
+            return report_cache.response(entry)
+
+    # devolver respuesta json exitosa, o 304 si el cliente ya tiene esta version de los datos
+    return conditional_json(
+        build,
+        etag=version,
+        last_modified=max(bundle.fetched_at.values()),
+        max_age=report_max_age(bundle, get_weather_cache()),
+    )
+
+
+def parse_batch_cities(body):
+    """
+    validar el cuerpo json de /weather/batch y devolver la lista de ciudades.
+
+    args:
+        body: cuerpo json ya decodificado (None si no es json valido).
+
+    returns:
+        list: nombres de las ciudades, sin validar si existen.
+
+    raises:
+        badrequesterror: si el cuerpo no es un objeto o 'cities' no es una lista no vacia.
+        validationerror: si hay demasiadas ciudades o alguna no es un texto no vacio.
+    """
+    # un json valido puede ser una lista o un escalar: solo se acepta un objeto
+    if not isinstance(body, dict):
+        raise BadRequestError("el cuerpo debe ser un objeto json con el campo 'cities'.")
+    cities = body.get("cities")
+
+    if not isinstance(cities, list) or not cities:
+        raise BadRequestError("campo 'cities' es requerido y debe ser una lista no vacia.")
+
+    max_cities = current_app.config.get("BATCH_MAX_CITIES", 50)
+    if len(cities) > max_cities:
+        raise ValidationError(
+            f"se permiten como maximo {max_cities} ciudades por solicitud.",
+            errors={"cities": f"recibidas {len(cities)}"},
+        )
+
+    invalid = [i for i, city in enumerate(cities) if not isinstance(city, str) or not city.strip()]
+    if invalid:
+        raise ValidationError("cada ciudad debe ser un texto no vacio.", errors={"invalid_indexes": invalid})
+    return cities
+
+
+@weather_bp.route("/weather/batch", methods=["POST"])
+def get_weather_batch():
+    """
+    endpoint para obtener el clima de varias ciudades en una sola solicitud.
+
+    body json:
+        cities (list): nombres de las ciudades a consultar.
+
+    returns:
+        json: { "results": [...] } con un resultado por ciudad, en el mismo orden
+              que la solicitud. cada resultado tiene 'status' y 'data' o 'error'.
+    """
+    cities = parse_batch_cities(request.get_json(silent=True))
+    cities = [canonical_city_name(city) for city in cities]
+    results = [None] * len(cities)
+    reports = iter_city_reports(
+        current_app._get_current_object(),
+        cities,
+        max_workers=current_app.config.get("BATCH_MAX_CONCURRENCY", 8),
+    )
+    for i, status_code, report in reports:
+        results[i] = city_result(cities[i], status_code, report)
+
+    return jsonify({"results": results})
+
+
+@weather_bp.route("/weather/province")
+def stream_province_weather():
+    """
+    endpoint para obtener el clima de todas las ciudades de una provincia.
+
+    la respuesta es ndjson: una linea json por ciudad, enviada apenas se resuelve,
+    para que el cliente pueda mostrar la primera ciudad sin esperar a la mas lenta.
+    la ciudad por defecto de la provincia se consulta primero.
+
+    query params:
+        province (str): nombre de la provincia.
+
+    returns:
+        ndjson: lineas { "city", "status", "data" | "error" }.
+    """
+    province_name = request.args.get("province")
+    if not province_name:
+        # lanzar badrequesterror si el parametro 'province' falta
+        raise BadRequestError("parametro 'province' es requerido.")
+
+    province = get_city_index().canonical_province(province_name)
+    cities = get_cities_data().get(province) if province else None
+    if not cities:
+        # lanzar notfounderror si no se encuentran ciudades para la provincia
+        raise NotFoundError(f"no se encontraron ciudades para la provincia: '{province_name}'.")
+
+    # consultar primero la ciudad por defecto
+    names = [c["name"] for c in sorted(cities, key=lambda c: not c.get("default", False))]
+    reports = iter_city_reports(
+        current_app._get_current_object(),
+        names,
+        max_workers=current_app.config.get("PROVINCE_STREAM_CONCURRENCY", 8),
+        timeout=current_app.config.get("PROVINCE_CITY_TIMEOUT", 8),
+        province=province,
+    )
+
+    def generate():
+        for i, status_code, report in reports:
+            yield json.dumps(city_result(names[i], status_code, report), ensure_ascii=False) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}, # evitar que un proxy nginx acumule la respuesta
+    )
 
 
 @weather_bp.route("/cities_by_province")
@@ -90,11 +200,17 @@ def get_cities_by_province():
         # lanzar badrequesterror si el parametro 'province' falta
         raise BadRequestError("parametro 'province' es requerido.")
 
-    cities = CITIES_DATA.get(province_name)
+    # buscar la provincia sin distinguir tildes ni mayusculas
+    province = get_city_index().canonical_province(province_name)
+    cities = get_cities_data().get(province) if province else None
 
     if cities:
-        # devolver respuesta json con las ciudades
-        return jsonify(cities)
+        # devolver respuesta json con las ciudades, o 304 si el cliente ya las tiene
+        return conditional_json(
+            lambda: cities,
+            etag=get_cities_version(),
+            max_age=current_app.config.get("CITIES_MAX_AGE", 3600),
+        )
     else:
         # lanzar notfounderror si no se encuentran ciudades para la provincia
         raise NotFoundError(f"no se encontraron ciudades para la provincia: '{province_name}'.")
@@ -112,9 +228,119 @@ def is_province():
         json: { "is_province": true/false }
     """
     name = request.args.get("name")
-    if not name:
-        # si el nombre falta, no es una provincia valida
-        return jsonify({"is_province": False})
-    
-    # verificar si el nombre (de provincia) existe en los datos cargados
-    return jsonify({"is_province": name in CITIES_DATA})
+
+    # verificar si el nombre (de provincia) existe en los datos cargados, sin distinguir tildes ni mayusculas.
+    # si el nombre falta, no es una provincia valida
+    return conditional_json(
+        lambda: {"is_province": bool(name) and get_city_index().canonical_province(name) is not None},
+        etag=get_cities_version(),
+        max_age=current_app.config.get("CITIES_MAX_AGE", 3600),
+    )
+
+
+@weather_bp.route("/suggest")
+def suggest():
+    """
+    endpoint de autocompletado de provincias y ciudades.
+
+    query params:
+        q (str): texto parcial ingresado por el usuario.
+        limit (int, optional): cantidad maxima de sugerencias (por defecto 10, maximo 50).
+
+    returns:
+        json: { "query": q, "suggestions": [{ "name", "type", "province" }, ...] }
+    """
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(1, min(limit, 50))
+    return jsonify({"query": query, "suggestions": get_city_index().suggest(query, limit=limit)})
+
+
+def parse_coordinates(args):
+    """
+    leer y validar los parametros 'lat' y 'lon' de una solicitud.
+
+    returns:
+        tuple: (lat, lon) como float.
+
+    raises:
+        badrequesterror: si falta alguno de los parametros.
+        validationerror: si no son numeros o estan fuera de rango.
+    """
+    if args.get("lat") is None or args.get("lon") is None:
+        raise BadRequestError("parametros 'lat' y 'lon' son requeridos.")
+
+    errors = {}
+    coordinates = []
+    for name, limit in (("lat", 90), ("lon", 180)):
+        try:
+            value = float(args[name])
+        except ValueError:
+            value = None
+        # float() acepta 'nan' e 'inf', que no son coordenadas
+        if value is None or not -limit <= value <= limit:
+            errors[name] = f"debe ser un numero entre {-limit} y {limit}"
+        coordinates.append(value)
+
+    if errors:
+        raise ValidationError("coordenadas invalidas.", errors=errors)
+    return tuple(coordinates)
+
+
+def locate_coordinates(lat, lon):
+    """
+    ubicar una coordenada en su provincia y su ciudad listada mas cercana.
+
+    returns:
+        dict: {"lat", "lon", "province", "city"} con la forma de /reverse_geocode.
+
+    raises:
+        notfounderror: si la coordenada no cae en ninguna provincia.
+    """
+    with timed("locate"):
+        located = get_province_locator().locate(lat, lon)
+    if located is None:
+        raise NotFoundError(f"no se encontro una provincia para las coordenadas ({lat}, {lon}).")
+    return {"lat": lat, "lon": lon, **located}
+
+
+@weather_bp.route("/reverse_geocode")
+def reverse_geocode():
+    """
+    endpoint para ubicar un clic en el mapa: provincia y ciudad listada mas cercana.
+
+    query params:
+        lat (float): latitud del punto.
+        lon (float): longitud del punto.
+        weather (str, optional): '1' para incluir el clima de la ciudad encontrada.
+
+    returns:
+        json: { "lat", "lon", "province", "city": { "name", "lat", "lon", "distance_km" } },
+              mas "weather" (o "weather_error" si no se pudo obtener) cuando se pide.
+              si ninguna ciudad de la provincia tiene coordenadas en la tabla generada
+              (city_locations.json), "city" es su ciudad por defecto con "distance_km" null.
+    """
+    lat, lon = parse_coordinates(request.args)
+    result = locate_coordinates(lat, lon)
+
+    city = result["city"]
+    if request.args.get("weather") == "1" and city is not None:
+        note_city_request(city["name"], result["province"])
+        try:
+            result["weather"] = build_weather_report(city["name"], province=result["province"])
+        except APIError as e:
+            # la ubicacion ya se resolvio: informar el error del clima sin perderla
+            result["weather_error"] = {"status": e.status_code, **error_payload(e)}
+
+    return jsonify(result)
+
+
+@weather_bp.app_errorhandler(APIError)
+def handle_api_error(error):
+    """
+    manejador global de apierror: devolver el error como json con su codigo de estado.
+    """
+    response = jsonify(error_payload(error))
+    if error.payload and "retry_after" in error.payload:
+        response.headers["Retry-After"] = str(error.payload["retry_after"])
+    return response, error.status_code
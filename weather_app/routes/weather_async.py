@@ -0,0 +1,320 @@
+import asyncio
+import json # importar modulo json
+from functools import wraps
+
+from flask import jsonify as flask_jsonify
+from quart import Blueprint, Response, current_app, jsonify, request
+
+from ..exceptions.base import APIError # importar clase base de error
+
+# importar servicios y utilidades compartidos con el modo wsgi
+from weather_app.routes.weather import (
+    canonical_city_name, locate_coordinates, parse_batch_cities, parse_coordinates,
+)
+from weather_app.services.cache import get_weather_cache
+from weather_app.services.cities import get_cities_data, get_cities_version, get_city_index
+from weather_app.services.fanout import iter_city_reports_async, city_result
+from weather_app.services.http_cache import compress, is_not_modified, negotiate_encoding
+from weather_app.services.metrics import timed
+from weather_app.services.prewarmer import note_city_request
+from weather_app.services.report import (
+    build_weather_report_async, error_payload, format_weather_report, load_weather_bundle_async,
+    report_max_age, report_version,
+)
+from weather_app.services.report_cache import get_report_cache
+
+# importar clases de excepcion personalizadas
+from weather_app.exceptions.client_errors import BadRequestError, NotFoundError
+
+# version asincrona (quart) de las rutas de weather.py, con las mismas urls,
+# parametros, formas json y errores. los servicios (cache, almacen, circuito,
+# ubicaciones) son los de la aplicacion flask guardada en app.extensions["flask_app"],
+# cuyo contexto se activa en cada solicitud.
+weather_async_bp = Blueprint("weather", __name__)
+
+
+def _flask_app():
+    """
+    obtener la aplicacion flask que guarda los servicios compartidos.
+    """
+    return current_app.extensions["flask_app"]
+
+
+def with_services(view):
+    """
+    decorador: ejecutar la vista dentro del contexto de la aplicacion flask,
+    para que los servicios encuentren su configuracion y sus instancias.
+    """
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        with _flask_app().app_context():
+            return await view(*args, **kwargs)
+    return wrapper
+
+
+def _json_body(data):
+    """
+    serializar un objeto igual que jsonify en modo wsgi y comprimirlo si el cliente lo acepta.
+
+    returns:
+        tuple: (bytes, codificacion usada o None).
+    """
+    body = flask_jsonify(data).get_data()
+    if len(body) < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+        return body, None
+    encoding = negotiate_encoding(request)
+    if encoding is None:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+def _json_response(body, encoding, status=200):
+    """
+    armar una respuesta json con bytes ya serializados.
+    """
+    response = Response(body, status=status, mimetype="application/json")
+    if encoding is not None:
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _conditional_json(build_body, etag, last_modified=None, max_age=0):
+    """
+    version para quart de http_cache.conditional_json.
+
+    args:
+        build_body (callable): funcion sin argumentos que devuelve (bytes, codificacion).
+    """
+    if is_not_modified(etag, last_modified, request):
+        response = Response("", status=304)
+        response.headers.pop("Content-Type", None)
+        response.vary.add("Accept-Encoding")
+    else:
+        response = _json_response(*build_body())
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+@weather_async_bp.route("/weather")
+@with_services
+async def get_weather():
+    """
+    endpoint para obtener el clima actual y el pronostico semanal de una ciudad.
+
+    query params:
+        city (str): nombre de la ciudad.
+        province (str, optional): provincia de la ciudad, para nombres listados en varias.
+    """
+    city = (request.args.get("city") or "").strip()
+    if not city:
+        # lanzar badrequesterror si el parametro 'city' falta o esta en blanco
+        # (antes de gastar cuota de openweathermap en una consulta vacia)
+        raise BadRequestError("parametro 'city' es requerido.")
+
+    city = canonical_city_name(city)
+
+    # cada etapa se mide en weather_stage_seconds (ver /metrics) y en Server-Timing
+    with timed("load"):
+        bundle = await load_weather_bundle_async(city, province=request.args.get("province"))
+
+    # registrar la ciudad para que el precalentador la mantenga en cache (escribe en sqlite);
+    # solo despues de obtener sus datos, para no refrescar nombres mal escritos
+    await asyncio.to_thread(note_city_request, city, request.args.get("province"))
+    version = report_version(bundle)
+
+    def build_body():
+        # reutilizar el reporte ya serializado mientras no cambien los datos de origen
+        report_cache = get_report_cache()
+        with timed("report"):
+            entry = report_cache.report(bundle, version, format_weather_report)
+        with timed("serialize"):
+            return report_cache.body(entry, negotiate_encoding(request))
+
+    # devolver respuesta json exitosa, o 304 si el cliente ya tiene esta version de los datos
+    return _conditional_json(
+        build_body,
+        etag=version,
+        last_modified=max(bundle.fetched_at.values()),
+        max_age=report_max_age(bundle, get_weather_cache()),
+    )
+
+
+@weather_async_bp.route("/weather/batch", methods=["POST"])
+@with_services
+async def get_weather_batch():
+    """
+    endpoint para obtener el clima de varias ciudades en una sola solicitud.
+
+    body json:
+        cities (list): nombres de las ciudades a consultar.
+
+    returns:
+        json: { "results": [...] } con un resultado por ciudad, en el mismo orden
+              que la solicitud. cada resultado tiene 'status' y 'data' o 'error'.
+    """
+    cities = parse_batch_cities(await request.get_json(silent=True))
+    cities = [canonical_city_name(city) for city in cities]
+    results = [None] * len(cities)
+    reports = iter_city_reports_async(
+        _flask_app(),
+        cities,
+        max_workers=current_app.config.get("BATCH_MAX_CONCURRENCY", 8),
+    )
+    async for i, status_code, report in reports:
+        results[i] = city_result(cities[i], status_code, report)
+
+    return _json_response(*_json_body({"results": results}))
+
+
+@weather_async_bp.route("/weather/province")
+@with_services
+async def stream_province_weather():
+    """
+    endpoint para obtener el clima de todas las ciudades de una provincia.
+
+    la respuesta es ndjson: una linea json por ciudad, enviada apenas se resuelve.
+    la ciudad por defecto de la provincia se consulta primero.
+
+    query params:
+        province (str): nombre de la provincia.
+
+    returns:
+        ndjson: lineas { "city", "status", "data" | "error" }.
+    """
+    province_name = request.args.get("province")
+    if not province_name:
+        # lanzar badrequesterror si el parametro 'province' falta
+        raise BadRequestError("parametro 'province' es requerido.")
+
+    province = get_city_index().canonical_province(province_name)
+    cities = get_cities_data().get(province) if province else None
+    if not cities:
+        # lanzar notfounderror si no se encuentran ciudades para la provincia
+        raise NotFoundError(f"no se encontraron ciudades para la provincia: '{province_name}'.")
+
+    # consultar primero la ciudad por defecto
+    names = [c["name"] for c in sorted(cities, key=lambda c: not c.get("default", False))]
+    reports = iter_city_reports_async(
+        _flask_app(),
+        names,
+        max_workers=current_app.config.get("PROVINCE_STREAM_CONCURRENCY", 8),
+        timeout=current_app.config.get("PROVINCE_CITY_TIMEOUT", 8),
+        province=province,
+    )
+
+    async def generate():
+        async for i, status_code, report in reports:
+            yield (json.dumps(city_result(names[i], status_code, report), ensure_ascii=False) + "\n").encode("utf-8")
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}, # evitar que un proxy nginx acumule la respuesta
+    )
+
+
+@weather_async_bp.route("/cities_by_province")
+@with_services
+async def get_cities_by_province():
+    """
+    endpoint para obtener una lista de ciudades de una provincia especifica.
+    """
+    province_name = request.args.get("province")
+    if not province_name:
+        # lanzar badrequesterror si el parametro 'province' falta
+        raise BadRequestError("parametro 'province' es requerido.")
+
+    # buscar la provincia sin distinguir tildes ni mayusculas
+    province = get_city_index().canonical_province(province_name)
+    cities = get_cities_data().get(province) if province else None
+
+    if cities:
+        # devolver respuesta json con las ciudades, o 304 si el cliente ya las tiene
+        return _conditional_json(
+            lambda: _json_body(cities),
+            etag=get_cities_version(),
+            max_age=current_app.config.get("CITIES_MAX_AGE", 3600),
+        )
+    else:
+        # lanzar notfounderror si no se encuentran ciudades para la provincia
+        raise NotFoundError(f"no se encontraron ciudades para la provincia: '{province_name}'.")
+
+
+@weather_async_bp.route("/is_province")
+@with_services
+async def is_province():
+    """
+    endpoint auxiliar para determinar si un nombre corresponde a una provincia valida.
+
+    query params:
+        name (str): nombre a verificar.
+
+    returns:
+        json: { "is_province": true/false }
+    """
+    name = request.args.get("name")
+
+    # si el nombre falta, no es una provincia valida
+    return _conditional_json(
+        lambda: _json_body({"is_province": bool(name) and get_city_index().canonical_province(name) is not None}),
+        etag=get_cities_version(),
+        max_age=current_app.config.get("CITIES_MAX_AGE", 3600),
+    )
+
+
+@weather_async_bp.route("/suggest")
+@with_services
+async def suggest():
+    """
+    endpoint de autocompletado de provincias y ciudades.
+
+    query params:
+        q (str): texto parcial ingresado por el usuario.
+        limit (int, optional): cantidad maxima de sugerencias (por defecto 10, maximo 50).
+
+    returns:
+        json: { "query": q, "suggestions": [{ "name", "type", "province" }, ...] }
+    """
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(1, min(limit, 50))
+    return _json_response(*_json_body({"query": query, "suggestions": get_city_index().suggest(query, limit=limit)}))
+
+
+@weather_async_bp.route("/reverse_geocode")
+@with_services
+async def reverse_geocode():
+    """
+    endpoint para ubicar un clic en el mapa: provincia y ciudad listada mas cercana.
+    """
+    lat, lon = parse_coordinates(request.args)
+    # la busqueda en el indice es en memoria y tarda menos de un milisegundo
+    result = locate_coordinates(lat, lon)
+
+    city = result["city"]
+    if request.args.get("weather") == "1" and city is not None:
+        await asyncio.to_thread(note_city_request, city["name"], result["province"])
+        try:
+            result["weather"] = await build_weather_report_async(city["name"], province=result["province"])
+        except APIError as e:
+            # la ubicacion ya se resolvio: informar el error del clima sin perderla
+            result["weather_error"] = {"status": e.status_code, **error_payload(e)}
+
+    return _json_response(*_json_body(result))
+
+
+@weather_async_bp.app_errorhandler(APIError)
+async def handle_api_error(error):
+    """
+    manejador global de apierror: devolver el error como json con su codigo de estado.
+    """
+    response = jsonify(error_payload(error))
+    if error.payload and "retry_after" in error.payload:
+        response.headers["Retry-After"] = str(error.payload["retry_after"])
+    return response, error.status_code
@@ -0,0 +1,340 @@
+# weather_app/services/cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from weather_app.services.json_provider import loads
+from weather_app.utils.city_index import fold
+
+# tipos de respuesta que se guardan en cache, cada uno con su propio ttl
+WEATHER = "weather"
+FORECAST = "forecast"
+
+
+def normalize_city(city):
+    """
+    normalizar el nombre de una ciudad para usarlo como parte de la clave de cache.
+
+    args:
+        city (str): nombre de la ciudad tal como llega en la solicitud.
+
+    returns:
+        str: nombre sin tildes, sin espacios extra y en minusculas, para que
+             "Córdoba", "cordoba " y "CÓRDOBA" compartan la misma entrada.
+    """
+    return fold(city)
+
+
+def make_city_key(city, units, lang):
+    """
+    construir la clave de una ciudad para una combinacion de unidades e idioma.
+
+    args:
+        city (str): nombre de la ciudad.
+        units (str): sistema de unidades pedido a la api.
+        lang (str): idioma pedido a la api.
+
+    returns:
+        str: clave normalizada, comun al cache y al almacen persistente.
+    """
+    return f"{units}:{lang}:{normalize_city(city)}"
+
+
+def make_cache_key(kind, city, units, lang):
+    """
+    construir la clave de cache para una respuesta de openweathermap.
+
+    args:
+        kind (str): tipo de respuesta ('weather' o 'forecast').
+        city (str): nombre de la ciudad.
+        units (str): sistema de unidades pedido a la api.
+        lang (str): idioma pedido a la api.
+
+    returns:
+        str: clave unica para la combinacion de parametros.
+    """
+    return f"{kind}:{make_city_key(city, units, lang)}"
+
+
+class MemoryCacheBackend:
+    """
+    backend de cache en memoria del proceso, con expiracion por ttl y desalojo lru.
+
+    cada worker de gunicorn tiene su propia copia; usar RedisCacheBackend
+    para compartir entradas entre workers.
+    """
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries # cantidad maxima de entradas antes de desalojar
+        self._entries = OrderedDict() # clave -> (valor, instante de expiracion)
+        self._lock = threading.Lock() # proteger acceso concurrente entre hilos
+        self.evictions = 0 # cantidad de entradas desalojadas por tamaño
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                # la entrada expiro, eliminarla
+                del self._entries[key]
+                return None
+            # marcar la entrada como usada recientemente
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            # desalojar las entradas menos usadas si se supera el limite
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    backend de cache compartido en redis, visible para todos los workers de gunicorn.
+
+    la expiracion la maneja redis con EX; el orden lru se mantiene en un
+    sorted set con el instante del ultimo acceso de cada clave.
+    """
+    def __init__(self, url, max_entries=512, prefix="app-clima:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("el backend de cache 'redis' requiere el paquete 'redis' instalado.")
+
+        self.max_entries = max_entries # cantidad maxima de entradas antes de desalojar
+        self.prefix = prefix # prefijo de todas las claves de la app
+        self._lru_key = f"{prefix}lru" # sorted set con el ultimo acceso por clave
+        self._client = redis.Redis.from_url(url)
+        self.evictions = 0 # cantidad de entradas desalojadas por este proceso
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        self._client.zadd(self._lru_key, {key: time.time()})
+        return loads(raw)
+
+    def set(self, key, value, ttl):
+        pipe = self._client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+        pipe.zadd(self._lru_key, {key: time.time()})
+        pipe.zcard(self._lru_key)
+        size = pipe.execute()[-1]
+
+        # desalojar las claves con el acceso mas antiguo si se supera el limite
+        excess = size - self.max_entries
+        if excess > 0:
+            oldest = self._client.zpopmin(self._lru_key, excess)
+            if oldest:
+                self._client.delete(*[self.prefix + k.decode() for k, _ in oldest])
+                self.evictions += len(oldest)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+        self._client.zrem(self._lru_key, key)
+
+    def clear(self):
+        keys = [self.prefix + k.decode() for k in self._client.zrange(self._lru_key, 0, -1)]
+        if keys:
+            self._client.delete(*keys)
+        self._client.delete(self._lru_key)
+
+    def __len__(self):
+        return self._client.zcard(self._lru_key)
+
+
+class WeatherCache:
+    """
+    cache de respuestas de openweathermap con ttl distinto para clima actual y pronostico.
+
+    las entradas se conservan stale_ttl segundos mas alla de su ttl para poder
+    servirlas como datos desactualizados si openweathermap no responde.
+
+    atributos:
+        backend: backend de almacenamiento (memoria o redis).
+        ttls (dict): segundos de vida de cada tipo de respuesta.
+        stale_ttl (int): segundos extra que se conserva una entrada vencida.
+        hits (int): cantidad de lecturas encontradas en cache.
+        misses (int): cantidad de lecturas no encontradas en cache.
+        stale_served (int): cantidad de respuestas servidas con datos vencidos.
+    """
+    def __init__(self, backend, weather_ttl=600, forecast_ttl=3600, stale_ttl=0):
+        self.backend = backend
+        self.ttls = {WEATHER: weather_ttl, FORECAST: forecast_ttl}
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self._lock = threading.Lock() # proteger los contadores entre hilos
+
+    def _get_entry(self, kind, city, units, lang):
+        return self.backend.get(make_cache_key(kind, city, units, lang))
+
+    def get(self, kind, city, units, lang):
+        """
+        obtener una respuesta guardada, o None si no existe o expiro.
+        """
+        entry = self.get_entry(kind, city, units, lang)
+        return entry["data"] if entry is not None else None
+
+    def get_entry(self, kind, city, units, lang):
+        """
+        obtener una entrada vigente con su instante de descarga.
+
+        returns:
+            dict: {"data", "stored_at"}, o None si no existe o expiro.
+        """
+        entry = self._get_entry(kind, city, units, lang)
+        fresh = entry is not None and time.time() - entry["stored_at"] < self.ttls[kind]
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry if fresh else None
+
+    def get_stale(self, kind, city, units, lang):
+        """
+        obtener una respuesta guardada aunque su ttl haya vencido, o None si ya no existe.
+        """
+        entry = self.get_stale_entry(kind, city, units, lang)
+        return entry["data"] if entry is not None else None
+
+    def get_stale_entry(self, kind, city, units, lang):
+        """
+        obtener una entrada aunque su ttl haya vencido, o None si ya no existe.
+        """
+        return self._get_entry(kind, city, units, lang)
+
+    def set(self, kind, city, units, lang, value, stored_at=None):
+        """
+        guardar una respuesta con el ttl correspondiente a su tipo.
+
+        args:
+            stored_at (float, optional): instante unix de la descarga, si no es ahora
+                                         (ej. al cargar desde el almacen persistente).
+
+        returns:
+            dict: la entrada guardada {"data", "stored_at"}.
+        """
+        return self.set_by_key(kind, make_city_key(city, units, lang), value, stored_at=stored_at)
+
+    def set_by_key(self, kind, city_key, value, stored_at=None):
+        """
+        guardar una respuesta a partir de la clave de ciudad ya normalizada.
+        """
+        stored_at = time.time() if stored_at is None else stored_at
+        entry = {"data": value, "stored_at": stored_at}
+        remaining = self.max_age(kind) - (time.time() - stored_at)
+        if remaining > 0:
+            self.backend.set(f"{kind}:{city_key}", entry, remaining)
+        return entry
+
+    def freshness(self, kind, stored_at):
+        """
+        devolver los segundos que le quedan de vigencia a una entrada (0 si ya vencio).
+        """
+        return max(0, int(self.ttls[kind] - (time.time() - stored_at)))
+
+    def max_age(self, kind=None):
+        """
+        devolver los segundos que se conserva una entrada, incluyendo el tiempo como dato vencido.
+        """
+        ttl = self.ttls[kind] if kind else max(self.ttls.values())
+        return ttl + self.stale_ttl
+
+    def record_stale_served(self):
+        """
+        contar una respuesta servida con datos vencidos.
+        """
+        with self._lock:
+            self.stale_served += 1
+
+    def stats(self):
+        """
+        devolver contadores de uso del cache.
+        """
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.backend.evictions,
+            "stale_served": self.stale_served,
+            "ttl_seconds": dict(self.ttls),
+            "stale_ttl_seconds": self.stale_ttl,
+        }
+
+
+_init_lock = threading.Lock()
+
+
+def create_weather_cache(config):
+    """
+    crear el cache de clima a partir de la configuracion de la aplicacion.
+
+    args:
+        config (dict): configuracion de flask (app.config).
+
+    returns:
+        WeatherCache: cache listo para usar.
+
+    raises:
+        ValueError: si el backend configurado no existe.
+    """
+    backend_name = config.get("CACHE_BACKEND", "memory")
+    max_entries = config.get("CACHE_MAX_ENTRIES", 512)
+
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries=max_entries)
+    elif backend_name == "redis":
+        backend = RedisCacheBackend(config["CACHE_REDIS_URL"], max_entries=max_entries)
+    else:
+        raise ValueError(f"backend de cache desconocido: '{backend_name}'.")
+
+    return WeatherCache(
+        backend,
+        weather_ttl=config.get("CACHE_WEATHER_TTL", 600),
+        forecast_ttl=config.get("CACHE_FORECAST_TTL", 3600),
+        stale_ttl=config.get("CACHE_STALE_TTL", 0),
+    )
+
+
+def get_weather_cache():
+    """
+    obtener el cache de clima de la aplicacion actual, creandolo la primera vez.
+
+    se crea de forma perezosa para que cada worker de gunicorn arme el suyo
+    despues del fork.
+    """
+    cache = current_app.extensions.get("weather_cache")
+    if cache is None:
+        with _init_lock:
+            cache = current_app.extensions.get("weather_cache")
+            if cache is None:
+                cache = create_weather_cache(current_app.config)
+                current_app.extensions["weather_cache"] = cache
+    return cache
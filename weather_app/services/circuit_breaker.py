@@ -0,0 +1,133 @@
+# weather_app/services/circuit_breaker.py
+
+import threading
+import time
+
+from flask import current_app
+
+# estados del circuito
+CLOSED = "closed" # las solicitudes pasan normalmente
+OPEN = "open" # las solicitudes fallan de inmediato sin llamar a openweathermap
+HALF_OPEN = "half_open" # se permiten solicitudes de prueba para ver si el servicio se recupero
+
+
+class CircuitBreaker:
+    """
+    cortar las llamadas a openweathermap despues de varios errores consecutivos.
+
+    tras failure_threshold errores seguidos el circuito se abre y las solicitudes
+    fallan de inmediato. pasados recovery_timeout segundos se pasa a semiabierto y
+    se dejan pasar hasta half_open_max_calls solicitudes de prueba: si una tiene
+    exito el circuito se cierra, si falla se vuelve a abrir.
+
+    atributos:
+        state (str): estado actual ('closed', 'open' o 'half_open').
+        rejected (int): cantidad de solicitudes rechazadas con el circuito abierto.
+        opened_count (int): cantidad de veces que se abrio el circuito.
+    """
+    def __init__(self, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.opened_count = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        indicar si se puede llamar a openweathermap en este momento.
+
+        returns:
+            bool: true si la solicitud puede pasar.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    return False
+                # paso el tiempo de espera: probar si el servicio se recupero
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+
+            return True
+
+    def record_success(self):
+        """
+        registrar una llamada exitosa: cerrar el circuito.
+        """
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probes_in_flight = 0
+
+    def record_failure(self):
+        """
+        registrar una llamada fallida: abrir el circuito si se supera el umbral.
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened_count += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._probes_in_flight = 0
+
+    def release_probe(self):
+        """
+        liberar un lugar de prueba cuando la llamada termino sin exito ni falla del servicio
+        (ej. ciudad no encontrada).
+        """
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def stats(self):
+        """
+        devolver el estado y los contadores del circuito.
+        """
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 2)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in_seconds": retry_in,
+                "opened_count": self.opened_count,
+                "rejected": self.rejected,
+            }
+
+
+_init_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """
+    obtener el circuito de openweathermap de la aplicacion actual, creandolo la primera vez.
+    """
+    breaker = current_app.extensions.get("upstream_breaker")
+    if breaker is None:
+        with _init_lock:
+            breaker = current_app.extensions.get("upstream_breaker")
+            if breaker is None:
+                config = current_app.config
+                breaker = CircuitBreaker(
+                    failure_threshold=config.get("BREAKER_FAILURE_THRESHOLD", 5),
+                    recovery_timeout=config.get("BREAKER_RECOVERY_TIMEOUT", 30),
+                    half_open_max_calls=config.get("BREAKER_HALF_OPEN_MAX_CALLS", 1),
+                )
+                current_app.extensions["upstream_breaker"] = breaker
+    return breaker
@@ -0,0 +1,97 @@
+# weather_app/services/cities.py
+
+import hashlib
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from weather_app import PROJECT_ROOT
+from weather_app.exceptions.server_errors import InternalServerError # importar error de servidor
+from weather_app.services.json_provider import loads
+from weather_app.utils.city_index import CityIndex
+
+logger = logging.getLogger(__name__)
+
+# archivo de ciudades por provincia, el mismo que descarga el frontend
+CITIES_PATH = os.path.join(PROJECT_ROOT, "static", "data", "cities_by_province.json")
+
+# datos de ciudades ya cargados: provincia -> ciudades, indice de busqueda y version (etag)
+Cities = namedtuple("Cities", ["data", "index", "version"])
+
+_cities = None
+_load_lock = threading.Lock()
+
+
+def load_cities(path=CITIES_PATH):
+    """
+    cargar los datos de las ciudades por provincia desde un archivo json estatico.
+
+    returns:
+        Cities: datos, indice de busqueda y version del archivo.
+
+    raises:
+        internalservererror: si el archivo no existe o no es un json valido.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        # registrar error si el archivo no se encuentra
+        logger.error("no se encontro el archivo de ciudades en %s", path)
+        # lanzar un error interno del servidor si los datos criticos no estan
+        raise InternalServerError("datos de ciudades no disponibles en el servidor.")
+
+    try:
+        data = loads(raw)
+    except ValueError:
+        # registrar error si el json no es valido
+        logger.error("el archivo de ciudades %s no es un json valido.", path)
+        # lanzar un error interno del servidor si los datos estan corruptos
+        raise InternalServerError("datos de ciudades corruptos en el servidor.")
+
+    # la version es el hash del archivo: cambia solo si cambian las ciudades
+    version = hashlib.sha256(raw).hexdigest()[:16]
+    return Cities(data, CityIndex(data), version)
+
+
+def get_cities():
+    """
+    obtener los datos de ciudades, cargandolos la primera vez que se usan.
+
+    importar las rutas no lee el archivo: se lee una sola vez por proceso, en la
+    primera solicitud (o al armar el indice de provincias), y se comparte entre
+    hilos. si la carga falla se reintenta en la siguiente llamada.
+
+    returns:
+        Cities: datos, indice de busqueda y version del archivo.
+    """
+    global _cities
+    cities = _cities
+    if cities is None:
+        with _load_lock:
+            cities = _cities
+            if cities is None:
+                cities = _cities = load_cities()
+    return cities
+
+
+def get_cities_data():
+    """
+    devolver el diccionario provincia -> lista de ciudades ({"name", "default"}).
+    """
+    return get_cities().data
+
+
+def get_city_index():
+    """
+    devolver el indice de provincias y ciudades insensible a tildes y mayusculas.
+    """
+    return get_cities().index
+
+
+def get_cities_version():
+    """
+    devolver la version de los datos de ciudades, usada como etag de /cities_by_province e /is_province.
+    """
+    return get_cities().version
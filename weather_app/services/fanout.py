@@ -0,0 +1,145 @@
+# weather_app/services/fanout.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from weather_app.exceptions.base import APIError
+from weather_app.exceptions.server_errors import InternalServerError, GatewayTimeoutError # importar errores de servidor
+from weather_app.services.quota import BATCH
+from weather_app.services.report import build_weather_report, build_weather_report_async, error_payload
+
+
+def _report_or_error(app, city, province=None):
+    """
+    obtener el reporte de una ciudad dentro del contexto de la aplicacion.
+
+    las consultas en lote tienen prioridad BATCH ante la cuota de openweathermap.
+
+    returns:
+        tuple: (codigo de estado http, reporte o diccionario de error).
+    """
+    with app.app_context():
+        try:
+            return 200, build_weather_report(city, BATCH, province)
+        except APIError as e:
+            return e.status_code, error_payload(e)
+        except Exception as e:
+            error = InternalServerError(f"error interno inesperado: {str(e)}")
+            return error.status_code, error_payload(error)
+
+
+def iter_city_reports(app, cities, max_workers, timeout=None, province=None):
+    """
+    obtener los reportes de varias ciudades en paralelo, a medida que se resuelven.
+
+    args:
+        app (Flask): aplicacion real (no el proxy current_app), usada en los hilos.
+        cities (list): nombres de ciudades a consultar.
+        max_workers (int): cantidad maxima de consultas simultaneas.
+        timeout (float, optional): segundos maximos por ciudad desde que empieza su
+                                   consulta; al vencer se entrega un error 504 para
+                                   esa ciudad sin esperar su respuesta.
+        province (str, optional): provincia de todas las ciudades (ej. /weather/province).
+
+    yields:
+        tuple: (indice en cities, codigo de estado http, reporte o diccionario de error).
+    """
+    if not cities:
+        return
+
+    started = {} # indice -> instante en que empezo la consulta
+
+    def task(i, city):
+        started[i] = time.monotonic()
+        return _report_or_error(app, city, province)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(cities))), thread_name_prefix="fanout")
+    try:
+        futures = {executor.submit(task, i, city): i for i, city in enumerate(cities)}
+        pending = set(futures)
+        while pending:
+            wait_for = None
+            if timeout is not None:
+                # esperar como maximo hasta que venza la consulta mas antigua en curso
+                running = [started[futures[f]] for f in pending if futures[f] in started]
+                wait_for = max(0.0, min(running) + timeout - time.monotonic()) if running else timeout
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                status_code, body = future.result()
+                yield futures[future], status_code, body
+
+            if timeout is not None:
+                now = time.monotonic()
+                expired = [f for f in pending if futures[f] in started and now - started[futures[f]] >= timeout]
+                for future in expired:
+                    pending.discard(future)
+                    i = futures[future]
+                    error = GatewayTimeoutError(f"tiempo de espera agotado para la ciudad '{cities[i]}'.")
+                    yield i, error.status_code, error_payload(error)
+    finally:
+        # no bloquear al cliente esperando hilos que ya no interesan
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _report_or_error_async(app, city, province=None):
+    """
+    version asincrona de _report_or_error: cada tarea activa su propio contexto de la aplicacion.
+    """
+    with app.app_context():
+        try:
+            return 200, await build_weather_report_async(city, BATCH, province)
+        except APIError as e:
+            return e.status_code, error_payload(e)
+        except Exception as e:
+            error = InternalServerError(f"error interno inesperado: {str(e)}")
+            return error.status_code, error_payload(error)
+
+
+async def iter_city_reports_async(app, cities, max_workers, timeout=None, province=None):
+    """
+    version asincrona (modo asgi) de iter_city_reports: mismas garantias, con
+    tareas de asyncio en lugar de hilos.
+
+    args:
+        app (Flask): aplicacion flask con los servicios compartidos.
+        cities (list): nombres de ciudades a consultar.
+        max_workers (int): cantidad maxima de consultas simultaneas.
+        timeout (float, optional): segundos maximos por ciudad desde que empieza su consulta.
+        province (str, optional): provincia de todas las ciudades.
+
+    yields:
+        tuple: (indice en cities, codigo de estado http, reporte o diccionario de error).
+    """
+    if not cities:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def task(i, city):
+        async with semaphore:
+            try:
+                # el timeout corre desde que la ciudad obtiene un lugar, no desde que se encola
+                return (i, *await asyncio.wait_for(_report_or_error_async(app, city, province), timeout))
+            except asyncio.TimeoutError:
+                error = GatewayTimeoutError(f"tiempo de espera agotado para la ciudad '{city}'.")
+                return i, error.status_code, error_payload(error)
+
+    tasks = [asyncio.ensure_future(task(i, city)) for i, city in enumerate(cities)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # si el cliente se desconecta, no seguir consultando ciudades que ya no interesan
+        for pending in tasks:
+            pending.cancel()
+
+
+def city_result(city, status_code, body):
+    """
+    armar el resultado por ciudad de una respuesta en lote.
+    """
+    if status_code == 200:
+        return {"city": city, "status": status_code, "data": body}
+    return {"city": city, "status": status_code, **body}
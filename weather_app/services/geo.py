@@ -0,0 +1,204 @@
+# weather_app/services/geo.py
+
+import logging
+import threading
+import time
+
+from flask import current_app
+
+from weather_app.services.cities import get_cities
+from weather_app.services.json_provider import loads
+from weather_app.services.locations import get_city_locations, location_key
+from weather_app.utils.spatial import STRtree, haversine_km, point_in_polygon, ring_bbox
+
+logger = logging.getLogger(__name__)
+
+
+def load_province_polygons(paths, canonical_province):
+    """
+    leer los poligonos de las provincias de los archivos geojson del mapa.
+
+    args:
+        paths (list): rutas a archivos geojson (FeatureCollection) con la propiedad 'name'.
+        canonical_province (callable): nombre del geojson -> clave de cities_by_province.json
+                                       (None si la provincia no esta listada).
+
+    returns:
+        list: tuplas (provincia, anillos) con un elemento por cada parte de un MultiPolygon.
+    """
+    polygons = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                collection = loads(f.read())
+        except FileNotFoundError:
+            logger.warning("no se encontro el archivo de limites %s", path)
+            continue
+        except ValueError:
+            logger.warning("el archivo de limites %s no es un json valido.", path)
+            continue
+
+        for feature in collection.get("features", []):
+            name = (feature.get("properties") or {}).get("name")
+            geometry = feature.get("geometry") or {}
+            province = canonical_province(name) if name else None
+            if province is None:
+                logger.warning("la provincia '%s' de %s no esta en la lista de ciudades", name, path)
+                continue
+            if geometry.get("type") == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                continue
+            polygons.extend((province, rings) for rings in parts if rings and rings[0])
+    return polygons
+
+
+class ProvinceLocator:
+    """
+    ubicar un punto del mapa en su provincia y su ciudad listada mas cercana.
+
+    las ciudades candidatas son solo las que tienen coordenadas en la tabla
+    generada (city_locations.json), no las aprendidas en tiempo de ejecucion:
+    asi la respuesta es la misma en todos los servidores y despues de reiniciar.
+    si la provincia no tiene ninguna (por ejemplo, sin tabla generada) se usa
+    su ciudad por defecto de cities_by_province.json.
+
+    cada parte de cada provincia se indexa por la caja de su anillo exterior en un
+    STRtree armado una sola vez; una consulta solo prueba punto en poligono contra
+    las partes cuya caja contiene el punto (en general una o dos de las ~30), asi
+    no recorre los miles de vertices de todas las provincias.
+
+    atributos:
+        lookups (int): consultas atendidas por este worker.
+        misses (int): consultas fuera de todas las provincias.
+    """
+    def __init__(self, polygons, cities_data, coordinates):
+        """
+        args:
+            polygons (list): tuplas (provincia, anillos) de load_province_polygons.
+            cities_data (dict): provincia -> lista de ciudades ({"name", "default"}).
+            coordinates (dict): clave de location_key -> ubicacion de la tabla generada.
+        """
+        self.cities_data = cities_data
+        # ciudades con coordenadas de cada provincia: provincia -> [(nombre, lat, lon)]
+        self.candidates = {}
+        for province, cities in cities_data.items():
+            for city in cities:
+                location = coordinates.get(location_key(city["name"], province)) or {}
+                if location.get("lat") is not None and location.get("lon") is not None:
+                    self.candidates.setdefault(province, []).append((city["name"], location["lat"], location["lon"]))
+        # ciudad por defecto de cada provincia, para las que no tienen candidatas
+        self.defaults = {
+            province: next((city for city in cities if city.get("default")), cities[0])["name"]
+            for province, cities in cities_data.items() if cities
+        }
+        self.provinces = len({province for province, _ in polygons})
+        self.tree = STRtree([(ring_bbox(rings[0]), (province, rings)) for province, rings in polygons])
+        self.lookups = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def province_at(self, lat, lon):
+        """
+        obtener la provincia que contiene la coordenada.
+
+        returns:
+            str: clave de la provincia en cities_by_province.json, o None si el punto
+                 no cae en ninguna.
+        """
+        # el geojson guarda las coordenadas como [longitud, latitud]
+        for province, rings in self.tree.query_point(lon, lat):
+            if point_in_polygon(lon, lat, rings):
+                return province
+        return None
+
+    def nearest_city(self, province, lat, lon):
+        """
+        elegir la ciudad listada de la provincia mas cercana a la coordenada.
+
+        returns:
+            dict: {"name", "lat", "lon", "distance_km"}. si ninguna ciudad de la provincia
+                  tiene coordenadas en la tabla generada, su ciudad por defecto con
+                  "lat", "lon" y "distance_km" en None; None si la provincia no tiene ciudades.
+        """
+        nearest = None
+        for name, city_lat, city_lon in self.candidates.get(province, ()):
+            distance = haversine_km(lat, lon, city_lat, city_lon)
+            if nearest is None or distance < nearest["distance_km"]:
+                nearest = {"name": name, "lat": city_lat, "lon": city_lon, "distance_km": distance}
+        if nearest is not None:
+            nearest["distance_km"] = round(nearest["distance_km"], 1)
+            return nearest
+
+        default = self.defaults.get(province)
+        if default is None:
+            return None
+        return {"name": default, "lat": None, "lon": None, "distance_km": None}
+
+    def locate(self, lat, lon):
+        """
+        ubicar una coordenada en su provincia y su ciudad mas cercana.
+
+        returns:
+            dict: {"province", "city"}, o None si el punto no cae en ninguna provincia.
+        """
+        started = time.perf_counter()
+        province = self.province_at(lat, lon)
+        result = None
+        if province is not None:
+            result = {"province": province, "city": self.nearest_city(province, lat, lon)}
+        with self._lock:
+            self.lookups += 1
+            self.misses += result is None
+            self.lookup_seconds += time.perf_counter() - started
+        return result
+
+    def stats(self):
+        """
+        devolver el tamaño del indice y los contadores de consultas del worker.
+        """
+        with self._lock:
+            return {
+                "provinces": self.provinces,
+                "polygons": self.tree.size,
+                "cities_with_coordinates": sum(len(cities) for cities in self.candidates.values()),
+                "tree_height": self.tree.height,
+                "lookups": self.lookups,
+                "misses": self.misses,
+                "avg_lookup_ms": round(self.lookup_seconds / self.lookups * 1000, 3) if self.lookups else None,
+            }
+
+
+_init_lock = threading.Lock()
+
+
+def get_province_locator():
+    """
+    obtener el localizador de provincias de la aplicacion actual, creandolo la primera vez.
+
+    se arma en la primera consulta de /reverse_geocode y no al iniciar: leer los
+    geojson de limites y las ciudades en cada worker que arranca o se recicla
+    demoraria a todos los workers, aunque no atiendan esa ruta.
+    """
+    locator = current_app.extensions.get("province_locator")
+    if locator is None:
+        with _init_lock:
+            locator = current_app.extensions.get("province_locator")
+            if locator is None:
+                cities = get_cities()
+                polygons = load_province_polygons(
+                    current_app.config["PROVINCE_BOUNDARIES_PATHS"], cities.index.canonical_province,
+                )
+                locator = ProvinceLocator(polygons, cities.data, get_city_locations().table)
+                current_app.extensions["province_locator"] = locator
+    return locator
+
+
+def peek_province_locator():
+    """
+    devolver el localizador de provincias si ya se armo en este worker, sin armarlo.
+    """
+    return current_app.extensions.get("province_locator")
@@ -0,0 +1,149 @@
+# weather_app/services/http_cache.py
+
+import gzip
+
+from flask import current_app, jsonify, request
+
+try:
+    import brotli # compresion brotli (opcional)
+except ImportError:
+    brotli = None
+
+# tipos de respuesta que vale la pena comprimir
+_COMPRESSIBLE_MIMETYPES = {"application/json", "text/html"}
+
+
+def conditional_json(build, etag, last_modified=None, max_age=0):
+    """
+    responder json con etag, last-modified y cache-control, o 304 si el cliente ya tiene esa version.
+
+    el cuerpo solo se arma si hay que enviarlo, asi un sondeo repetido no paga la
+    serializacion. el etag es debil porque el mismo contenido puede viajar
+    comprimido o no.
+
+    args:
+        build (callable): funcion sin argumentos que devuelve el cuerpo de la respuesta
+                          (un objeto serializable a json o una Response ya armada).
+        etag (str): version del contenido (ej. derivada del instante de descarga).
+        last_modified (float, optional): instante unix de la ultima modificacion.
+        max_age (int): segundos que navegadores e intermediarios pueden reutilizar la respuesta.
+
+    returns:
+        Response: respuesta 200 con el json, o 304 sin cuerpo.
+    """
+    if is_not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+        response.headers.pop("Content-Type", None)
+    else:
+        body = build()
+        # build puede devolver una respuesta ya serializada (ej. desde el cache de reportes)
+        response = body if isinstance(body, current_app.response_class) else jsonify(body)
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def is_not_modified(etag, last_modified=None, req=None):
+    """
+    comprobar si la version que tiene el cliente (If-None-Match / If-Modified-Since) sigue vigente.
+
+    args:
+        req (Request, optional): solicitud a revisar; por defecto la solicitud flask actual
+                                 (el modo asgi pasa la de quart).
+    """
+    req = req or request
+    if req.if_none_match:
+        # si hay If-None-Match se ignora If-Modified-Since (rfc 9110)
+        return req.if_none_match.contains_weak(etag)
+    if req.if_modified_since and last_modified is not None:
+        return int(last_modified) <= req.if_modified_since.timestamp()
+    return False
+
+
+def negotiate_encoding(req=None):
+    """
+    elegir la codificacion segun el encabezado Accept-Encoding: brotli si esta instalado, si no gzip.
+
+    args:
+        req (Request, optional): solicitud a revisar; por defecto la solicitud flask actual.
+
+    returns:
+        str: 'br' o 'gzip', o None para no comprimir.
+    """
+    accepted = (req or request).accept_encodings
+    options = (("br", "gzip") if brotli is not None else ("gzip",))
+    best, best_quality = None, 0
+    for encoding in options:
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    """
+    comprimir bytes con la codificacion elegida por negotiate_encoding.
+
+    args:
+        data (bytes): contenido sin comprimir.
+        encoding (str): 'br' o 'gzip'.
+
+    returns:
+        bytes: contenido comprimido.
+    """
+    config = current_app.config
+    if encoding == "br":
+        return brotli.compress(data, quality=config.get("COMPRESS_BROTLI_QUALITY", 5))
+    return gzip.compress(data, compresslevel=config.get("COMPRESS_GZIP_LEVEL", 6))
+
+
+def compress_response(response):
+    """
+    comprimir con brotli o gzip las respuestas json y html que superan COMPRESS_MIN_SIZE bytes.
+
+    no toca las respuestas en streaming (ndjson), los archivos estaticos (que ya
+    tienen variantes precomprimidas) ni las que ya traen Content-Encoding.
+    """
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in _COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    config = current_app.config
+    data = response.get_data()
+    if len(data) < config.get("COMPRESS_MIN_SIZE", 1024):
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.content_encoding = encoding
+
+    # un etag fuerte identifica los bytes exactos; la version comprimida es otra
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    registrar la compresion de respuestas dinamicas en la aplicacion.
+
+    args:
+        app (Flask): aplicacion donde registrar compress_response como after_request.
+    """
+    app.after_request(compress_response)
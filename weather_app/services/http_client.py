@@ -0,0 +1,146 @@
+# weather_app/services/http_client.py
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# estado por proceso: sesion http con pool de conexiones y pool de hilos
+_state = {"pid": None, "session": None, "executor": None, "refresh_executor": None}
+_lock = threading.Lock()
+
+# sesiones http asincronas por event loop (modo asgi): loop -> aiohttp.ClientSession
+_async_clients = {}
+
+
+def _ensure_state(config):
+    """
+    crear la sesion y el pool de hilos del proceso actual si aun no existen.
+
+    se comprueba el pid para que cada worker de gunicorn cree los suyos despues
+    del fork, en lugar de heredar sockets abiertos del proceso padre.
+    """
+    pid = os.getpid()
+    if _state["pid"] == pid:
+        return
+    with _lock:
+        if _state["pid"] == pid:
+            return
+
+        pool_size = config.get("UPSTREAM_POOL_SIZE", 20)
+        session = requests.Session()
+        # reutilizar conexiones keep-alive hacia openweathermap
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        executor = ThreadPoolExecutor(
+            max_workers=config.get("UPSTREAM_MAX_WORKERS", pool_size),
+            thread_name_prefix="upstream",
+        )
+
+        # pool aparte para refrescos en segundo plano, asi nunca ocupan los hilos
+        # que esas mismas tareas necesitan para descargar clima y pronostico
+        refresh_executor = ThreadPoolExecutor(
+            max_workers=config.get("UPSTREAM_REFRESH_WORKERS", 4),
+            thread_name_prefix="refresh",
+        )
+
+        _state.update(pid=pid, session=session, executor=executor, refresh_executor=refresh_executor)
+
+
+def get_session(config):
+    """
+    obtener la sesion http compartida del worker actual.
+
+    args:
+        config (dict): configuracion de flask (app.config).
+
+    returns:
+        requests.Session: sesion con pool de conexiones keep-alive.
+    """
+    _ensure_state(config)
+    return _state["session"]
+
+
+def get_executor(config):
+    """
+    obtener el pool de hilos usado para las solicitudes concurrentes a openweathermap.
+
+    args:
+        config (dict): configuracion de flask (app.config).
+
+    returns:
+        ThreadPoolExecutor: pool de hilos del worker actual.
+    """
+    _ensure_state(config)
+    return _state["executor"]
+
+
+def get_refresh_executor(config):
+    """
+    obtener el pool de hilos usado para refrescar datos vencidos en segundo plano.
+
+    args:
+        config (dict): configuracion de flask (app.config).
+
+    returns:
+        ThreadPoolExecutor: pool de hilos del worker actual.
+    """
+    _ensure_state(config)
+    return _state["refresh_executor"]
+
+
+def get_timeout(config):
+    """
+    obtener el timeout (conexion, lectura) para las solicitudes a openweathermap.
+    """
+    return (
+        config.get("UPSTREAM_CONNECT_TIMEOUT", 3.05),
+        config.get("UPSTREAM_READ_TIMEOUT", 10),
+    )
+
+
+def get_async_client(config):
+    """
+    obtener la sesion http asincrona del event loop actual, creandola la primera vez.
+
+    requiere el paquete 'aiohttp' (ver requirements-async.txt). la sesion queda
+    ligada al loop que la creo, por eso se guarda una por loop.
+
+    args:
+        config (dict): configuracion de flask (app.config).
+
+    returns:
+        aiohttp.ClientSession: sesion con pool de conexiones keep-alive; las solicitudes
+                               que exceden UPSTREAM_ASYNC_MAX_CONNECTIONS esperan su turno.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        try:
+            import aiohttp
+        except ImportError:
+            raise RuntimeError("el modo asgi requiere el paquete 'aiohttp' instalado (ver requirements-async.txt).")
+
+        client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=config.get("UPSTREAM_ASYNC_MAX_CONNECTIONS", 100)),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=config.get("UPSTREAM_CONNECT_TIMEOUT", 3.05),
+                sock_read=config.get("UPSTREAM_READ_TIMEOUT", 10),
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """
+    cerrar la sesion http asincrona del event loop actual, si existe.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
@@ -0,0 +1,44 @@
+# weather_app/services/internal_access.py
+
+import hmac
+import re
+
+from weather_app.exceptions.client_errors import NotFoundError, UnauthorizedError
+
+# rutas internas: estado de los servicios, perfilador y metricas de prometheus
+INTERNAL_PATH = re.compile(r"^/(status(/|$)|metrics/?$)")
+
+# rutas publicas, las unicas que responden a otros origenes (cors)
+PUBLIC_PATHS = r"^/(?!status(/|$)|metrics/?$).*"
+
+
+def is_internal_path(path):
+    """
+    indicar si la ruta es de un endpoint interno (/status/* o /metrics).
+    """
+    return INTERNAL_PATH.match(path) is not None
+
+
+def check_internal_access(config, headers):
+    """
+    verificar que la solicitud a un endpoint interno traiga el token configurado.
+
+    los endpoints internos exponen el estado del servicio y permiten encender el
+    perfilador, asi que estan apagados por defecto: sin INTERNAL_ENDPOINTS_TOKEN
+    responden 404 y con el token exigen el encabezado 'Authorization: Bearer <token>'
+    (el mismo que envia prometheus con bearer_token).
+
+    args:
+        config (dict): configuracion de la aplicacion.
+        headers: encabezados de la solicitud.
+
+    raises:
+        notfounderror: si los endpoints internos estan apagados.
+        unauthorizederror: si falta el token o no coincide.
+    """
+    token = config.get("INTERNAL_ENDPOINTS_TOKEN")
+    if not token:
+        raise NotFoundError("recurso no encontrado.")
+    scheme, _, supplied = (headers.get("Authorization") or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.strip().encode("utf-8"), token.encode("utf-8")):
+        raise UnauthorizedError("token de acceso requerido para los endpoints internos.")
@@ -0,0 +1,85 @@
+# weather_app/services/json_provider.py
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson # serializacion json rapida (opcional)
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """
+    decodificar json (bytes o str) con orjson si esta instalado, si no con el modulo json.
+
+    se usa para las respuestas de openweathermap y los datos guardados, que son
+    json estandar; ambos decodificadores devuelven los mismos objetos.
+
+    raises:
+        ValueError: si el texto no es json valido (orjson.JSONDecodeError hereda de ValueError).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    proveedor json de flask que serializa y decodifica con orjson.
+
+    respeta sort_keys y la indentacion en modo debug igual que el proveedor por
+    defecto, y las respuestas terminan con salto de linea como las de jsonify.
+    a diferencia de este, los caracteres no ascii se envian en utf-8 sin
+    escapar. si orjson no puede serializar un objeto (ej. enteros de mas de 64
+    bits) o se piden opciones del modulo json, se usa el proveedor por defecto.
+    """
+    def _options(self, pretty=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options(pretty)) + b"\n"
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    """
+    elegir el proveedor json de la aplicacion segun JSON_PROVIDER.
+
+    args:
+        app (Flask): aplicacion a configurar.
+
+    returns:
+        str: 'orjson' o 'default', el proveedor usado.
+    """
+    choice = app.config.get("JSON_PROVIDER", "auto")
+    if choice == "orjson" and orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson requiere el paquete 'orjson'.")
+    if choice in ("auto", "orjson") and orjson is not None:
+        app.json = OrjsonProvider(app)
+        return "orjson"
+    return "default"
@@ -0,0 +1,235 @@
+# weather_app/services/locations.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from flask import current_app
+
+from weather_app.services.cache import normalize_city
+from weather_app.services.store import get_weather_store
+
+logger = logging.getLogger(__name__)
+
+
+# provincia cuyas ciudades openweathermap ubica en otro pais
+_FK_PROVINCE = normalize_city("Islas Malvinas")
+
+
+def expected_country(province):
+    """
+    devolver el codigo de pais con que openweathermap ubica las ciudades de una provincia.
+    """
+    return "FK" if province and normalize_city(province) == _FK_PROVINCE else "AR"
+
+
+def location_key(city, province=None):
+    """
+    devolver la clave de una ciudad en la tabla de ubicaciones: provincia y nombre
+    normalizados, para que dos ciudades homonimas de distintas provincias no se pisen.
+    las ciudades que no estan listadas (sin provincia) se guardan solo por nombre.
+    """
+    if province:
+        return f"{normalize_city(province)}|{normalize_city(city)}"
+    return normalize_city(city)
+
+
+class CityLocations:
+    """
+    tabla de resolucion de ciudades a id y coordenadas de openweathermap.
+
+    se carga del archivo generado por utils/data_conversion/build_city_locations.py
+    y se completa con las ciudades resueltas en tiempo de ejecucion: la primera
+    consulta por nombre devuelve el id y las coordenadas, que se guardan en el
+    almacen persistente para que las siguientes consultas usen el id.
+
+    las ciudades se identifican por provincia y nombre. las consultas por nombre
+    siempre llevan el codigo de pais (",AR") y solo se aprenden respuestas de ese
+    pais, asi un nombre ambiguo ("San Justo", "Merlo") no queda fijado a un lugar
+    fuera de argentina.
+    """
+    def __init__(self, table=None, store=None):
+        self.table = dict(table or {}) # ubicaciones del archivo generado, sin las aprendidas
+        self._locations = dict(self.table) # clave de location_key -> {"id", "lat", "lon", ...}
+        self._store = store
+        self._lock = threading.Lock()
+        self.learned = 0 # ciudades resueltas en tiempo de ejecucion por este worker
+        self.rejected = 0 # respuestas descartadas por ser de otro pais
+
+        if store is not None:
+            try:
+                for city_key, location in store.locations().items():
+                    if self._trusted(city_key, location):
+                        self._locations.setdefault(city_key, location)
+            except sqlite3.Error as e:
+                logger.warning("no se pudieron leer las ubicaciones guardadas: %s", e)
+
+    @staticmethod
+    def _trusted(city_key, location):
+        """
+        indicar si una ubicacion guardada se puede usar: las guardadas solo por
+        nombre de ciudad listada o de otro pais son de versiones anteriores, que
+        consultaban sin codigo de pais.
+        """
+        province, _, _ = city_key.rpartition("|")
+        return bool(province) and location.get("country") == expected_country(province)
+
+    def get(self, city, province=None):
+        """
+        obtener la ubicacion resuelta de una ciudad, o None si no se conoce.
+        """
+        return self._locations.get(location_key(city, province))
+
+    def cache_name(self, city, province=None):
+        """
+        devolver el nombre con el que se guarda la ciudad en cache y almacen.
+
+        las ciudades resueltas usan su id, asi todas las formas de escribirlas
+        comparten la misma entrada.
+        """
+        location = self.get(city, province)
+        if location and location.get("id"):
+            return f"#{location['id']}"
+        return city
+
+    def query_params(self, city, province=None):
+        """
+        devolver los parametros de ubicacion para la solicitud a openweathermap.
+
+        returns:
+            dict: {"id": ...}, {"lat": ..., "lon": ...} o {"q": "ciudad,AR"} si no esta resuelta.
+        """
+        location = self.get(city, province)
+        if location:
+            if location.get("id"):
+                return {"id": location["id"]}
+            if location.get("lat") is not None and location.get("lon") is not None:
+                return {"lat": location["lat"], "lon": location["lon"]}
+        return {"q": f"{city},{expected_country(province)}"}
+
+    def learn(self, city, weather_data, province=None):
+        """
+        registrar el id y las coordenadas de una ciudad a partir de una respuesta de clima actual.
+
+        args:
+            city (str): nombre con el que se consulto.
+            weather_data (dict): respuesta de /data/2.5/weather.
+            province (str, optional): provincia de la ciudad listada.
+
+        returns:
+            bool: true si la ubicacion quedo registrada.
+        """
+        try:
+            location = {
+                "id": weather_data["id"],
+                "lat": weather_data["coord"]["lat"],
+                "lon": weather_data["coord"]["lon"],
+                "name": weather_data.get("name"),
+                "country": weather_data.get("sys", {}).get("country"),
+            }
+        except (KeyError, TypeError):
+            return False
+
+        country = expected_country(province)
+        if location["country"] != country:
+            # no fijar la ciudad a un lugar de otro pais: la proxima consulta vuelve a buscar por nombre
+            logger.warning(
+                "'%s' (%s) resolvio a '%s' en %s, no en %s: no se registra su ubicacion.",
+                city, province, location["name"], location["country"], country,
+            )
+            with self._lock:
+                self.rejected += 1
+            return False
+
+        city_key = location_key(city, province)
+        with self._lock:
+            known = self._locations.get(city_key)
+            if known and known.get("id") == location["id"]:
+                return True
+            # conservar las coordenadas del archivo generado si ya existian
+            self._locations[city_key] = {**location, **(known or {}), "id": location["id"]}
+            self.learned += 1
+
+        if self._store is not None:
+            try:
+                self._store.put_location(city_key, self._locations[city_key])
+            except sqlite3.Error as e:
+                logger.warning("no se pudo guardar la ubicacion de '%s': %s", city, e)
+        return True
+
+    def stats(self):
+        """
+        devolver la cantidad de ciudades resueltas.
+        """
+        with self._lock:
+            return {
+                "resolved": len(self._locations),
+                "with_id": sum(1 for loc in self._locations.values() if loc.get("id")),
+                "learned": self.learned,
+                "rejected": self.rejected,
+            }
+
+
+def load_locations_table(path):
+    """
+    cargar el archivo de ubicaciones generado por build_city_locations.py.
+
+    el archivo agrupa las ciudades por provincia ({provincia: {ciudad: ubicacion}}).
+
+    returns:
+        dict: clave de location_key -> ubicacion; vacio si el archivo no existe.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+    except FileNotFoundError:
+        logger.error(
+            "no se encontro la tabla de ubicaciones %s: las ciudades se consultaran por nombre. "
+            "generarla con weather_app/utils/data_conversion/build_city_locations.py.", path,
+        )
+        return {}
+    except json.JSONDecodeError:
+        logger.error("el archivo de ubicaciones %s no es un json valido.", path)
+        return {}
+    return {
+        location_key(city, province): location
+        for province, cities in table.items()
+        for city, location in cities.items()
+    }
+
+
+def check_locations_table(app):
+    """
+    verificar al iniciar que exista la tabla de ubicaciones si CITY_LOCATIONS_REQUIRED esta activo.
+
+    raises:
+        RuntimeError: si la tabla es obligatoria y no existe.
+    """
+    path = app.config.get("CITY_LOCATIONS_PATH")
+    if app.config.get("CITY_LOCATIONS_REQUIRED") and not (path and os.path.isfile(path)):
+        raise RuntimeError(
+            f"falta la tabla de ubicaciones {path!r} (CITY_LOCATIONS_REQUIRED=1); "
+            "generarla con weather_app/utils/data_conversion/build_city_locations.py."
+        )
+
+
+_init_lock = threading.Lock()
+
+
+def get_city_locations():
+    """
+    obtener la tabla de ubicaciones de la aplicacion actual, creandola la primera vez.
+    """
+    locations = current_app.extensions.get("city_locations")
+    if locations is None:
+        with _init_lock:
+            locations = current_app.extensions.get("city_locations")
+            if locations is None:
+                locations = CityLocations(
+                    table=load_locations_table(current_app.config["CITY_LOCATIONS_PATH"]),
+                    store=get_weather_store(),
+                )
+                current_app.extensions["city_locations"] = locations
+    return locations
@@ -0,0 +1,533 @@
+# weather_app/services/metrics.py
+
+import contextvars
+import glob
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import fcntl # bloqueo de archivos, disponible solo en sistemas unix
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# limites de los histogramas: segundos y bytes
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# metricas conocidas: nombre -> (tipo, descripcion, limites de histograma)
+METRICS = {
+    "http_requests_total": ("counter", "solicitudes http respondidas, por endpoint y codigo", None),
+    "http_request_duration_seconds": ("histogram", "duracion de las solicitudes http, por endpoint", TIME_BUCKETS),
+    "http_response_bytes": ("histogram", "tamaño del cuerpo de las respuestas http, por endpoint", SIZE_BUCKETS),
+    "http_requests_in_flight": ("gauge", "solicitudes http en curso, por endpoint", None),
+    "weather_stage_seconds": ("histogram", "duracion de cada etapa de /weather (descarga, agrupado, serializacion)", TIME_BUCKETS),
+    "openweather_responses_total": ("counter", "respuestas de openweathermap por tipo y codigo (o tipo de falla)", None),
+    "openweather_response_bytes": ("histogram", "tamaño de las respuestas de openweathermap, por tipo", SIZE_BUCKETS),
+    "openweather_quota_calls_total": ("counter", "llamadas a openweathermap autorizadas o rechazadas por el gobernador de cuota", None),
+    "openweather_quota_remaining": ("gauge", "fichas restantes de la cuota de openweathermap, compartidas entre workers", None),
+    "metrics_workers": ("gauge", "workers vivos cuyas metricas se sumaron", None),
+}
+
+# tiempos por etapa de la solicitud en curso, para el encabezado Server-Timing
+# (None si el encabezado esta desactivado)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    contadores, indicadores e histogramas de un worker.
+
+    los workers de un mismo servidor (hijos del mismo proceso, ej. el maestro de
+    gunicorn) comparten la carpeta directory/server-<pid del padre>. cada worker
+    escribe periodicamente una copia de sus valores en metrics-<pid>-<id>.json
+    (el id evita que un pid reutilizado pise la copia de otro worker) y /metrics
+    suma las copias de todos.
+
+    los contadores e histogramas de un worker que ya termino se siguen sumando
+    (como en prometheus, un contador no baja mientras corre el servidor): su
+    copia se acumula en retired.json y se borra, asi la carpeta no crece con cada
+    reciclado; sus indicadores se descartan. las carpetas de servidores que ya no
+    corren (un despliegue anterior) se borran al iniciar cada worker, y sus
+    contadores vuelven a cero como al reiniciar un proceso.
+    """
+    def __init__(self):
+        self.directory = None
+        self.flush_interval = 5.0
+        self._counters = {} # (nombre, etiquetas) -> valor
+        self._gauges = {} # (nombre, etiquetas) -> valor
+        self._histograms = {} # (nombre, etiquetas) -> [cantidad por limite..., +Inf, suma]
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._snapshot_file = (None, None) # (pid, ruta de la copia de ese proceso)
+        self._tick_hooks = [] # funciones que el hilo de escritura llama en cada vuelta
+
+    def inc(self, name, value=1, **labels):
+        """
+        sumar value a un contador.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add(self, name, delta, **labels):
+        """
+        sumar delta (positivo o negativo) a un indicador.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name, value, **labels):
+        """
+        registrar un valor en un histograma.
+        """
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                counts = self._histograms[key] = [0] * (len(buckets) + 2)
+            counts[bisect_left(buckets, value)] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        """
+        devolver los valores actuales en un diccionario serializable a json.
+        """
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "written_at": time.time(),
+                "counters": [[name, labels, value] for (name, labels), value in self._counters.items()],
+                "gauges": [[name, labels, value] for (name, labels), value in self._gauges.items()],
+                "histograms": [[name, labels, list(counts)] for (name, labels), counts in self._histograms.items()],
+            }
+
+    def configure(self, directory, flush_interval=5.0):
+        """
+        indicar la carpeta compartida con los demas workers y cada cuanto escribir en ella.
+        """
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def on_tick(self, hook):
+        """
+        registrar una funcion que el hilo de escritura llama en cada vuelta (ej. el perfilador).
+        """
+        if hook not in self._tick_hooks:
+            self._tick_hooks.append(hook)
+
+    def ensure_flusher(self):
+        """
+        iniciar el hilo que escribe la copia de este worker, una vez por proceso.
+
+        se llama en cada solicitud: con gunicorn --preload la aplicacion se crea
+        antes del fork y el hilo del proceso padre no existe en los workers.
+        """
+        if self._flusher_pid == os.getpid() or not self.directory:
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        self.remove_stopped_servers()
+        threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True).start()
+
+    def server_directory(self):
+        """
+        devolver la carpeta que comparten los workers de este servidor.
+
+        se calcula en cada llamada: con gunicorn --preload la aplicacion se configura
+        en el maestro, pero las copias las escriben los workers, hijos del maestro.
+        """
+        return os.path.join(self.directory, f"server-{os.getppid()}")
+
+    def remove_stopped_servers(self):
+        """
+        borrar las carpetas de servidores anteriores cuyo proceso padre ya termino.
+        """
+        current = self.server_directory()
+        for path in glob.glob(os.path.join(self.directory, "server-*")):
+            try:
+                pid = int(os.path.basename(path)[len("server-"):])
+            except ValueError:
+                continue
+            if path != current and not _is_alive(pid):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _snapshot_path(self):
+        pid, path = self._snapshot_file
+        if pid != os.getpid():
+            # un id por proceso: un pid reutilizado no pisa la copia de un worker anterior
+            path = os.path.join(self.server_directory(), f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+            self._snapshot_file = (os.getpid(), path)
+        return path
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+            for hook in self._tick_hooks:
+                try:
+                    hook()
+                except Exception as e:
+                    logger.warning("fallo una tarea periodica de metricas: %s", e)
+
+    def flush(self):
+        """
+        escribir la copia de este worker en la carpeta compartida.
+        """
+        if not self.directory:
+            return
+        path = self._snapshot_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_json(path, self.snapshot())
+        except OSError as e:
+            logger.warning("no se pudieron escribir las metricas en %s: %s", self.directory, e)
+
+    def collect(self):
+        """
+        sumar los valores de todos los workers (incluido este, con sus valores actuales).
+
+        returns:
+            dict: {"counters", "gauges", "histograms"}: (nombre, etiquetas) -> valor,
+                  y "workers": cantidad de workers vivos.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory:
+            self.flush()
+            snapshots.extend(self._read_server_snapshots())
+
+        merged = {"counters": {}, "gauges": {}, "histograms": {}}
+        for snapshot in snapshots:
+            for kind in ("counters", "gauges"):
+                values = merged[kind]
+                for name, labels, value in snapshot[kind]:
+                    key = (name, tuple(map(tuple, labels)))
+                    values[key] = values.get(key, 0) + value
+            for name, labels, counts in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                total = merged["histograms"].get(key)
+                if total is None or len(total) != len(counts):
+                    merged["histograms"][key] = list(counts)
+                else:
+                    merged["histograms"][key] = [a + b for a, b in zip(total, counts)]
+        merged["workers"] = sum(1 for snapshot in snapshots if not snapshot.get("dead"))
+        return merged
+
+    def _is_running(self, snapshot):
+        """
+        indicar si la copia es de un worker que sigue corriendo: su proceso existe
+        y la actualizo hace poco (si no, el pid quedo libre y lo tomo otro proceso).
+        """
+        max_age = max(60.0, 10 * self.flush_interval)
+        return _is_alive(snapshot.get("pid")) and time.time() - snapshot.get("written_at", 0) <= max_age
+
+    def _read_server_snapshots(self):
+        """
+        leer las copias de los demas workers del servidor y acumular en retired.json
+        las de los workers que ya terminaron.
+
+        returns:
+            list: copias de los workers vivos y la acumulada de los terminados (marcada 'dead').
+        """
+        directory = self.server_directory()
+        if not os.path.isdir(directory):
+            return []
+        own_path = self._snapshot_path()
+        lock_file = None
+        if fcntl is not None:
+            # un solo worker a la vez acumula copias, asi ninguna se suma dos veces
+            lock_file = open(os.path.join(directory, "retired.lock"), "a+")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            retired_path = os.path.join(directory, "retired.json")
+            retired = _read_json(retired_path) or {"counters": [], "gauges": [], "histograms": []}
+            retired_count = 0
+            snapshots = []
+            for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+                if path == own_path:
+                    continue
+                snapshot = _read_json(path)
+                if snapshot is None:
+                    continue
+                if self._is_running(snapshot):
+                    snapshots.append(snapshot)
+                elif lock_file is not None:
+                    retired = _merge_retired(retired, snapshot)
+                    retired_count += 1
+                    os.remove(path)
+                else:
+                    snapshot["gauges"] = []
+                    snapshot["dead"] = True
+                    snapshots.append(snapshot)
+            if retired_count:
+                _write_json(retired_path, retired)
+        except OSError as e:
+            logger.warning("no se pudieron leer las metricas de %s: %s", directory, e)
+            return []
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+        retired["dead"] = True
+        return snapshots + [retired]
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _merge_retired(retired, snapshot):
+    """
+    sumar los contadores e histogramas de la copia de un worker terminado a la acumulada.
+    """
+    counters = {(name, tuple(map(tuple, labels))): value for name, labels, value in retired["counters"]}
+    for name, labels, value in snapshot["counters"]:
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    histograms = {(name, tuple(map(tuple, labels))): counts for name, labels, counts in retired["histograms"]}
+    for name, labels, counts in snapshot["histograms"]:
+        key = (name, tuple(map(tuple, labels)))
+        total = histograms.get(key)
+        histograms[key] = list(counts) if total is None or len(total) != len(counts) else [a + b for a, b in zip(total, counts)]
+    return {
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "gauges": [],
+        "histograms": [[name, labels, counts] for (name, labels), counts in histograms.items()],
+    }
+
+
+def _is_alive(pid):
+    """
+    indicar si existe el proceso pid (un worker que sigue corriendo).
+    """
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# metricas de este proceso: se usan tambien desde hilos sin contexto de aplicacion
+# (ej. las descargas en paralelo de openweather._fetch_missing)
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def timed(stage):
+    """
+    medir una etapa de /weather en el histograma weather_stage_seconds y, si esta
+    activo, en el encabezado Server-Timing de la solicitud en curso.
+
+    args:
+        stage (str): nombre de la etapa (ej. 'upstream_weather', 'group_forecast').
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        REGISTRY.observe("weather_stage_seconds", elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def start_request_timing(enabled):
+    """
+    empezar a juntar los tiempos por etapa de la solicitud actual.
+
+    returns:
+        dict: tiempos por etapa, o None si Server-Timing esta desactivado.
+    """
+    timings = {} if enabled else None
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings, total=None):
+    """
+    armar el valor del encabezado Server-Timing (duraciones en milisegundos).
+    """
+    parts = [f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _escape(value):
+    # escapar barra invertida, comillas y saltos de linea, como pide el formato de prometheus
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus(merged, extra_gauges=None):
+    """
+    convertir los valores sumados al formato de texto de prometheus (version 0.0.4).
+
+    args:
+        merged (dict): valores devueltos por MetricsRegistry.collect.
+        extra_gauges (dict, optional): (nombre, etiquetas) -> valor de indicadores que
+                                       no se suman por worker (ej. la cuota compartida).
+
+    returns:
+        str: texto listo para responder en /metrics.
+    """
+    gauges = dict(merged["gauges"])
+    gauges.update(extra_gauges or {})
+    gauges[("metrics_workers", ())] = merged["workers"]
+    series = {"counter": merged["counters"], "gauge": gauges, "histogram": merged["histograms"]}
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        values = sorted((labels, value) for (metric, labels), value in series[kind].items() if metric == name)
+        if not values:
+            continue
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in values:
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for limit, count in zip(list(buckets) + ["+Inf"], value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', limit)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _endpoint_label(req):
+    # la regla de la ruta (ej. '/weather'), no la url: evita una serie por cada ruta inexistente
+    return req.url_rule.rule if req.url_rule is not None else "no_route"
+
+
+def begin_request(req, config):
+    """
+    registrar el inicio de una solicitud: indicador de solicitudes en curso y tiempos por etapa.
+
+    returns:
+        tuple: (etiqueta del endpoint, instante de inicio) para finish_request y end_request.
+    """
+    REGISTRY.ensure_flusher()
+    endpoint = _endpoint_label(req)
+    REGISTRY.add("http_requests_in_flight", 1, endpoint=endpoint)
+    start_request_timing(config.get("SERVER_TIMING_ENABLED", False))
+    return endpoint, time.perf_counter()
+
+
+def finish_request(state, response):
+    """
+    registrar la respuesta de una solicitud y agregar Server-Timing si esta activo.
+    """
+    endpoint, started = state
+    elapsed = time.perf_counter() - started
+    REGISTRY.inc("http_requests_total", endpoint=endpoint, status=response.status_code)
+    REGISTRY.observe("http_request_duration_seconds", elapsed, endpoint=endpoint)
+    # las respuestas en streaming (ndjson) no tienen tamaño conocido; quart no define is_streamed
+    if not getattr(response, "is_streamed", False) and response.content_length is not None:
+        REGISTRY.observe("http_response_bytes", response.content_length, endpoint=endpoint)
+    timings = _request_timings.get()
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings, total=elapsed)
+    return response
+
+
+def end_request(state):
+    """
+    descontar la solicitud del indicador de solicitudes en curso (tambien si fallo).
+    """
+    REGISTRY.add("http_requests_in_flight", -1, endpoint=state[0])
+    _request_timings.set(None)
+
+
+def init_metrics(app):
+    """
+    registrar la medicion de solicitudes en la aplicacion y configurar la carpeta
+    compartida entre workers (METRICS_DIR).
+
+    args:
+        app (Flask): aplicacion donde registrar los hooks de cada solicitud.
+    """
+    from flask import g, request
+
+    REGISTRY.configure(app.config.get("METRICS_DIR"), app.config.get("METRICS_FLUSH_INTERVAL", 5.0))
+
+    @app.before_request
+    def metrics_before_request():
+        g._metrics = begin_request(request, app.config)
+
+    @app.after_request
+    def metrics_after_request(response):
+        state = g.get("_metrics")
+        return finish_request(state, response) if state else response
+
+    @app.teardown_request
+    def metrics_teardown_request(error=None):
+        state = g.pop("_metrics", None)
+        if state:
+            end_request(state)
+
+
+def prometheus_text():
+    """
+    armar el texto de /metrics con los valores de todos los workers y la cuota restante.
+
+    requiere el contexto de la aplicacion (para leer la cuota compartida).
+    """
+    from weather_app.services.quota import get_quota_governor
+
+    extra = {}
+    governor = get_quota_governor()
+    if governor is not None:
+        try:
+            for bucket, tokens in governor.remaining().items():
+                extra[("openweather_quota_remaining", (("bucket", bucket),))] = round(tokens, 2)
+        except sqlite3.Error as e:
+            logger.warning("no se pudo leer la cuota de openweathermap: %s", e)
+    return render_prometheus(REGISTRY.collect(), extra)
@@ -1,20 +1,51 @@
 # weather_app/services/openweather.py
 
+import contextvars
+import logging
+import sqlite3
+import threading
+from collections import namedtuple
+
 import requests
 from flask import current_app
 
 # importar clases de excepcion personalizadas
 from weather_app.exceptions.base import APIError
-from weather_app.exceptions.client_errors import NotFoundError, UnauthorizedError, BadRequestError
+from weather_app.exceptions.client_errors import NotFoundError, UnauthorizedError, BadRequestError, TooManyRequestsError
 # corregir la importacion: usar '..' para subir un nivel en la jerarquia de paquetes
-from weather_app.exceptions.server_errors import InternalServerError # importar error de servidor
+from weather_app.exceptions.server_errors import InternalServerError, ServiceUnavailableError # importar errores de servidor
+from weather_app.services.cache import get_weather_cache, make_cache_key, make_city_key, WEATHER, FORECAST
+from weather_app.services.circuit_breaker import get_circuit_breaker
+from weather_app.services.cities import get_city_index
+from weather_app.services.http_client import get_session, get_executor, get_refresh_executor, get_timeout
+from weather_app.services.json_provider import loads
+from weather_app.services.locations import get_city_locations
+from weather_app.services.metrics import REGISTRY, timed
+from weather_app.services.quota import get_quota_governor, INTERACTIVE, PREFETCH
+from weather_app.services.report_cache import get_report_cache
+from weather_app.services.singleflight import get_singleflight
+from weather_app.services.store import get_weather_store
+
+logger = logging.getLogger(__name__)
+
+# resultado de una consulta: datos de clima actual, pronostico, si alguno esta vencido,
+# el instante de descarga de cada uno ({tipo: instante unix}) y la clave de ciudad en cache
+WeatherBundle = namedtuple("WeatherBundle", ["weather", "forecast", "stale", "fetched_at", "city_key"])
+
+# ciudades con un refresco en segundo plano pendiente en este worker
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
 
-def get_weather_and_forecast(city):
+def get_weather_and_forecast(city, refresh=False, priority=INTERACTIVE, province=None):
     """
     obtener el clima actual y el pronostico de 5 dias.
 
     args:
         city (str): nombre de la ciudad.
+        refresh (bool): si es true, ignorar el cache y volver a descargar ambos datos.
+        priority (str): prioridad de las llamadas a openweathermap (ver quota.py).
+        province (str, optional): provincia de la ciudad, si el nombre se repite en varias.
 
     returns:
         tuple: datos de clima actual y pronostico.
@@ -22,61 +53,472 @@ def get_weather_and_forecast(city):
     raises:
         apierror: si ocurre error en llamadas a api openweathermap.
     """
-    api_key = current_app.config["OPENWEATHER_API_KEY"]
-    weather_url = current_app.config["WEATHER_URL"]
-    forecast_url = current_app.config["FORECAST_URL"]
+    bundle = fetch_weather_bundle(city, refresh=refresh, priority=priority, province=province)
+    return bundle.weather, bundle.forecast
+
+
+def bundle_from_entries(entries, stale, city_key):
+    """
+    armar un WeatherBundle a partir de las entradas de cache de cada tipo.
+    """
+    return WeatherBundle(
+        entries[WEATHER]["data"],
+        entries[FORECAST]["data"],
+        stale=stale,
+        fetched_at={kind: entries[kind]["stored_at"] for kind in (WEATHER, FORECAST)},
+        city_key=city_key,
+    )
+
+
+def fetch_weather_bundle(city, refresh=False, priority=INTERACTIVE, province=None):
+    """
+    obtener el clima actual y el pronostico de 5 dias, indicando si los datos estan vencidos.
+
+    si el cache solo tiene datos vencidos se devuelven de inmediato (stale=True)
+    y se refrescan en segundo plano, sin esperar a openweathermap. si se agoto la
+    cuota de llamadas se devuelven los ultimos datos guardados, aunque sean viejos.
+
+    args:
+        city (str): nombre de la ciudad.
+        refresh (bool): si es true, ignorar el cache y volver a descargar ambos datos.
+        priority (str): prioridad de las llamadas a openweathermap (ver quota.py).
+        province (str, optional): provincia de la ciudad, si el nombre se repite en varias.
+
+    returns:
+        WeatherBundle: datos de clima actual, pronostico, marca de datos vencidos,
+                       instante de descarga de cada respuesta y clave de ciudad.
 
-    params = {
-        "q": city,
-        "appid": api_key,
-        "units": "metric",
-        "lang": "es",
+    raises:
+        apierror: si ocurre error en llamadas a api openweathermap y no hay datos vencidos.
+    """
+    units = current_app.config.get("OPENWEATHER_UNITS", "metric")
+    lang = current_app.config.get("OPENWEATHER_LANG", "es")
+    cache = get_weather_cache()
+    # las ciudades listadas se identifican por provincia y nombre
+    province = city_province(city, province)
+    # las ciudades con id conocido se guardan por id, no por nombre
+    key = get_city_locations().cache_name(city, province)
+    city_key = make_city_key(key, units, lang)
+
+    if refresh:
+        entries = _load(cache, {WEATHER: None, FORECAST: None}, city, key, units, lang, priority, province)
+        return bundle_from_entries(entries, stale=False, city_key=city_key)
+
+    entries = {kind: cache.get_entry(kind, key, units, lang) for kind in (WEATHER, FORECAST)}
+    if entries[WEATHER] is not None and entries[FORECAST] is not None:
+        return bundle_from_entries(entries, stale=False, city_key=city_key)
+
+    # leer del almacen persistente lo que falte (ej. descargado por otro worker o antes de un reinicio)
+    if load_from_store(cache, entries, key, units, lang):
+        if entries[WEATHER] is not None and entries[FORECAST] is not None:
+            return bundle_from_entries(entries, stale=False, city_key=city_key)
+
+    # completar con datos vencidos lo que no este vigente
+    stale = {
+        kind: entries[kind] if entries[kind] is not None else cache.get_stale_entry(kind, key, units, lang)
+        for kind in (WEATHER, FORECAST)
     }
+    if stale[WEATHER] is not None and stale[FORECAST] is not None:
+        # servir los datos vencidos ya y refrescarlos sin bloquear la solicitud
+        refresh_in_background(cache, city, key, units, lang, province)
+        cache.record_stale_served()
+        return bundle_from_entries(stale, stale=True, city_key=city_key)
 
-    # --- logica para solicitud de clima actual ---
     try:
-        weather_res = requests.get(weather_url, params=params, timeout=10)
-        weather_res.raise_for_status()
-        weather_res.encoding = 'utf-8'
-        weather_data = weather_res.json()
-    except requests.exceptions.HTTPError as e:
-        status_code = e.response.status_code
-        if status_code == 401:
-            raise UnauthorizedError("clave de api openweathermap invalida o faltante.")
-        elif status_code == 404:
-            raise NotFoundError(f"ciudad '{city}' no encontrada por servicio de clima.")
-        elif status_code == 400:
-            raise BadRequestError("solicitud de clima incorrecta a openweathermap.")
-        else:
-            raise InternalServerError(f"error de servicio de clima externo: {status_code} - {e.response.text}")
-    except requests.exceptions.ConnectionError:
-        raise APIError("no poder conectar al servicio de clima. verificar conexion a internet.", status_code=503)
-    except requests.exceptions.Timeout:
-        raise APIError("servicio de clima tardar demasiado en responder.", status_code=504)
-    except requests.exceptions.RequestException as e:
-        raise InternalServerError(f"error inesperado al comunicar con servicio de clima: {e}")
-
-    # --- logica para solicitud de pronostico ---
+        loaded = _load(cache, entries, city, key, units, lang, priority, province)
+    except TooManyRequestsError:
+        # sin cuota: servir lo ultimo que se haya guardado antes que fallar
+        fallback = degraded_entries(cache, entries, key, units, lang)
+        if fallback is None:
+            raise
+        cache.record_stale_served()
+        return bundle_from_entries(fallback, stale=True, city_key=city_key)
+    return bundle_from_entries(loaded, stale=False, city_key=city_key)
+
+
+def city_province(city, province=None):
+    """
+    devolver la provincia de una ciudad listada (la indicada si la lista), o None
+    si la ciudad no esta en cities_by_province.json.
+    """
     try:
-        forecast_res = requests.get(forecast_url, params=params, timeout=10)
-        forecast_res.raise_for_status()
-        forecast_res.encoding = 'utf-8'
-        forecast_data = forecast_res.json()
-    except requests.exceptions.HTTPError as e:
-        status_code = e.response.status_code
-        if status_code == 401:
-            raise UnauthorizedError("clave de api openweathermap invalida o faltante para pronostico.")
-        elif status_code == 404:
-            raise NotFoundError(f"pronostico para ciudad '{city}' no encontrado por servicio de clima.")
-        elif status_code == 400:
-            raise BadRequestError("solicitud de pronostico incorrecta a openweathermap.")
-        else:
-            raise InternalServerError(f"error de servicio de pronostico externo: {status_code} - {e.response.text}")
-    except requests.exceptions.ConnectionError:
-        raise APIError("no poder conectar al servicio de pronostico. verificar conexion a internet.", status_code=503)
-    except requests.exceptions.Timeout:
-        raise APIError("servicio de pronostico tardar demasiado en responder.", status_code=504)
-    except requests.exceptions.RequestException as e:
-        raise InternalServerError(f"error inesperado al comunicar con servicio de pronostico: {e}")
-
-    return weather_data, forecast_data
\ No newline at end of file
+        return get_city_index().city_province(city, province)
+    except InternalServerError:
+        # sin datos de ciudades se consulta solo por nombre
+        return None
+
+
+def degraded_entries(cache, entries, key, units, lang):
+    """
+    completar las entradas que faltan con datos vencidos del cache o, si ya no
+    estan, con la ultima respuesta del almacen dentro de su retencion.
+
+    returns:
+        dict: entradas {"data", "stored_at"} de ambos tipos, o None si falta alguna.
+    """
+    store = get_weather_store()
+    city_key = make_city_key(key, units, lang)
+    fallback = {}
+    for kind in (WEATHER, FORECAST):
+        entry = entries[kind] or cache.get_stale_entry(kind, key, units, lang)
+        if entry is None and store is not None:
+            try:
+                found = store.latest(city_key, kind, store.retention_seconds)
+            except sqlite3.Error as e:
+                logger.warning("no se pudo leer el almacen de clima: %s", e)
+                found = None
+            if found is not None:
+                entry = {"data": found[0], "stored_at": found[1]}
+        if entry is None:
+            return None
+        fallback[kind] = entry
+    return fallback
+
+
+def load_from_store(cache, entries, key, units, lang):
+    """
+    copiar al cache (y a entries) las respuestas vigentes del almacen persistente que falten.
+
+    returns:
+        bool: true si se copio alguna respuesta.
+    """
+    store = get_weather_store()
+    if store is None:
+        return False
+
+    city_key = make_city_key(key, units, lang)
+    loaded = False
+    for kind in (WEATHER, FORECAST):
+        if entries[kind] is not None:
+            continue
+        try:
+            found = store.latest(city_key, kind, cache.max_age(kind))
+        except sqlite3.Error as e:
+            logger.warning("no se pudo leer el almacen de clima: %s", e)
+            return loaded
+        if found is not None:
+            payload, fetched_at = found
+            entry = cache.set_by_key(kind, city_key, payload, stored_at=fetched_at)
+            if cache.freshness(kind, fetched_at) > 0:
+                entries[kind] = entry
+            loaded = True
+    return loaded
+
+
+def remember_response(cache, store, kind, city, units, lang, value, stored_at=None):
+    """
+    guardar una respuesta recien descargada en el cache y en el almacen persistente.
+
+    returns:
+        dict: la entrada de cache {"data", "stored_at"}.
+    """
+    entry = cache.set(kind, city, units, lang, value, stored_at=stored_at)
+    if store is not None:
+        try:
+            store.put(make_city_key(city, units, lang), kind, value, fetched_at=entry["stored_at"])
+        except sqlite3.Error as e:
+            # el almacen es una optimizacion: no fallar la solicitud si no se puede escribir
+            logger.warning("no se pudo escribir el almacen de clima: %s", e)
+    return entry
+
+
+def upstream_params(city, units, lang, province=None):
+    """
+    armar los parametros de la solicitud a openweathermap para una ciudad.
+
+    args:
+        province (str, optional): provincia de la ciudad listada (ver city_province).
+
+    returns:
+        dict: ubicacion (id, coordenadas o nombre), clave de api, unidades e idioma.
+    """
+    return {
+        # consultar por id o coordenadas si la ciudad ya esta resuelta, si no por nombre
+        **get_city_locations().query_params(city, province),
+        "appid": current_app.config["OPENWEATHER_API_KEY"],
+        "units": units,
+        "lang": lang,
+    }
+
+
+def remember_fetch(cache, entries, params, fetched, city, key, units, lang, province=None):
+    """
+    registrar una descarga exitosa: descartar el reporte armado con los datos
+    anteriores y, si se consulto por nombre, aprender el id de la ciudad.
+
+    args:
+        entries (dict): entradas que habia antes de descargar (None si faltaban).
+        params (dict): parametros con que se consulto a openweathermap.
+        fetched (dict): entradas descargadas de clima actual y pronostico.
+        province (str, optional): provincia de la ciudad listada.
+    """
+    get_report_cache().invalidate(make_city_key(key, units, lang))
+    if "q" in params and entries[WEATHER] is None:
+        # recordar el id y las coordenadas para las proximas consultas
+        locations = get_city_locations()
+        locations.learn(city, fetched[WEATHER]["data"], province)
+        id_key = locations.cache_name(city, province)
+        if id_key != key:
+            # guardar tambien bajo el id, que es la clave que usan desde ahora
+            # las proximas consultas de este y de los demas workers
+            store = get_weather_store()
+            for kind, entry in fetched.items():
+                remember_response(cache, store, kind, id_key, units, lang, entry["data"], stored_at=entry["stored_at"])
+
+
+def _load(cache, entries, city, key, units, lang, priority=INTERACTIVE, province=None):
+    """
+    descargar lo que falta de openweathermap, agrupando solicitudes concurrentes
+    de la misma ciudad y respetando el circuito y la cuota de llamadas.
+
+    args:
+        entries (dict): entradas de cache vigentes por tipo (None si faltan).
+        city (str): nombre de la ciudad, usado para resolver su ubicacion y en mensajes.
+        key (str): nombre con el que se guarda en cache (ver CityLocations.cache_name).
+        priority (str): prioridad de las llamadas ante la cuota (ver quota.py).
+        province (str, optional): provincia de la ciudad listada.
+
+    returns:
+        dict: entradas {"data", "stored_at"} de clima actual y pronostico.
+
+    raises:
+        toomanyrequestserror: si no queda cuota de llamadas para esta prioridad.
+    """
+    params = upstream_params(city, units, lang, province)
+    calls = sum(1 for kind in (WEATHER, FORECAST) if entries[kind] is None)
+
+    def guarded_fetch():
+        breaker = get_circuit_breaker()
+        if not breaker.allow():
+            raise ServiceUnavailableError("servicio de clima no disponible temporalmente. reintentar en unos segundos.")
+        governor = get_quota_governor()
+        if governor is not None and not governor.acquire(calls, priority):
+            breaker.release_probe()
+            raise quota_exceeded_error(governor, calls, priority)
+        try:
+            fetched = _fetch_missing(cache, entries, params, city, key, units, lang)
+        except APIError as e:
+            record_upstream_error(breaker, governor, e)
+            raise
+        except Exception:
+            # una respuesta ilegible tambien es una falla del servicio; sin
+            # registrarla, una prueba del circuito semiabierto quedaria tomada
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        remember_fetch(cache, entries, params, fetched, city, key, units, lang, province)
+        return fetched
+
+    # agrupar solicitudes concurrentes de la misma ciudad en una sola descarga
+    flight_key = make_cache_key("upstream", key, units, lang)
+    return get_singleflight().do(flight_key, guarded_fetch)
+
+
+def quota_exceeded_error(governor, calls, priority):
+    """
+    crear el apierror (429) para una llamada que no obtuvo cuota.
+    """
+    retry_after = governor.retry_after(calls, priority)
+    return TooManyRequestsError(
+        f"cuota de llamadas a openweathermap agotada. reintentar en {retry_after} segundos.",
+        payload={"retry_after": retry_after},
+    )
+
+
+def record_upstream_error(breaker, governor, error):
+    """
+    registrar en el circuito y en la cuota una llamada a openweathermap que fallo.
+    """
+    # solo los errores del servicio (5xx, conexion, timeout) cuentan como falla;
+    # un 4xx significa que openweathermap respondio
+    if error.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    if error.status_code == 429 and governor is not None:
+        # openweathermap ya corto la clave: frenar a todos los workers
+        governor.exhaust()
+
+
+def refresh_in_background(cache, city, key, units, lang, province=None):
+    """
+    programar un refresco de la ciudad en segundo plano, uno por ciudad a la vez.
+
+    el refresco tiene prioridad PREFETCH: si falta cuota se descarta y se siguen
+    sirviendo los datos vencidos.
+    """
+    refresh_key = make_cache_key("refresh", key, units, lang)
+    with _refreshing_lock:
+        if refresh_key in _refreshing:
+            return
+        _refreshing.add(refresh_key)
+
+    app = current_app._get_current_object()
+
+    def task():
+        try:
+            with app.app_context():
+                entries = {kind: cache.get_entry(kind, key, units, lang) for kind in (WEATHER, FORECAST)}
+                if entries[WEATHER] is None or entries[FORECAST] is None:
+                    _load(cache, entries, city, key, units, lang, PREFETCH, province)
+        except APIError:
+            # el error ya quedo registrado en el circuito o la cuota; se seguiran sirviendo datos vencidos
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(refresh_key)
+
+    get_refresh_executor(app.config).submit(task)
+
+
+def _fetch_missing(cache, entries, params, city, key, units, lang):
+    """
+    descargar de openweathermap las respuestas que no estan en cache.
+
+    args:
+        cache (WeatherCache): cache donde guardar las respuestas nuevas (tambien se
+                              guardan en el almacen persistente si esta habilitado).
+        entries (dict): entradas de cache ya disponibles por tipo (None si faltan).
+        params (dict): parametros de la solicitud a openweathermap.
+        city (str): nombre de la ciudad, usado en los mensajes de error.
+        key (str): nombre con el que se guardan las respuestas en cache y almacen.
+        units (str): sistema de unidades.
+        lang (str): idioma.
+
+    returns:
+        dict: entradas {"data", "stored_at"} completas de clima actual y pronostico.
+
+    raises:
+        apierror: si ocurre error en llamadas a api openweathermap. si fallan ambas
+                  solicitudes se lanza el error del clima actual.
+    """
+    entries = dict(entries)
+    store = get_weather_store()
+    session = get_session(current_app.config)
+    timeout = get_timeout(current_app.config)
+
+    # url de cada tipo de solicitud
+    urls = {
+        WEATHER: current_app.config["WEATHER_URL"],
+        FORECAST: current_app.config["FORECAST_URL"],
+    }
+    missing = [kind for kind in urls if entries[kind] is None]
+
+    def fetch_and_remember(kind):
+        # guardar cada respuesta exitosa apenas llega, aunque la otra falle
+        value = _fetch_upstream(kind, session, urls[kind], params, city, timeout)
+        return remember_response(cache, store, kind, key, units, lang, value)
+
+    if len(missing) == 1:
+        # una sola solicitud: hacerla en el hilo actual
+        entries[missing[0]] = fetch_and_remember(missing[0])
+    elif missing:
+        # clima actual y pronostico en paralelo sobre la misma sesion
+        executor = get_executor(current_app.config)
+        # copiar el contexto para que los tiempos lleguen al Server-Timing de la solicitud
+        futures = {kind: executor.submit(contextvars.copy_context().run, fetch_and_remember, kind) for kind in missing}
+
+        # revisar en orden fijo (clima actual primero): si fallan ambas, el error
+        # devuelto no depende de cual respondio antes
+        for i, kind in enumerate(missing):
+            error = futures[kind].exception()
+            if error is not None:
+                # no iniciar las solicitudes que sigan esperando en el pool
+                for later in missing[i + 1:]:
+                    futures[later].cancel()
+                raise error
+            entries[kind] = futures[kind].result()
+
+    return entries
+
+
+# nombre de cada servicio de openweathermap en los mensajes de error
+_SERVICE_NAMES = {WEATHER: "clima", FORECAST: "pronostico"}
+
+
+def upstream_http_error(kind, status_code, city, text):
+    """
+    convertir una respuesta de error de openweathermap en el apierror correspondiente.
+
+    args:
+        kind (str): tipo de solicitud ('weather' o 'forecast').
+        status_code (int): codigo http de la respuesta.
+        city (str): nombre de la ciudad, usado en el mensaje.
+        text (str): cuerpo de la respuesta, incluido en los errores inesperados.
+
+    returns:
+        APIError: error listo para lanzar.
+    """
+    service = _SERVICE_NAMES[kind]
+    if status_code == 401:
+        detail = "" if kind == WEATHER else " para pronostico"
+        return UnauthorizedError(f"clave de api openweathermap invalida o faltante{detail}.")
+    elif status_code == 404:
+        if kind == WEATHER:
+            return NotFoundError(f"ciudad '{city}' no encontrada por servicio de clima.")
+        return NotFoundError(f"pronostico para ciudad '{city}' no encontrado por servicio de clima.")
+    elif status_code == 400:
+        return BadRequestError(f"solicitud de {service} incorrecta a openweathermap.")
+    elif status_code == 429:
+        return TooManyRequestsError(f"openweathermap rechazo la solicitud de {service}: limite de llamadas de la clave superado.")
+    return InternalServerError(f"error de servicio de {service} externo: {status_code} - {text}")
+
+
+def upstream_connection_error(kind):
+    """
+    crear el apierror (503) para una falla de conexion con openweathermap.
+    """
+    return APIError(f"no poder conectar al servicio de {_SERVICE_NAMES[kind]}. verificar conexion a internet.", status_code=503)
+
+
+def upstream_timeout_error(kind):
+    """
+    crear el apierror (504) para una solicitud a openweathermap que tardo demasiado.
+    """
+    return APIError(f"servicio de {_SERVICE_NAMES[kind]} tardar demasiado en responder.", status_code=504)
+
+
+def upstream_unexpected_error(kind, error):
+    """
+    crear el apierror (500) para cualquier otra falla de la solicitud a openweathermap.
+    """
+    return InternalServerError(f"error inesperado al comunicar con servicio de {_SERVICE_NAMES[kind]}: {error}")
+
+
+def count_upstream_response(kind, outcome, size=None):
+    """
+    contar una respuesta de openweathermap en las metricas.
+
+    args:
+        kind (str): tipo de solicitud ('weather' o 'forecast').
+        outcome (int or str): codigo http, o 'connection_error', 'timeout' o 'error'.
+        size (int, optional): bytes del cuerpo recibido.
+    """
+    REGISTRY.inc("openweather_responses_total", kind=kind, status=outcome)
+    if size is not None:
+        REGISTRY.observe("openweather_response_bytes", size, kind=kind)
+
+
+def _fetch_upstream(kind, session, url, params, city, timeout):
+    """
+    solicitar el clima actual o el pronostico de 5 dias a openweathermap y mapear errores a apierror.
+    """
+    res = None
+    with timed(f"upstream_{kind}"):
+        try:
+            res = session.get(url, params=params, timeout=timeout)
+            count_upstream_response(kind, res.status_code, len(res.content))
+            res.raise_for_status()
+            return loads(res.content)
+        except requests.exceptions.HTTPError as e:
+            raise upstream_http_error(kind, e.response.status_code, city, e.response.text)
+        except requests.exceptions.ConnectionError:
+            count_upstream_response(kind, "connection_error")
+            raise upstream_connection_error(kind)
+        except requests.exceptions.Timeout:
+            count_upstream_response(kind, "timeout")
+            raise upstream_timeout_error(kind)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if res is None:
+                count_upstream_response(kind, "error")
+            raise upstream_unexpected_error(kind, e)
@@ -0,0 +1,228 @@
+# weather_app/services/openweather_async.py
+
+import asyncio
+
+import aiohttp
+from flask import current_app
+
+from weather_app.exceptions.base import APIError
+from weather_app.exceptions.client_errors import TooManyRequestsError # importar error de cliente
+from weather_app.exceptions.server_errors import ServiceUnavailableError # importar error de servidor
+from weather_app.services.cache import get_weather_cache, make_cache_key, make_city_key, WEATHER, FORECAST
+from weather_app.services.circuit_breaker import get_circuit_breaker
+from weather_app.services.http_client import get_async_client
+from weather_app.services.json_provider import loads
+from weather_app.services.locations import get_city_locations
+from weather_app.services.openweather import (
+    bundle_from_entries, city_province, count_upstream_response, degraded_entries, load_from_store, quota_exceeded_error, record_upstream_error,
+    refresh_in_background, remember_fetch, remember_response, upstream_params, upstream_http_error,
+    upstream_connection_error, upstream_timeout_error, upstream_unexpected_error,
+)
+from weather_app.services.metrics import timed
+from weather_app.services.quota import get_quota_governor, INTERACTIVE
+from weather_app.services.singleflight import get_async_singleflight
+from weather_app.services.store import get_weather_store
+
+# version asincrona (modo asgi) de openweather.py: misma logica de cache, almacen,
+# circuito y agrupacion de solicitudes, pero las descargas usan aiohttp sobre el
+# event loop en lugar de ocupar un hilo por solicitud. las lecturas y escrituras
+# de sqlite se hacen en un hilo aparte para no bloquear el loop.
+
+
+async def get_weather_and_forecast_async(city, refresh=False, priority=INTERACTIVE, province=None):
+    """
+    obtener el clima actual y el pronostico de 5 dias.
+
+    args:
+        city (str): nombre de la ciudad.
+        refresh (bool): si es true, ignorar el cache y volver a descargar ambos datos.
+        priority (str): prioridad de las llamadas a openweathermap (ver quota.py).
+        province (str, optional): provincia de la ciudad, si el nombre se repite en varias.
+
+    returns:
+        tuple: datos de clima actual y pronostico.
+
+    raises:
+        apierror: si ocurre error en llamadas a api openweathermap.
+    """
+    bundle = await fetch_weather_bundle_async(city, refresh=refresh, priority=priority, province=province)
+    return bundle.weather, bundle.forecast
+
+
+async def fetch_weather_bundle_async(city, refresh=False, priority=INTERACTIVE, province=None):
+    """
+    obtener el clima actual y el pronostico de 5 dias, indicando si los datos estan vencidos.
+
+    ver openweather.fetch_weather_bundle; los datos vencidos se refrescan con el
+    mismo pool de hilos de segundo plano que el modo sincrono.
+
+    returns:
+        WeatherBundle: datos de clima actual, pronostico, marca de datos vencidos,
+                       instante de descarga de cada respuesta y clave de ciudad.
+
+    raises:
+        apierror: si ocurre error en llamadas a api openweathermap y no hay datos vencidos.
+    """
+    units = current_app.config.get("OPENWEATHER_UNITS", "metric")
+    lang = current_app.config.get("OPENWEATHER_LANG", "es")
+    cache = get_weather_cache()
+    # las ciudades listadas se identifican por provincia y nombre
+    province = city_province(city, province)
+    # las ciudades con id conocido se guardan por id, no por nombre
+    key = get_city_locations().cache_name(city, province)
+    city_key = make_city_key(key, units, lang)
+
+    if refresh:
+        entries = await _load(cache, {WEATHER: None, FORECAST: None}, city, key, units, lang, priority, province)
+        return bundle_from_entries(entries, stale=False, city_key=city_key)
+
+    entries = {kind: cache.get_entry(kind, key, units, lang) for kind in (WEATHER, FORECAST)}
+    if entries[WEATHER] is not None and entries[FORECAST] is not None:
+        return bundle_from_entries(entries, stale=False, city_key=city_key)
+
+    # leer del almacen persistente lo que falte (ej. descargado por otro worker o antes de un reinicio)
+    if await asyncio.to_thread(load_from_store, cache, entries, key, units, lang):
+        if entries[WEATHER] is not None and entries[FORECAST] is not None:
+            return bundle_from_entries(entries, stale=False, city_key=city_key)
+
+    # completar con datos vencidos lo que no este vigente
+    stale = {
+        kind: entries[kind] if entries[kind] is not None else cache.get_stale_entry(kind, key, units, lang)
+        for kind in (WEATHER, FORECAST)
+    }
+    if stale[WEATHER] is not None and stale[FORECAST] is not None:
+        # servir los datos vencidos ya y refrescarlos sin bloquear la solicitud
+        refresh_in_background(cache, city, key, units, lang, province)
+        cache.record_stale_served()
+        return bundle_from_entries(stale, stale=True, city_key=city_key)
+
+    try:
+        loaded = await _load(cache, entries, city, key, units, lang, priority, province)
+    except TooManyRequestsError:
+        # sin cuota: servir lo ultimo que se haya guardado antes que fallar
+        fallback = await asyncio.to_thread(degraded_entries, cache, entries, key, units, lang)
+        if fallback is None:
+            raise
+        cache.record_stale_served()
+        return bundle_from_entries(fallback, stale=True, city_key=city_key)
+    return bundle_from_entries(loaded, stale=False, city_key=city_key)
+
+
+async def _load(cache, entries, city, key, units, lang, priority=INTERACTIVE, province=None):
+    """
+    descargar lo que falta de openweathermap, agrupando corrutinas concurrentes
+    de la misma ciudad y respetando el circuito y la cuota de llamadas.
+
+    returns:
+        dict: entradas {"data", "stored_at"} de clima actual y pronostico.
+
+    raises:
+        toomanyrequestserror: si no queda cuota de llamadas para esta prioridad.
+    """
+    params = upstream_params(city, units, lang, province)
+    calls = sum(1 for kind in (WEATHER, FORECAST) if entries[kind] is None)
+
+    async def guarded_fetch():
+        breaker = get_circuit_breaker()
+        if not breaker.allow():
+            raise ServiceUnavailableError("servicio de clima no disponible temporalmente. reintentar en unos segundos.")
+        governor = get_quota_governor()
+        if governor is not None and not await governor.acquire_async(calls, priority):
+            breaker.release_probe()
+            raise await asyncio.to_thread(quota_exceeded_error, governor, calls, priority)
+        try:
+            fetched = await _fetch_missing(cache, entries, params, city, key, units, lang)
+        except APIError as e:
+            await asyncio.to_thread(record_upstream_error, breaker, governor, e)
+            raise
+        except asyncio.CancelledError:
+            # la solicitud se cancelo sin respuesta: liberar la prueba del circuito
+            breaker.release_probe()
+            raise
+        except Exception:
+            # una respuesta ilegible tambien es una falla del servicio; sin
+            # registrarla, una prueba del circuito semiabierto quedaria tomada
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        await asyncio.to_thread(remember_fetch, cache, entries, params, fetched, city, key, units, lang, province)
+        return fetched
+
+    # agrupar solicitudes concurrentes de la misma ciudad en una sola descarga
+    flight_key = make_cache_key("upstream", key, units, lang)
+    return await get_async_singleflight().do(flight_key, guarded_fetch)
+
+
+async def _fetch_missing(cache, entries, params, city, key, units, lang):
+    """
+    descargar en paralelo las respuestas que no estan en cache.
+
+    si falla el clima actual se cancela el pronostico y se lanza su error; si
+    falla el pronostico se espera al clima actual, para que con ambas fallidas
+    el error sea siempre el del clima actual y no el de la que respondio antes.
+
+    returns:
+        dict: entradas {"data", "stored_at"} completas de clima actual y pronostico.
+
+    raises:
+        apierror: si ocurre error en llamadas a api openweathermap.
+    """
+    entries = dict(entries)
+    store = get_weather_store()
+    client = get_async_client(current_app.config)
+
+    # url de cada tipo de solicitud
+    urls = {
+        WEATHER: current_app.config["WEATHER_URL"],
+        FORECAST: current_app.config["FORECAST_URL"],
+    }
+
+    async def fetch_and_remember(kind):
+        # guardar cada respuesta exitosa apenas llega, aunque la otra falle
+        value = await _fetch_upstream(kind, client, urls[kind], params, city)
+        return await asyncio.to_thread(remember_response, cache, store, kind, key, units, lang, value)
+
+    tasks = {kind: asyncio.ensure_future(fetch_and_remember(kind)) for kind in urls if entries[kind] is None}
+    if not tasks:
+        return entries
+
+    kinds = list(tasks) # clima actual primero
+    for i, kind in enumerate(kinds):
+        await asyncio.wait([tasks[kind]])
+        error = tasks[kind].exception()
+        if error is not None:
+            # no esperar las solicitudes siguientes
+            for later in kinds[i + 1:]:
+                tasks[later].cancel()
+            raise error
+        entries[kind] = tasks[kind].result()
+    return entries
+
+
+async def _fetch_upstream(kind, client, url, params, city):
+    """
+    solicitar el clima actual o el pronostico a openweathermap y mapear errores a apierror.
+    """
+    body = None
+    with timed(f"upstream_{kind}"):
+        try:
+            async with client.get(url, params=params) as res:
+                body = await res.read()
+                count_upstream_response(kind, res.status, len(body))
+                if res.status >= 400:
+                    raise upstream_http_error(kind, res.status, city, body.decode("utf-8", errors="replace"))
+                return loads(body)
+        except aiohttp.ConnectionTimeoutError:
+            # igual que requests: no poder conectar a tiempo es un error de conexion
+            count_upstream_response(kind, "connection_error")
+            raise upstream_connection_error(kind)
+        except asyncio.TimeoutError:
+            count_upstream_response(kind, "timeout")
+            raise upstream_timeout_error(kind)
+        except aiohttp.ClientConnectionError:
+            count_upstream_response(kind, "connection_error")
+            raise upstream_connection_error(kind)
+        except (aiohttp.ClientError, ValueError) as e:
+            if body is None:
+                count_upstream_response(kind, "error")
+            raise upstream_unexpected_error(kind, e)
@@ -0,0 +1,289 @@
+# weather_app/services/prewarmer.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+try:
+    import fcntl # bloqueo de archivos, disponible solo en sistemas unix
+except ImportError:
+    fcntl = None
+
+from weather_app.exceptions.base import APIError
+from weather_app.exceptions.client_errors import TooManyRequestsError # importar error de cliente
+from weather_app.services.locations import location_key
+from weather_app.services.openweather import city_province, get_weather_and_forecast
+from weather_app.services.quota import PREFETCH
+from weather_app.services.store import get_weather_store, RECENT_REQUESTS_MAX
+
+logger = logging.getLogger(__name__)
+
+# cada refresco de una ciudad consume dos llamadas: clima actual y pronostico
+CALLS_PER_REFRESH = 2
+
+# ciudades pedidas recientemente por usuarios en este worker:
+# clave de location_key -> (nombre, provincia, instante monotonic en que se guardo en el almacen)
+_recent = OrderedDict()
+_recent_lock = threading.Lock()
+# segundos minimos entre dos escrituras de la misma ciudad en el almacen, por worker
+_NOTE_INTERVAL = 60.0
+
+
+def note_city_request(city, province=None):
+    """
+    registrar que un usuario pidio el clima de una ciudad.
+
+    el precalentador refresca estas ciudades despues de las ciudades por defecto.
+    los pedidos se guardan en el almacen compartido, asi el worker lider ve los
+    de todos los workers; cada worker escribe una misma ciudad como maximo una vez
+    por _NOTE_INTERVAL. sin almacen solo se recuerdan en este worker.
+
+    requiere el contexto de la aplicacion.
+    """
+    city = city.strip()
+    province = city_province(city, province)
+    key = location_key(city, province)
+    now = time.monotonic()
+    with _recent_lock:
+        previous = _recent.pop(key, None)
+        write = previous is None or now - previous[2] >= _NOTE_INTERVAL
+        _recent[key] = (city, province, now if write else previous[2])
+        while len(_recent) > RECENT_REQUESTS_MAX:
+            _recent.popitem(last=False)
+    if not write:
+        return
+
+    store = get_weather_store()
+    if store is not None:
+        try:
+            store.note_request(key, city, province)
+        except sqlite3.Error as e:
+            logger.warning("no se pudo registrar el pedido de '%s': %s", city, e)
+
+
+def _recent_cities():
+    """
+    devolver las ciudades pedidas recientemente, las mas recientes primero.
+
+    returns:
+        list: tuplas (ciudad, provincia) pedidas en todos los workers si hay
+              almacen, o solo en este worker si no.
+    """
+    store = get_weather_store()
+    if store is not None:
+        try:
+            return store.recent_requests(RECENT_REQUESTS_MAX)
+        except sqlite3.Error as e:
+            logger.warning("no se pudieron leer las ciudades pedidas: %s", e)
+    with _recent_lock:
+        return [(city, province) for city, province, _ in reversed(_recent.values())]
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class Prewarmer:
+    """
+    hilo de fondo que mantiene en cache el clima de las ciudades conocidas.
+
+    en cada ciclo refresca, en orden de prioridad, las ciudades por defecto de
+    cada provincia, luego las pedidas recientemente y, si se configura, el resto
+    de las ciudades listadas. el ritmo de llamadas se limita a una fraccion de la
+    cuota por minuto de openweathermap, y sus llamadas tienen prioridad PREFETCH:
+    si el gobernador de cuota las descarta, la ciudad se saltea hasta el proximo ciclo.
+
+    con varios workers de gunicorn solo corre en el que obtiene el bloqueo del
+    archivo PREWARM_LOCK_PATH; los demas reintentan en cada ciclo por si el
+    lider se recicla. el estado del ultimo ciclo se escribe junto al bloqueo
+    para que cualquier worker pueda informarlo.
+    """
+    def __init__(self, app, cities_data):
+        config = app.config
+        self.app = app
+        self.cities_data = cities_data
+        self.interval = config.get("PREWARM_INTERVAL", 480) # segundos entre ciclos
+        self.include_all = config.get("PREWARM_ALL_CITIES", False)
+        self.lock_path = config.get("PREWARM_LOCK_PATH")
+        self.status_path = f"{self.lock_path}.json" if self.lock_path else None
+
+        # calcular la separacion minima entre llamadas segun la fraccion de cuota asignada
+        calls_per_minute = config.get("OPENWEATHER_CALLS_PER_MINUTE", 60) * config.get("PREWARM_QUOTA_SHARE", 0.2)
+        self.seconds_per_call = 60.0 / max(calls_per_minute, 0.001)
+
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.status = {
+            "is_leader": False,
+            "running": False,
+            "last_run_started": None,
+            "last_run_finished": None,
+            "last_run_seconds": None,
+            "refreshed": 0,
+            "failed": 0,
+            "shed": 0,
+            "last_error": None,
+            "calls_per_minute_budget": round(60.0 / self.seconds_per_call, 2),
+        }
+
+    def start(self):
+        """
+        iniciar el hilo de fondo (una sola vez por proceso).
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prewarmer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        pedir al hilo de fondo que termine despues de la ciudad en curso.
+        """
+        self._stop.set()
+
+    def priority_cities(self):
+        """
+        devolver la lista de ciudades a refrescar, sin repetidos y en orden de prioridad.
+
+        requiere el contexto de la aplicacion (lee los pedidos recientes del almacen).
+
+        returns:
+            list: tuplas (ciudad, provincia).
+        """
+        defaults, others = [], []
+        for province, cities in self.cities_data.items():
+            for city in cities:
+                (defaults if city.get("default") else others).append((city["name"], province))
+
+        ordered = defaults + _recent_cities()
+        if self.include_all:
+            ordered += others
+
+        seen, result = set(), []
+        for name, province in ordered:
+            key = location_key(name, province)
+            if key not in seen:
+                seen.add(key)
+                result.append((name, province))
+        return result
+
+    def _acquire_leadership(self):
+        """
+        intentar obtener el bloqueo exclusivo que elige al worker lider.
+        """
+        if self._lock_file is not None:
+            return True
+        if not self.lock_path or fcntl is None:
+            # sin archivo de bloqueo (o fuera de unix) cada proceso se considera lider
+            return True
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.status["is_leader"] = self._acquire_leadership()
+                if self.status["is_leader"]:
+                    self.run_once()
+            except Exception:
+                # un ciclo fallido no debe terminar el hilo: el lider seguiria
+                # con el bloqueo tomado sin refrescar nada
+                logger.exception("fallo un ciclo del precalentador")
+            self._stop.wait(self.interval)
+
+    def run_once(self):
+        """
+        refrescar una vez todas las ciudades priorizadas, respetando el ritmo de llamadas.
+        """
+        started = time.monotonic()
+        self.status.update(running=True, last_run_started=_now_iso(), refreshed=0, failed=0, shed=0)
+        self._write_status()
+
+        next_call = time.monotonic()
+        try:
+            with self.app.app_context():
+                for city, province in self.priority_cities():
+                    # esperar el turno que permite la fraccion de cuota asignada
+                    if self._stop.wait(max(0.0, next_call - time.monotonic())):
+                        break
+                    next_call = time.monotonic() + CALLS_PER_REFRESH * self.seconds_per_call
+                    self._refresh(city, province)
+        finally:
+            self.status.update(
+                running=False,
+                last_run_finished=_now_iso(),
+                last_run_seconds=round(time.monotonic() - started, 2),
+            )
+            self._write_status()
+
+    def _refresh(self, city, province):
+        """
+        refrescar una ciudad y contar el resultado; una falla no detiene el ciclo.
+        """
+        try:
+            get_weather_and_forecast(city, refresh=True, priority=PREFETCH, province=province)
+            self.status["refreshed"] += 1
+        except TooManyRequestsError:
+            # la cuota se reserva para los usuarios: no es una falla del precalentador
+            self.status["shed"] += 1
+        except APIError as e:
+            self.status["failed"] += 1
+            self.status["last_error"] = f"{city}: {e.message}"
+        except Exception as e:
+            logger.exception("no se pudo precalentar '%s'", city)
+            self.status["failed"] += 1
+            self.status["last_error"] = f"{city}: {e}"
+
+    def _write_status(self):
+        if not self.status_path:
+            return
+        tmp_path = f"{self.status_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.status, f)
+        os.replace(tmp_path, self.status_path)
+
+    def read_status(self):
+        """
+        devolver el estado del ultimo ciclo, leido del lider si corre en otro worker.
+        """
+        if self.status["is_leader"] or not self.status_path:
+            return dict(self.status)
+        try:
+            with open(self.status_path, "r", encoding="utf-8") as f:
+                status = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return dict(self.status)
+        status["is_leader"] = False
+        return status
+
+
+def start_prewarmer(app):
+    """
+    crear e iniciar el precalentador si esta habilitado en la configuracion.
+
+    args:
+        app (Flask): aplicacion cuyo cache se mantiene caliente.
+
+    returns:
+        Prewarmer: el precalentador iniciado, o None si esta deshabilitado.
+    """
+    if not app.config.get("PREWARM_ENABLED", False):
+        return None
+
+    from weather_app.services.cities import get_cities_data
+
+    prewarmer = Prewarmer(app, get_cities_data())
+    app.extensions["prewarmer"] = prewarmer
+    prewarmer.start()
+    return prewarmer
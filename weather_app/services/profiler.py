@@ -0,0 +1,268 @@
+# weather_app/services/profiler.py
+
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import current_app
+
+from weather_app.services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# segundos minimos entre muestras: cada muestra recorre las pilas de todos los
+# hilos con el gil tomado, y mas seguido frenaria a las solicitudes que mide
+MIN_INTERVAL = 0.001
+
+# funciones donde espera un hilo ocioso (pool sin trabajo, servidor esperando
+# conexiones): sus muestras no dicen nada de la latencia y se descartan
+_IDLE_LEAVES = {
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+    ("socketserver.py", "serve_forever"),
+    ("metrics.py", "_flush_loop"),
+}
+
+
+def _collapse(frame, thread_name):
+    """
+    convertir la pila de un hilo en una linea 'hilo;archivo:funcion;...' de la raiz a la hoja.
+
+    returns:
+        str: la pila colapsada, o None si el hilo esta ocioso.
+    """
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+        return None
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    perfilador por muestreo que se enciende en tiempo de ejecucion.
+
+    mientras esta activo, un hilo toma cada 'interval' segundos la pila de todos
+    los hilos del worker (sys._current_frames) y cuenta cuantas veces aparece
+    cada una; el resultado es tiempo de reloj, asi que incluye la espera a
+    openweathermap. las pilas se guardan en formato colapsado ('a;b;c cantidad'),
+    el que leen flamegraph.pl y speedscope.
+
+    con varios workers la orden de encender se escribe en directory/profile.json:
+    cada worker la lee en la vuelta de su hilo de metricas y escribe sus pilas en
+    directory/profile-<pid>.txt, que stacks() suma.
+    """
+    def __init__(self, directory=None, max_seconds=300):
+        self.directory = directory or None
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self._stacks = Counter()
+        self._session = None # identificador de la sesion que se esta midiendo
+        self._until = 0.0
+        self._interval = 0.01
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _control_path(self):
+        return os.path.join(self.directory, "profile.json") if self.directory else None
+
+    def start(self, seconds, interval=0.01):
+        """
+        encender el perfilador en todos los workers durante 'seconds' segundos.
+
+        returns:
+            dict: la sesion iniciada ({"session", "until", "interval"}).
+
+        raises:
+            valueerror: si 'seconds' no es un numero finito positivo o 'interval'
+                        no es un numero finito de al menos MIN_INTERVAL.
+        """
+        # nan pasa cualquier comparacion y un intervalo infinito rompe time.sleep
+        # en el hilo de muestreo: rechazarlos antes de escribir la orden
+        if not math.isfinite(seconds) or seconds <= 0:
+            raise ValueError("parametro 'seconds' debe ser un numero finito positivo.")
+        if not math.isfinite(interval) or interval < MIN_INTERVAL:
+            raise ValueError(f"parametro 'interval' debe ser un numero finito de al menos {MIN_INTERVAL} segundos.")
+        control = {
+            "session": f"{time.time():.3f}",
+            "until": time.time() + min(seconds, self.max_seconds),
+            "interval": interval,
+        }
+        self._write_control(control)
+        self.sync(control)
+        return control
+
+    def stop(self):
+        """
+        apagar el perfilador en todos los workers; las pilas ya medidas se conservan.
+        """
+        control = self._read_control() or {}
+        control["until"] = 0
+        self._write_control(control)
+        self.sync(control)
+
+    def _write_control(self, control):
+        path = self._control_path()
+        if path is None:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(control, f)
+        os.replace(tmp_path, path)
+
+    def _read_control(self):
+        path = self._control_path()
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def sync(self, control=None):
+        """
+        aplicar en este worker la ultima orden (encender o apagar) y guardar sus pilas.
+        """
+        control = control or self._read_control()
+        if control is None:
+            return
+        with self._lock:
+            if control.get("session") != self._session:
+                # sesion nueva: empezar de cero
+                self._session = control.get("session")
+                self._stacks = Counter()
+                self.samples = 0
+            self._until = control.get("until", 0)
+            self._interval = control.get("interval", 0.01)
+            start = time.time() < self._until and (self._thread is None or not self._thread.is_alive())
+            if start:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._write_stacks()
+
+    def _run(self):
+        own = threading.get_ident()
+        while time.time() < self._until:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _collapse(frame, names.get(ident, "thread"))
+                if stack is not None:
+                    sampled.append(stack)
+            with self._lock:
+                self._stacks.update(sampled)
+                self.samples += 1
+            time.sleep(self._interval)
+        self._write_stacks()
+
+    def _write_stacks(self):
+        if not self.directory:
+            return
+        with self._lock:
+            lines = [f"# session {self._session}"]
+            lines += [f"{stack} {count}" for stack, count in self._stacks.items()]
+        path = os.path.join(self.directory, f"profile-{os.getpid()}.txt")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp" # lo escriben el hilo de muestreo y el de metricas
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("no se pudieron escribir las pilas del perfilador: %s", e)
+
+    def stacks(self):
+        """
+        sumar las pilas de la sesion actual de todos los workers.
+
+        returns:
+            Counter: pila colapsada -> cantidad de muestras.
+        """
+        self.sync() # tomar la ultima sesion aunque la haya iniciado otro worker
+        with self._lock:
+            total = Counter(self._stacks)
+            session = self._session
+        if not self.directory:
+            return total
+        for path in glob.glob(os.path.join(self.directory, "profile-*.txt")):
+            if path.endswith(f"profile-{os.getpid()}.txt"):
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            if not lines or lines[0] != f"# session {session}":
+                continue
+            for line in lines[1:]:
+                stack, _, count = line.rpartition(" ")
+                if stack and count.isdigit():
+                    total[stack] += int(count)
+        return total
+
+    def stats(self):
+        """
+        devolver el estado del perfilador en este worker.
+        """
+        with self._lock:
+            remaining = max(0.0, self._until - time.time())
+            return {
+                "session": self._session,
+                "running": remaining > 0,
+                "remaining_seconds": round(remaining, 1),
+                "interval_seconds": self._interval,
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+            }
+
+
+_init_lock = threading.Lock()
+
+
+def get_profiler():
+    """
+    obtener el perfilador de la aplicacion actual, creandolo la primera vez.
+
+    returns:
+        SamplingProfiler: el perfilador, o None si PROFILER_ENABLED es false.
+    """
+    if not current_app.config.get("PROFILER_ENABLED", False):
+        return None
+    profiler = current_app.extensions.get("profiler")
+    if profiler is None:
+        with _init_lock:
+            profiler = current_app.extensions.get("profiler")
+            if profiler is None:
+                config = current_app.config
+                profiler = SamplingProfiler(
+                    directory=config.get("METRICS_DIR"),
+                    max_seconds=config.get("PROFILER_MAX_SECONDS", 300),
+                )
+                current_app.extensions["profiler"] = profiler
+    return profiler
+
+
+def init_profiler(app):
+    """
+    hacer que cada worker siga las ordenes del perfilador en la vuelta de su hilo de metricas.
+
+    args:
+        app (Flask): aplicacion con PROFILER_ENABLED.
+    """
+    if not app.config.get("PROFILER_ENABLED", False):
+        return
+    with app.app_context():
+        REGISTRY.on_tick(get_profiler().sync)
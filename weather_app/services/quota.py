@@ -0,0 +1,306 @@
+# weather_app/services/quota.py
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+from weather_app.services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# prioridades de las llamadas a openweathermap, de mayor a menor
+INTERACTIVE = "interactive" # un usuario espera la respuesta (/weather)
+BATCH = "batch" # consultas en lote (/weather/batch, /weather/province)
+PREFETCH = "prefetch" # precalentador y refrescos en segundo plano de datos vencidos
+PRIORITIES = (INTERACTIVE, BATCH, PREFETCH)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_buckets (
+    name       TEXT PRIMARY KEY,
+    tokens     REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class QuotaGovernor:
+    """
+    repartir la cuota de llamadas de OPENWEATHER_API_KEY entre todos los workers.
+
+    la cuota se modela con dos baldes de fichas (por minuto y por dia) guardados
+    en un archivo sqlite que comparten los workers de gunicorn; cada llamada a
+    openweathermap consume una ficha de ambos y los baldes se rellenan de forma
+    continua segun el limite del plan. las fichas se toman dentro de una
+    transaccion exclusiva, asi dos workers no pueden gastar la misma ficha.
+
+    las prioridades bajas solo pueden tomar fichas mientras el balde conserve su
+    reserva (una fraccion de la capacidad), de modo que el precalentador y los
+    lotes se descartan antes de que falte cuota para los usuarios. las llamadas
+    con espera maxima mayor a cero se encolan hasta que haya fichas.
+
+    atributos:
+        granted (dict): llamadas autorizadas por prioridad en este worker.
+        denied (dict): llamadas rechazadas por prioridad en este worker.
+        waited_seconds (float): segundos esperados por fichas en este worker.
+        upstream_limited (int): respuestas 429 de openweathermap en este worker.
+    """
+    def __init__(self, path, calls_per_minute, calls_per_day=0, reserves=None, max_waits=None):
+        self.path = path
+        # nombre -> (capacidad, fichas por segundo); un limite de 0 desactiva el balde
+        self.buckets = {}
+        if calls_per_minute > 0:
+            self.buckets["minute"] = (float(calls_per_minute), calls_per_minute / 60.0)
+        if calls_per_day > 0:
+            self.buckets["day"] = (float(calls_per_day), calls_per_day / 86400.0)
+        # fraccion de cada balde que una prioridad no puede usar
+        self.reserves = {priority: 0.0 for priority in PRIORITIES}
+        self.reserves.update(reserves or {})
+        # segundos que una llamada puede esperar fichas antes de rechazarse
+        self.max_waits = {priority: 0.0 for priority in PRIORITIES}
+        self.max_waits.update(max_waits or {})
+        self.granted = {priority: 0 for priority in PRIORITIES}
+        self.denied = {priority: 0 for priority in PRIORITIES}
+        self.waited_seconds = 0.0
+        self.upstream_limited = 0
+        self.errors = 0
+        self._local = threading.local() # una conexion por hilo
+        self._lock = threading.Lock()
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        now = time.time()
+        for name, (capacity, _) in self.buckets.items():
+            # un balde nuevo empieza lleno; si ya existe lo conserva (lo creo otro worker)
+            conn.execute(
+                "INSERT OR IGNORE INTO quota_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (name, capacity, now),
+            )
+
+    def _connect(self):
+        """
+        obtener la conexion sqlite del hilo actual, creandola si hace falta.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # sin transacciones implicitas: _take abre la suya con BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _levels(self, rows, now):
+        """
+        calcular las fichas actuales de cada balde a partir de su ultimo registro.
+        """
+        levels = {}
+        for name, tokens, updated_at in rows:
+            if name in self.buckets:
+                capacity, rate = self.buckets[name]
+                levels[name] = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+        return levels
+
+    def _take(self, calls, priority):
+        """
+        intentar tomar 'calls' fichas de todos los baldes en una sola transaccion.
+
+        returns:
+            float: 0 si se tomaron las fichas; si no, segundos estimados hasta que
+                   alcancen (None si nunca alcanzaran para esta prioridad).
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = self._levels(conn.execute("SELECT name, tokens, updated_at FROM quota_buckets"), now)
+            wait = 0.0
+            for name, tokens in levels.items():
+                capacity, rate = self.buckets[name]
+                needed = calls + self.reserves[priority] * capacity
+                if needed > capacity:
+                    wait = None
+                    break
+                if tokens < needed:
+                    wait = max(wait, (needed - tokens) / rate)
+            if wait == 0.0:
+                conn.executemany(
+                    "UPDATE quota_buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                    [(tokens - calls, now, name) for name, tokens in levels.items()],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def _record(self, priority, granted, waited):
+        with self._lock:
+            (self.granted if granted else self.denied)[priority] += 1
+            self.waited_seconds += waited
+        REGISTRY.inc("openweather_quota_calls_total", priority=priority, result="granted" if granted else "denied")
+
+    def _fail_open(self, priority, error):
+        # el gobernador protege la cuota, no es indispensable: si sqlite falla se deja pasar la llamada
+        logger.warning("no se pudo consultar la cuota de openweathermap: %s", error)
+        with self._lock:
+            self.errors += 1
+            self.granted[priority] += 1
+        REGISTRY.inc("openweather_quota_calls_total", priority=priority, result="granted")
+        return True
+
+    def acquire(self, calls=1, priority=INTERACTIVE):
+        """
+        tomar fichas para 'calls' llamadas, esperando hasta la espera maxima de la prioridad.
+
+        args:
+            calls (int): llamadas a openweathermap que se van a hacer.
+            priority (str): INTERACTIVE, BATCH o PREFETCH.
+
+        returns:
+            bool: true si se pueden hacer las llamadas, false si se agoto la cuota.
+        """
+        started = time.monotonic()
+        deadline = started + self.max_waits[priority]
+        while True:
+            try:
+                wait = self._take(calls, priority)
+            except sqlite3.Error as e:
+                return self._fail_open(priority, e)
+            if wait == 0.0:
+                self._record(priority, True, time.monotonic() - started)
+                return True
+            if wait is None or time.monotonic() + wait > deadline:
+                self._record(priority, False, time.monotonic() - started)
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, calls=1, priority=INTERACTIVE):
+        """
+        version asincrona (modo asgi) de acquire: la espera no bloquea el event loop.
+        """
+        started = time.monotonic()
+        deadline = started + self.max_waits[priority]
+        while True:
+            try:
+                wait = await asyncio.to_thread(self._take, calls, priority)
+            except sqlite3.Error as e:
+                return self._fail_open(priority, e)
+            if wait == 0.0:
+                self._record(priority, True, time.monotonic() - started)
+                return True
+            if wait is None or time.monotonic() + wait > deadline:
+                self._record(priority, False, time.monotonic() - started)
+                return False
+            await asyncio.sleep(wait)
+
+    def retry_after(self, calls=1, priority=INTERACTIVE):
+        """
+        estimar los segundos hasta que haya fichas para 'calls' llamadas.
+
+        returns:
+            int: segundos redondeados hacia arriba (al menos 1).
+        """
+        try:
+            levels = self.remaining()
+        except sqlite3.Error:
+            return 60
+        wait = 0.0
+        for name, tokens in levels.items():
+            capacity, rate = self.buckets[name]
+            needed = min(capacity, calls + self.reserves[priority] * capacity)
+            wait = max(wait, (needed - tokens) / rate)
+        return max(1, int(wait) + 1)
+
+    def exhaust(self):
+        """
+        vaciar el balde por minuto cuando openweathermap responde 429, para que
+        todos los workers dejen de llamar hasta que se rellene.
+        """
+        with self._lock:
+            self.upstream_limited += 1
+        if "minute" not in self.buckets:
+            return
+        try:
+            self._connect().execute(
+                "UPDATE quota_buckets SET tokens = 0, updated_at = ? WHERE name = 'minute'", (time.time(),),
+            )
+        except sqlite3.Error as e:
+            logger.warning("no se pudo actualizar la cuota de openweathermap: %s", e)
+
+    def remaining(self):
+        """
+        devolver las fichas disponibles de cada balde, compartidas entre workers.
+
+        returns:
+            dict: nombre del balde ('minute', 'day') -> fichas.
+        """
+        rows = self._connect().execute("SELECT name, tokens, updated_at FROM quota_buckets").fetchall()
+        return self._levels(rows, time.time())
+
+    def stats(self):
+        """
+        devolver la cuota restante, los limites y los contadores del worker.
+        """
+        try:
+            levels = self.remaining()
+        except sqlite3.Error:
+            levels = {}
+        with self._lock:
+            return {
+                "path": self.path,
+                "buckets": {
+                    name: {
+                        "capacity": capacity,
+                        "remaining": round(levels[name], 2) if name in levels else None,
+                        "refill_per_second": round(rate, 4),
+                    }
+                    for name, (capacity, rate) in self.buckets.items()
+                },
+                "reserves": dict(self.reserves),
+                "max_wait_seconds": dict(self.max_waits),
+                "granted": dict(self.granted),
+                "denied": dict(self.denied),
+                "waited_seconds": round(self.waited_seconds, 2),
+                "upstream_limited": self.upstream_limited,
+                "errors": self.errors,
+            }
+
+
+_init_lock = threading.Lock()
+
+
+def get_quota_governor():
+    """
+    obtener el gobernador de cuota de la aplicacion actual, creandolo la primera vez.
+
+    returns:
+        QuotaGovernor: el gobernador, o None si QUOTA_ENABLED es false.
+    """
+    if not current_app.config.get("QUOTA_ENABLED", False):
+        return None
+    governor = current_app.extensions.get("quota_governor")
+    if governor is None:
+        with _init_lock:
+            governor = current_app.extensions.get("quota_governor")
+            if governor is None:
+                config = current_app.config
+                max_wait = config.get("QUOTA_MAX_WAIT", 2.0)
+                governor = QuotaGovernor(
+                    config["QUOTA_PATH"],
+                    calls_per_minute=config.get("OPENWEATHER_CALLS_PER_MINUTE", 60),
+                    calls_per_day=config.get("OPENWEATHER_CALLS_PER_DAY", 0),
+                    reserves={
+                        BATCH: config.get("QUOTA_BATCH_RESERVE", 0.1),
+                        PREFETCH: config.get("QUOTA_PREFETCH_RESERVE", 0.3),
+                    },
+                    # los usuarios y los lotes esperan un poco; el trabajo de fondo se descarta
+                    max_waits={INTERACTIVE: max_wait, BATCH: max_wait, PREFETCH: 0.0},
+                )
+                current_app.extensions["quota_governor"] = governor
+    return governor
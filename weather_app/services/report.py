@@ -0,0 +1,157 @@
+# weather_app/services/report.py
+
+from weather_app.exceptions.base import APIError
+from weather_app.exceptions.server_errors import InternalServerError # importar error de servidor
+from weather_app.services.cache import WEATHER, FORECAST
+from weather_app.services.openweather import fetch_weather_bundle
+from weather_app.services.quota import INTERACTIVE
+from weather_app.services.report_cache import get_report_cache
+from weather_app.utils.forecast import group_forecast_by_day
+
+# version del formato del reporte: cambiarla si cambia lo que devuelve format_weather_report,
+# asi los etag de los navegadores dejan de coincidir despues de un despliegue
+REPORT_FORMAT = 2
+
+
+def build_weather_report(city, priority=INTERACTIVE, province=None):
+    """
+    obtener el clima actual y el pronostico semanal de una ciudad con el formato de la api.
+
+    args:
+        city (str): nombre de la ciudad.
+        priority (str): prioridad de las llamadas a openweathermap (ver quota.py).
+        province (str, optional): provincia de la ciudad, si el nombre se repite en varias.
+
+    returns:
+        dict: ciudad, clima actual, pronostico agrupado por dia y 'stale' (true si
+              los datos estan vencidos porque openweathermap no respondio a tiempo).
+
+    raises:
+        apierror: si falla la consulta a openweathermap o el procesamiento de los datos.
+    """
+    bundle = load_weather_bundle(city, priority, province)
+    return get_report_cache().report(bundle, report_version(bundle), format_weather_report)["report"]
+
+
+def load_weather_bundle(city, priority=INTERACTIVE, province=None):
+    """
+    obtener los datos de clima y pronostico de una ciudad sin darles formato.
+
+    returns:
+        WeatherBundle: datos crudos, marca de datos vencidos e instante de descarga.
+
+    raises:
+        apierror: si falla la consulta a openweathermap.
+    """
+    try:
+        # obtener datos de clima y pronostico del servicio openweather
+        return fetch_weather_bundle(city, priority=priority, province=province)
+    except APIError:
+        raise
+    except Exception as e:
+        # convertir cualquier otra excepcion inesperada en internalservererror
+        raise InternalServerError(f"error interno inesperado: {str(e)}")
+
+
+async def build_weather_report_async(city, priority=INTERACTIVE, province=None):
+    """
+    version asincrona (modo asgi) de build_weather_report.
+    """
+    bundle = await load_weather_bundle_async(city, priority, province)
+    return get_report_cache().report(bundle, report_version(bundle), format_weather_report)["report"]
+
+
+async def load_weather_bundle_async(city, priority=INTERACTIVE, province=None):
+    """
+    version asincrona (modo asgi) de load_weather_bundle.
+    """
+    # importar aca: el modo asgi requiere aiohttp, que no es dependencia del modo wsgi
+    from weather_app.services.openweather_async import fetch_weather_bundle_async
+
+    try:
+        return await fetch_weather_bundle_async(city, priority=priority, province=province)
+    except APIError:
+        raise
+    except Exception as e:
+        # convertir cualquier otra excepcion inesperada en internalservererror
+        raise InternalServerError(f"error interno inesperado: {str(e)}")
+
+
+def format_weather_report(bundle):
+    """
+    dar el formato de la api a los datos de clima y pronostico de una ciudad.
+
+    args:
+        bundle (WeatherBundle): datos devueltos por fetch_weather_bundle.
+
+    returns:
+        dict: ciudad, clima actual, pronostico agrupado por dia y 'stale'.
+
+    raises:
+        internalservererror: si los datos no tienen el formato esperado.
+    """
+    try:
+        weather_data = bundle.weather
+        # agrupar y transformar los datos del pronostico
+        forecast_list = group_forecast_by_day(bundle.forecast)
+
+        return {
+            "city": weather_data["name"],
+            "current_weather": {
+                "temp": weather_data["main"]["temp"],
+                "description": weather_data["weather"][0]["description"],
+                "icon": weather_data["weather"][0]["icon"],
+            },
+            "weekly_forecast": forecast_list,
+            "stale": bundle.stale,
+        }
+
+    except APIError:
+        # group_forecast_by_day ya describe el error: no envolverlo de nuevo
+        raise
+    except Exception as e:
+        # convertir cualquier otra excepcion inesperada en internalservererror
+        raise InternalServerError(f"error interno inesperado: {str(e)}")
+
+
+def report_version(bundle):
+    """
+    identificar la version de los datos de un reporte para usarla como etag.
+
+    dos reportes con las mismas descargas (y la misma marca de datos vencidos)
+    tienen el mismo contenido, asi que no hace falta armarlos para compararlos.
+
+    returns:
+        str: version derivada del instante de descarga de cada respuesta.
+    """
+    fetched_at = bundle.fetched_at
+    stale = "-stale" if bundle.stale else ""
+    return f"r{REPORT_FORMAT}-{fetched_at[WEATHER]:.3f}-{fetched_at[FORECAST]:.3f}{stale}"
+
+
+def report_max_age(bundle, cache):
+    """
+    calcular cuantos segundos puede cachearse un reporte: lo que le queda al dato que vence primero.
+
+    returns:
+        int: segundos de vigencia (0 si los datos estan vencidos).
+    """
+    if bundle.stale:
+        return 0
+    return min(cache.freshness(kind, stored_at) for kind, stored_at in bundle.fetched_at.items())
+
+
+def error_payload(error):
+    """
+    convertir un apierror en el diccionario json que devuelve la api.
+
+    args:
+        error (APIError): error a convertir.
+
+    returns:
+        dict: mensaje de error y datos adicionales si existen.
+    """
+    payload = {"error": error.message}
+    if error.payload:
+        payload.update(error.payload)
+    return payload
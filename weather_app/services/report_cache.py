@@ -0,0 +1,150 @@
+# weather_app/services/report_cache.py
+
+import threading
+from collections import OrderedDict
+
+from flask import current_app, jsonify
+
+from weather_app.services.http_cache import compress, negotiate_encoding
+
+
+class ReportCache:
+    """
+    cache en memoria de los reportes de clima ya armados y serializados, por ciudad.
+
+    cada entrada guarda la version de los datos con que se armo (ver
+    report.report_version): si el cache de openweathermap reemplaza la respuesta
+    de una ciudad, la version cambia y la entrada se descarta en la siguiente
+    lectura. asi una ciudad consultada seguido se sirve con los bytes json (y sus
+    variantes br/gzip) ya listos, sin agrupar el pronostico ni serializar de nuevo.
+
+    cada worker tiene su propia copia; armar un reporte es barato comparado con
+    descargarlo, asi que no hace falta compartirlo entre procesos.
+    """
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # clave de ciudad -> {"version", "report", "body", "encoded"}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0 # entradas descartadas porque cambiaron los datos de origen
+        self.evictions = 0
+
+    def report(self, bundle, version, build):
+        """
+        obtener la entrada de un reporte, armandola si no existe o si los datos cambiaron.
+
+        args:
+            bundle (WeatherBundle): datos de la ciudad (se usa bundle.city_key como clave).
+            version (str): version de los datos (ver report.report_version).
+            build (callable): funcion que recibe el bundle y devuelve el reporte.
+
+        returns:
+            dict: entrada {"version", "report", "body", "encoded"}.
+        """
+        key = bundle.city_key
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["version"] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if entry is not None:
+                self.invalidations += 1
+
+        # armar fuera del lock: dos solicitudes simultaneas arman lo mismo, sin esperarse
+        entry = {"version": version, "report": build(bundle), "body": None, "encoded": {}}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def body(self, entry, accepted=None):
+        """
+        obtener los bytes de una entrada, comprimidos si el cliente lo acepta.
+
+        serializa y comprime la primera vez que se pide cada representacion; las
+        siguientes solicitudes reutilizan los bytes. solo se comprime si el json
+        supera COMPRESS_MIN_SIZE, igual que en http_cache.compress_response.
+
+        args:
+            entry (dict): entrada devuelta por report().
+            accepted (str, optional): codificacion elegida por http_cache.negotiate_encoding.
+
+        returns:
+            tuple: (bytes, codificacion usada o None).
+        """
+        body = entry["body"]
+        if body is None:
+            # mismos bytes que jsonify (incluida la indentacion en modo debug)
+            body = entry["body"] = jsonify(entry["report"]).get_data()
+
+        if accepted is None or len(body) < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+            return body, None
+        encoded = entry["encoded"].get(accepted)
+        if encoded is None:
+            encoded = entry["encoded"][accepted] = compress(body, accepted)
+        return encoded, accepted
+
+    def response(self, entry):
+        """
+        armar la respuesta http de una entrada con los bytes ya serializados.
+
+        returns:
+            Response: respuesta json, comprimida si el cliente lo acepta.
+        """
+        body, encoding = self.body(entry, negotiate_encoding())
+        response = current_app.response_class(body, mimetype="application/json")
+        if encoding is not None:
+            response.content_encoding = encoding
+        return response
+
+    def invalidate(self, key):
+        """
+        descartar el reporte de una ciudad (ej. al descargar datos nuevos).
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        """
+        devolver la cantidad de entradas, su memoria aproximada y los contadores de uso.
+        """
+        with self._lock:
+            body_bytes = sum(len(e["body"]) for e in self._entries.values() if e["body"] is not None)
+            encoded_bytes = sum(len(b) for e in self._entries.values() for b in e["encoded"].values())
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "serialized": sum(1 for e in self._entries.values() if e["body"] is not None),
+                "body_bytes": body_bytes,
+                "encoded_bytes": encoded_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+_init_lock = threading.Lock()
+
+
+def get_report_cache():
+    """
+    obtener el cache de reportes de la aplicacion actual, creandolo la primera vez.
+    """
+    cache = current_app.extensions.get("report_cache")
+    if cache is None:
+        with _init_lock:
+            cache = current_app.extensions.get("report_cache")
+            if cache is None:
+                cache = ReportCache(max_entries=current_app.config.get("REPORT_CACHE_MAX_ENTRIES", 512))
+                current_app.extensions["report_cache"] = cache
+    return cache
@@ -0,0 +1,178 @@
+# weather_app/services/singleflight.py
+
+import asyncio
+import threading
+
+from flask import current_app
+
+
+class _Call:
+    """
+    solicitud en curso compartida por todos los hilos que piden la misma clave.
+    """
+    def __init__(self):
+        self.done = threading.Event() # se activa cuando la solicitud termina
+        self.result = None # resultado de la solicitud si fue exitosa
+        self.error = None # excepcion lanzada si la solicitud fallo
+
+
+class SingleFlight:
+    """
+    agrupar solicitudes concurrentes con la misma clave en una sola ejecucion.
+
+    el primer hilo que pide una clave ejecuta la funcion; los demas hilos que
+    llegan mientras esta en curso esperan y reciben el mismo resultado o error.
+
+    atributos:
+        executions (int): cantidad de veces que se ejecuto la funcion.
+        coalesced (int): cantidad de solicitudes que reutilizaron una ejecucion en curso.
+    """
+    def __init__(self):
+        self._calls = {} # clave -> _Call en curso
+        self._lock = threading.Lock() # proteger el diccionario y los contadores
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        ejecutar fn una sola vez por clave entre todos los hilos concurrentes.
+
+        args:
+            key (str): clave que identifica la solicitud.
+            fn (callable): funcion sin argumentos que realiza la solicitud.
+
+        returns:
+            el resultado de fn, propio o compartido.
+
+        raises:
+            la misma excepcion que lance fn.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            # esperar el resultado del hilo que ya esta haciendo la solicitud
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """
+        devolver contadores de solicitudes ejecutadas y agrupadas.
+        """
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+        }
+
+
+class AsyncSingleFlight:
+    """
+    version para asyncio de SingleFlight: agrupa corrutinas concurrentes con la misma clave.
+
+    la primera tarea que pide una clave lanza la corrutina como tarea aparte; esa
+    y las demas esperan la misma tarea. asi, si el cliente que la inicio se
+    desconecta, la descarga sigue para los demas. se usa desde un unico event
+    loop (el del worker asgi).
+    """
+    def __init__(self):
+        self._calls = {} # clave -> asyncio.Task en curso
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        ejecutar fn() una sola vez por clave entre todas las tareas concurrentes.
+
+        args:
+            key (str): clave que identifica la solicitud.
+            fn (callable): funcion sin argumentos que devuelve la corrutina a ejecutar.
+
+        returns:
+            el resultado de la corrutina, propio o compartido.
+
+        raises:
+            la misma excepcion que lance la corrutina.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: cancelar esta solicitud no cancela la descarga compartida
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        """
+        quitar la tarea terminada y marcar su excepcion como leida si nadie la estaba esperando.
+        """
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        """
+        devolver contadores de solicitudes ejecutadas y agrupadas.
+        """
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+_init_lock = threading.Lock()
+
+
+def get_singleflight():
+    """
+    obtener el agrupador de solicitudes de la aplicacion actual, creandolo la primera vez.
+    """
+    flight = current_app.extensions.get("upstream_singleflight")
+    if flight is None:
+        with _init_lock:
+            flight = current_app.extensions.get("upstream_singleflight")
+            if flight is None:
+                flight = SingleFlight()
+                current_app.extensions["upstream_singleflight"] = flight
+    return flight
+
+
+def get_async_singleflight():
+    """
+    obtener el agrupador de corrutinas de la aplicacion actual, creandolo la primera vez.
+    """
+    flight = current_app.extensions.get("upstream_async_singleflight")
+    if flight is None:
+        with _init_lock:
+            flight = current_app.extensions.get("upstream_async_singleflight")
+            if flight is None:
+                flight = AsyncSingleFlight()
+                current_app.extensions["upstream_async_singleflight"] = flight
+    return flight
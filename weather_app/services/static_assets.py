@@ -0,0 +1,323 @@
+# weather_app/services/static_assets.py
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+import unicodedata
+from urllib.parse import quote
+
+from flask import abort, current_app, request
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+logger = logging.getLogger(__name__)
+
+# tipos que mimetypes no conoce o que algunos sistemas registran mal
+mimetypes.add_type("application/geo+json", ".geojson")
+mimetypes.add_type("text/javascript", ".js")
+
+# variantes precomprimidas en orden de preferencia: codificacion -> extension del archivo
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_VARIANT_EXTENSIONS = tuple(ext for _, ext in _ENCODINGS)
+
+# manifiesto que escribe build_geometries.py en la raiz de static: ruta relativa
+# del original -> hash del contenido a partir del cual se generaron sus .br/.gz
+MANIFEST_NAME = "precompressed.json"
+
+
+def _hash_file(path):
+    """
+    calcular el hash del contenido de un archivo (16 caracteres hex de sha256).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _file_response(file, mimetype, download_name, etag, last_modified, max_age):
+    """
+    armar la respuesta condicional de un archivo ya indexado, como send_file pero
+    con el tamaño conocido: send_file consulta el disco (os.stat) en cada envio.
+
+    args:
+        file (tuple): (ruta, tamaño en bytes) del archivo a enviar.
+    """
+    path, size = file
+    try:
+        download_name.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": simple, "filename*": f"UTF-8''{quote(download_name, safe='!#$&+-.^_`|~')}"}
+    else:
+        names = {"filename": download_name}
+
+    f = open(path, "rb")
+    response = current_app.response_class(wrap_file(request.environ, f), mimetype=mimetype, direct_passthrough=True)
+    response.headers.set("Content-Disposition", "inline", **names)
+    response.content_length = size
+    response.last_modified = last_modified
+    if max_age > 0:
+        response.cache_control.public = True
+    else:
+        response.cache_control.no_cache = True
+    response.cache_control.max_age = max_age
+    response.expires = int(time.time() + max_age)
+    response.set_etag(etag)
+    try:
+        return response.make_conditional(request.environ, accept_ranges=True, complete_length=size)
+    except RequestedRangeNotSatisfiable:
+        f.close()
+        raise
+
+
+class StaticAssets:
+    """
+    servidor de archivos estaticos con etag por contenido y variantes precomprimidas.
+
+    al iniciar recorre la carpeta static y calcula el hash de cada archivo una sola
+    vez; el hash es el etag (asi dos workers o dos despliegues del mismo archivo
+    responden lo mismo) y el '?v=' que url_for('static') agrega a las urls. si el
+    navegador acepta br o gzip y existe el archivo .br/.gz generado por
+    build_geometries.py, se envia ese en lugar de comprimir en cada solicitud.
+
+    una variante solo se usa si el manifiesto (precompressed.json) registra para
+    el original el mismo hash que tiene ahora: las fechas de modificacion cambian
+    al clonar o copiar el proyecto y no dicen si el .br/.gz corresponde al archivo.
+
+    las solicitudes se atienden con el indice armado al iniciar (hash, tamaño,
+    fecha y variantes de cada archivo), sin consultar el disco salvo para abrir el
+    archivo enviado. los .br/.gz no se sirven por su propia url: solo como variante
+    del original, con su Content-Encoding. con recheck (por defecto en modo debug)
+    cada solicitud compara fecha y tamaño en disco y recalcula el hash si cambiaron,
+    para ver los cambios del desarrollo sin reiniciar.
+    """
+    def __init__(self, root, recheck=False):
+        self.root = root
+        self.recheck = recheck
+        self._assets = {} # ruta relativa -> {"hash", "stat", "mimetype", "files"}
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._manifest_stat = None
+        self.stale_variants = 0
+        self.served = 0
+        self.not_modified = 0
+        self.immutable = 0
+        self.encoded = {encoding: 0 for encoding, _ in _ENCODINGS}
+        self.rehashed = 0
+
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                filename = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+                if self._servable(filename):
+                    self._assets[filename] = self._scan(filename)
+
+    @staticmethod
+    def _servable(filename):
+        """
+        indicar si un archivo de static se sirve por su url (no las variantes ni el manifiesto).
+        """
+        return not filename.endswith(_VARIANT_EXTENSIONS) and filename != MANIFEST_NAME
+
+    def _load_manifest(self):
+        """
+        devolver el manifiesto de variantes precomprimidas, releyendolo si cambio en disco.
+
+        returns:
+            dict: ruta relativa -> hash del original, vacio si no hay manifiesto.
+        """
+        path = os.path.join(self.root, MANIFEST_NAME)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._manifest, self._manifest_stat = {}, None
+            return self._manifest
+        if (st.st_mtime_ns, st.st_size) != self._manifest_stat:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except ValueError:
+                logger.warning("el manifiesto %s no es un json valido; no se usan variantes precomprimidas.", path)
+                manifest = {}
+            self._manifest, self._manifest_stat = manifest, (st.st_mtime_ns, st.st_size)
+        return self._manifest
+
+    def _scan(self, filename):
+        """
+        calcular el hash de un archivo y buscar sus variantes precomprimidas.
+
+        returns:
+            dict: {"hash", "stat", "mimetype", "files"}; files es codificacion -> (ruta, tamaño),
+                  con None para el original.
+        """
+        path = os.path.join(self.root, filename)
+        st = os.stat(path)
+        content_hash = _hash_file(path)
+        files = {None: (path, st.st_size)}
+        present = [(encoding, path + ext) for encoding, ext in _ENCODINGS if os.path.isfile(path + ext)]
+        if present:
+            # ignorar variantes generadas a partir de otro contenido del original
+            if self._load_manifest().get(filename) == content_hash:
+                files.update((encoding, (variant, os.path.getsize(variant))) for encoding, variant in present)
+            else:
+                logger.warning("las variantes precomprimidas de %s no coinciden con el manifiesto; se envia sin comprimir.", filename)
+                with self._lock:
+                    self.stale_variants += 1
+        return {
+            "hash": content_hash,
+            "stat": (st.st_mtime_ns, st.st_size),
+            "mimetype": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "files": files,
+        }
+
+    def get(self, filename):
+        """
+        obtener el hash y las variantes de un archivo del indice.
+
+        con recheck se recalculan si el archivo cambio en disco y se indexan los
+        archivos nuevos; sin recheck no se consulta el disco.
+
+        returns:
+            dict: {"hash", "stat", "mimetype", "files"}, o None si el archivo no se sirve.
+        """
+        if not self.recheck:
+            return self._assets.get(filename)
+        path = safe_join(self.root, filename)
+        if path is None or not self._servable(filename) or not os.path.isfile(path):
+            return None
+        st = os.stat(path)
+        asset = self._assets.get(filename)
+        if asset is None or asset["stat"] != (st.st_mtime_ns, st.st_size):
+            asset = self._scan(filename)
+            with self._lock:
+                self._assets[filename] = asset
+                self.rehashed += 1
+        return asset
+
+    def version(self, filename):
+        """
+        devolver el hash del contenido de un archivo para agregarlo a su url, o None si no existe.
+        """
+        asset = self.get(filename)
+        return asset["hash"] if asset else None
+
+    def _negotiate(self, asset):
+        """
+        elegir la variante precomprimida segun el encabezado Accept-Encoding.
+
+        returns:
+            str: 'br' o 'gzip', o None para enviar el archivo sin comprimir.
+        """
+        best, best_quality = None, 0
+        for encoding, _ in _ENCODINGS:
+            if encoding not in asset["files"]:
+                continue
+            quality = request.accept_encodings.quality(encoding)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def serve(self, filename):
+        """
+        vista que reemplaza a la vista 'static' de flask.
+
+        responde 304 si el etag o la fecha coinciden con los del navegador, envia
+        la variante .br/.gz aceptada y marca como inmutables las urls cuyo '?v='
+        coincide con el hash actual del archivo.
+        """
+        asset = self.get(filename)
+        if asset is None:
+            abort(404)
+
+        config = current_app.config
+        encoding = self._negotiate(asset)
+        immutable = request.args.get("v") == asset["hash"]
+        max_age = config.get("STATIC_IMMUTABLE_MAX_AGE", 365 * 24 * 3600) if immutable else config.get("STATIC_MAX_AGE", 0)
+
+        response = _file_response(
+            asset["files"][encoding],
+            mimetype=asset["mimetype"],
+            # el nombre es el del archivo pedido, no el del .br/.gz enviado
+            download_name=os.path.basename(filename),
+            # cada representacion lleva su propio etag: la comprimida no es igual byte a byte
+            etag=f"{asset['hash']}-{encoding}" if encoding else asset["hash"],
+            last_modified=asset["stat"][0] / 1e9,
+            max_age=max_age,
+        )
+        if encoding:
+            response.content_encoding = encoding
+        if len(asset["files"]) > 1:
+            response.vary.add("Accept-Encoding")
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+
+        with self._lock:
+            self.served += 1
+            if response.status_code == 304:
+                self.not_modified += 1
+            if immutable:
+                self.immutable += 1
+            if encoding:
+                self.encoded[encoding] += 1
+        return response
+
+    def stats(self):
+        """
+        devolver la cantidad de archivos indexados y los contadores de respuestas.
+        """
+        with self._lock:
+            return {
+                "files": len(self._assets),
+                "precompressed": sum(1 for asset in self._assets.values() if len(asset["files"]) > 1),
+                "served": self.served,
+                "not_modified": self.not_modified,
+                "immutable": self.immutable,
+                "encoded": dict(self.encoded),
+                "rehashed": self.rehashed,
+                "stale_variants": self.stale_variants,
+            }
+
+
+def init_static_assets(app):
+    """
+    reemplazar la vista 'static' de la aplicacion por StaticAssets.
+
+    tambien registra un url_defaults para que url_for('static', filename=...)
+    agregue '?v=<hash>' a la url, lo que permite cachearla como inmutable.
+
+    args:
+        app (Flask): aplicacion con static_folder configurado.
+
+    returns:
+        StaticAssets: el servidor de archivos estaticos, o None si la aplicacion no tiene carpeta static.
+    """
+    if not app.has_static_folder:
+        return None
+
+    recheck = app.config.get("STATIC_RECHECK")
+    assets = StaticAssets(app.static_folder, recheck=app.debug if recheck is None else recheck)
+    app.extensions["static_assets"] = assets
+    app.view_functions["static"] = assets.serve
+
+    @app.url_defaults
+    def add_static_version(endpoint, values):
+        if endpoint == "static" and "v" not in values and "filename" in values:
+            version = assets.version(values["filename"])
+            if version:
+                values["v"] = version
+
+    return assets
+
+
+def get_static_assets():
+    """
+    obtener el servidor de archivos estaticos de la aplicacion actual, o None si no se inicializo.
+    """
+    return current_app.extensions.get("static_assets")
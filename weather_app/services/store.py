@@ -0,0 +1,317 @@
+# weather_app/services/store.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+from weather_app.services.json_provider import loads
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    city_key   TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    payload    TEXT NOT NULL,
+    PRIMARY KEY (city_key, kind, fetched_at)
+);
+CREATE INDEX IF NOT EXISTS payloads_fetched_at ON payloads (fetched_at);
+CREATE TABLE IF NOT EXISTS city_locations (
+    city_key    TEXT PRIMARY KEY,
+    location    TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS city_requests (
+    city_key     TEXT PRIMARY KEY,
+    city         TEXT NOT NULL,
+    province     TEXT,
+    requested_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS city_requests_requested_at ON city_requests (requested_at);
+"""
+
+# ciudades pedidas por usuarios que se conservan para el precalentador
+RECENT_REQUESTS_MAX = 200
+
+
+class WeatherStore:
+    """
+    almacen persistente en sqlite de las respuestas crudas de openweathermap.
+
+    el archivo lo comparten todos los workers de gunicorn y sobrevive a reinicios;
+    el modo wal permite leer mientras otro worker escribe. cada respuesta se
+    guarda con su instante de descarga, asi que el almacen conserva un historial
+    por ciudad acotado por retention_seconds y max_rows_per_city.
+    """
+    def __init__(self, path, retention_seconds=48 * 3600, max_rows_per_city=48, compact_interval=600):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.max_rows_per_city = max_rows_per_city # filas por ciudad y tipo de respuesta
+        self.compact_interval = compact_interval # segundos minimos entre compactaciones
+        self.reads = 0
+        self.read_hits = 0
+        self.writes = 0
+        self.last_compaction = None
+        self._next_compaction = time.monotonic() + compact_interval
+        self._local = threading.local() # una conexion por hilo
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        """
+        obtener la conexion sqlite del hilo actual, creandola si hace falta.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def put(self, city_key, kind, payload, fetched_at=None):
+        """
+        guardar una respuesta descargada.
+
+        args:
+            city_key (str): clave normalizada de ciudad, unidades e idioma.
+            kind (str): tipo de respuesta ('weather' o 'forecast').
+            payload (dict): respuesta json de openweathermap.
+            fetched_at (float, optional): instante unix de la descarga (por defecto, ahora).
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO payloads (city_key, kind, fetched_at, payload) VALUES (?, ?, ?, ?)",
+                (city_key, kind, fetched_at, json.dumps(payload)),
+            )
+        with self._lock:
+            self.writes += 1
+            compact = time.monotonic() >= self._next_compaction
+            if compact:
+                self._next_compaction = time.monotonic() + self.compact_interval
+        if compact:
+            self.compact()
+
+    def latest(self, city_key, kind, max_age):
+        """
+        obtener la respuesta mas reciente de una ciudad si no supera max_age segundos.
+
+        returns:
+            tuple: (payload, fetched_at), o None si no hay una respuesta reciente.
+        """
+        row = self._connect().execute(
+            "SELECT payload, fetched_at FROM payloads WHERE city_key = ? AND kind = ? AND fetched_at >= ? "
+            "ORDER BY fetched_at DESC LIMIT 1",
+            (city_key, kind, time.time() - max_age),
+        ).fetchone()
+        with self._lock:
+            self.reads += 1
+            if row is not None:
+                self.read_hits += 1
+        if row is None:
+            return None
+        return loads(row[0]), row[1]
+
+    def recent(self, max_age):
+        """
+        obtener la respuesta mas reciente de cada ciudad y tipo, descargada hace menos de max_age segundos.
+
+        yields:
+            tuple: (city_key, kind, payload, fetched_at).
+        """
+        rows = self._connect().execute(
+            "SELECT city_key, kind, payload, MAX(fetched_at) FROM payloads WHERE fetched_at >= ? "
+            "GROUP BY city_key, kind",
+            (time.time() - max_age,),
+        )
+        for city_key, kind, payload, fetched_at in rows:
+            yield city_key, kind, loads(payload), fetched_at
+
+    def history(self, city_key, kind, since=None):
+        """
+        obtener el historial de respuestas de una ciudad, de la mas antigua a la mas reciente.
+
+        returns:
+            list: tuplas (fetched_at, payload).
+        """
+        rows = self._connect().execute(
+            "SELECT fetched_at, payload FROM payloads WHERE city_key = ? AND kind = ? AND fetched_at >= ? "
+            "ORDER BY fetched_at",
+            (city_key, kind, since or 0),
+        )
+        return [(fetched_at, loads(payload)) for fetched_at, payload in rows]
+
+    def put_location(self, city_key, location):
+        """
+        guardar la ubicacion resuelta de una ciudad (id y coordenadas de openweathermap).
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO city_locations (city_key, location, resolved_at) VALUES (?, ?, ?)",
+                (city_key, json.dumps(location), time.time()),
+            )
+
+    def locations(self):
+        """
+        obtener todas las ubicaciones resueltas guardadas.
+
+        returns:
+            dict: clave de ciudad -> ubicacion.
+        """
+        rows = self._connect().execute("SELECT city_key, location FROM city_locations")
+        return {city_key: loads(location) for city_key, location in rows}
+
+    def note_request(self, city_key, city, province=None, requested_at=None):
+        """
+        registrar que un usuario pidio el clima de una ciudad (la ultima vez gana).
+
+        args:
+            city_key (str): nombre normalizado de la ciudad.
+            city (str): nombre tal como se consulta a openweathermap.
+            province (str, optional): provincia de la ciudad listada.
+            requested_at (float, optional): instante unix del pedido (por defecto, ahora).
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO city_requests (city_key, city, province, requested_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (city_key) DO UPDATE SET "
+                "city = excluded.city, province = excluded.province, requested_at = excluded.requested_at",
+                (city_key, city, province, time.time() if requested_at is None else requested_at),
+            )
+
+    def recent_requests(self, limit=RECENT_REQUESTS_MAX):
+        """
+        obtener las ciudades pedidas por usuarios de todos los workers, las mas recientes primero.
+
+        returns:
+            list: tuplas (ciudad, provincia).
+        """
+        rows = self._connect().execute(
+            "SELECT city, province FROM city_requests ORDER BY requested_at DESC LIMIT ?", (limit,),
+        )
+        return [(city, province) for city, province in rows]
+
+    def compact(self):
+        """
+        borrar las respuestas fuera de la retencion y devolver el espacio del wal al disco.
+
+        returns:
+            int: cantidad de filas borradas.
+        """
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM payloads WHERE fetched_at < ?", (time.time() - self.retention_seconds,)
+            ).rowcount
+            # conservar solo las max_rows_per_city filas mas recientes de cada ciudad y tipo
+            deleted += conn.execute(
+                "DELETE FROM payloads WHERE rowid IN ("
+                " SELECT rowid FROM ("
+                "  SELECT rowid, ROW_NUMBER() OVER (PARTITION BY city_key, kind ORDER BY fetched_at DESC) AS n"
+                "  FROM payloads"
+                " ) WHERE n > ?"
+                ")",
+                (self.max_rows_per_city,),
+            ).rowcount
+            # conservar solo las ciudades pedidas mas recientemente
+            conn.execute(
+                "DELETE FROM city_requests WHERE city_key NOT IN ("
+                " SELECT city_key FROM city_requests ORDER BY requested_at DESC LIMIT ?"
+                ")",
+                (RECENT_REQUESTS_MAX,),
+            )
+        self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.last_compaction = {"at": time.time(), "deleted": deleted}
+        return deleted
+
+    def stats(self):
+        """
+        devolver el tamaño del almacen y los contadores de uso.
+        """
+        rows, cities = self._connect().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT city_key) FROM payloads"
+        ).fetchone()
+        return {
+            "path": self.path,
+            "rows": rows,
+            "cities": cities,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "reads": self.reads,
+            "read_hits": self.read_hits,
+            "writes": self.writes,
+            "retention_seconds": self.retention_seconds,
+            "max_rows_per_city": self.max_rows_per_city,
+            "last_compaction": self.last_compaction,
+        }
+
+
+_init_lock = threading.Lock()
+
+
+def get_weather_store():
+    """
+    obtener el almacen persistente de la aplicacion actual, creandolo la primera vez.
+
+    si el archivo no se puede abrir (ruta invalida, base corrupta) se registra el
+    error y el worker sigue sin almacen, como con STORE_ENABLED desactivado.
+
+    returns:
+        WeatherStore: el almacen, o None si esta deshabilitado o no se pudo abrir.
+    """
+    if not current_app.config.get("STORE_ENABLED", False):
+        return None
+    store = current_app.extensions.get("weather_store")
+    if store is None:
+        with _init_lock:
+            store = current_app.extensions.get("weather_store")
+            if store is None:
+                config = current_app.config
+                try:
+                    store = WeatherStore(
+                        config["STORE_PATH"],
+                        retention_seconds=config.get("STORE_RETENTION_SECONDS", 48 * 3600),
+                        max_rows_per_city=config.get("STORE_MAX_ROWS_PER_CITY", 48),
+                        compact_interval=config.get("STORE_COMPACT_INTERVAL", 600),
+                    )
+                except sqlite3.Error as e:
+                    logger.error("no se pudo abrir el almacen %s, se sigue sin almacen: %s", config["STORE_PATH"], e)
+                    store = False # no reintentar en cada solicitud
+                current_app.extensions["weather_store"] = store
+    return store or None
+
+
+def warm_cache_from_store(app):
+    """
+    cargar en el cache las respuestas recientes del almacen al iniciar un worker.
+
+    args:
+        app (Flask): aplicacion cuyo cache se precarga.
+
+    returns:
+        int: cantidad de respuestas cargadas.
+    """
+    from weather_app.services.cache import get_weather_cache
+
+    with app.app_context():
+        store = get_weather_store()
+        if store is None:
+            return 0
+        cache = get_weather_cache()
+        loaded = 0
+        try:
+            for city_key, kind, payload, fetched_at in store.recent(cache.max_age()):
+                cache.set_by_key(kind, city_key, payload, stored_at=fetched_at)
+                loaded += 1
+        except sqlite3.Error as e:
+            # el worker arranca igual, con el cache vacio
+            logger.warning("no se pudo precargar el cache desde el almacen: %s", e)
+        return loaded
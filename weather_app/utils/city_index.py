@@ -0,0 +1,164 @@
+# weather_app/utils/city_index.py
+
+import bisect
+import unicodedata
+
+# nombres alternativos de provincias que no coinciden con las claves de cities_by_province.json
+# (ej. el nombre usado en argentina_provincias.geojson)
+PROVINCE_ALIASES = {
+    "Ciudad de Buenos Aires": "CABA",
+    "Ciudad Autónoma de Buenos Aires": "CABA",
+    "Capital Federal": "CABA",
+}
+
+
+def fold(text):
+    """
+    normalizar un texto para comparaciones insensibles a tildes, mayusculas y espacios.
+
+    args:
+        text (str): texto a normalizar (ej. " CÓRDOBA ").
+
+    returns:
+        str: texto sin tildes, en minusculas y con espacios simples (ej. "cordoba").
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    without_marks = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(without_marks.casefold().split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CityIndex:
+    """
+    indice de provincias y ciudades de cities_by_province.json para busquedas rapidas.
+
+    todas las claves se guardan plegadas con fold(), asi "Cordoba", "córdoba " y
+    "CÓRDOBA" resuelven al mismo nombre canonico. las sugerencias se buscan por
+    prefijo (del nombre completo o de cualquiera de sus palabras) con busqueda
+    binaria sobre una lista ordenada y, si faltan resultados, por similitud de
+    trigramas para tolerar errores de tipeo.
+    """
+    def __init__(self, cities_data, province_aliases=PROVINCE_ALIASES):
+        self.entries = [] # lista de dicts {"name", "type", "province"}
+        self._provinces = {} # nombre plegado -> nombre canonico de provincia
+        self._cities = {} # nombre plegado -> nombre canonico de ciudad
+        self._city_provinces = {} # nombre plegado -> provincias que listan la ciudad, en orden
+        self._prefix_keys = [] # lista ordenada de (clave plegada, indice de entrada)
+        self._trigram_index = {} # trigrama -> conjunto de indices de entrada
+        self._entry_trigrams = [] # indice de entrada -> trigramas de su nombre
+
+        for province, cities in cities_data.items():
+            self._provinces[fold(province)] = province
+            self._add_entry({"name": province, "type": "province", "province": province})
+            for city in cities:
+                name = city["name"]
+                # si una ciudad se repite en varias provincias, conservar la primera
+                self._cities.setdefault(fold(name), name)
+                provinces = self._city_provinces.setdefault(fold(name), [])
+                if province not in provinces:
+                    provinces.append(province)
+                self._add_entry({"name": name, "type": "city", "province": province})
+
+        for alias, province in province_aliases.items():
+            if province in cities_data:
+                self._provinces.setdefault(fold(alias), province)
+
+        self._prefix_keys.sort()
+        self._keys_only = [key for key, _ in self._prefix_keys]
+
+    def _add_entry(self, entry):
+        i = len(self.entries)
+        self.entries.append(entry)
+        folded = fold(entry["name"])
+
+        # indexar el nombre completo y cada palabra desde donde empieza ("la plata", "plata")
+        words = folded.split(" ")
+        for start in range(len(words)):
+            self._prefix_keys.append((" ".join(words[start:]), i))
+
+        grams = _trigrams(folded)
+        self._entry_trigrams.append(grams)
+        for gram in grams:
+            self._trigram_index.setdefault(gram, set()).add(i)
+
+    def canonical_province(self, name):
+        """
+        devolver el nombre canonico de una provincia, o None si no existe.
+        """
+        return self._provinces.get(fold(name))
+
+    def canonical_city(self, name):
+        """
+        devolver el nombre canonico de una ciudad listada, o None si no existe.
+        """
+        return self._cities.get(fold(name))
+
+    def city_province(self, name, province=None):
+        """
+        devolver la provincia de una ciudad listada.
+
+        un mismo nombre puede estar listado en varias provincias: si se indica la
+        provincia y la ciudad esta listada en ella se devuelve esa; si no, la
+        primera provincia que la lista.
+
+        returns:
+            str: nombre canonico de la provincia, o None si la ciudad no esta listada.
+        """
+        provinces = self._city_provinces.get(fold(name))
+        if not provinces:
+            return None
+        canonical = self.canonical_province(province) if province else None
+        return canonical if canonical in provinces else provinces[0]
+
+    def suggest(self, query, limit=10):
+        """
+        sugerir provincias y ciudades para un texto parcial.
+
+        args:
+            query (str): texto ingresado por el usuario.
+            limit (int): cantidad maxima de sugerencias.
+
+        returns:
+            list: entradas {"name", "type", "province"}; primero las coincidencias
+                  por prefijo (nombre completo antes que palabra interna), luego
+                  las similares por trigramas.
+        """
+        folded = fold(query)
+        if not folded:
+            return []
+
+        found = [] # (prioridad, nombre plegado, indice)
+        seen = set()
+        start = bisect.bisect_left(self._keys_only, folded)
+        for key, i in self._prefix_keys[start:]:
+            if not key.startswith(folded):
+                break
+            if i in seen:
+                continue
+            seen.add(i)
+            entry_key = fold(self.entries[i]["name"])
+            found.append((0 if entry_key.startswith(folded) else 1, entry_key, i))
+
+        found.sort()
+        results = [self.entries[i] for _, _, i in found[:limit]]
+
+        if len(results) < limit and len(folded) >= 3:
+            # completar con nombres parecidos (errores de tipeo)
+            query_grams = _trigrams(folded)
+            candidates = set()
+            for gram in query_grams:
+                candidates |= self._trigram_index.get(gram, set())
+            scored = []
+            for i in candidates - seen:
+                grams = self._entry_trigrams[i]
+                score = len(query_grams & grams) / len(query_grams | grams)
+                if score >= 0.3:
+                    scored.append((-score, self.entries[i]["name"], i))
+            scored.sort()
+            results += [self.entries[i] for _, _, i in scored[:limit - len(results)]]
+
+        return results
@@ -0,0 +1,134 @@
+import json # importar modulo json
+import os # importar modulo os
+import sys # importar modulo sys
+import time # importar modulo time
+
+import requests # importar libreria requests
+from dotenv import load_dotenv # importar carga de variables de entorno
+
+# definir rutas de entrada y salida
+cities_path = 'static/data/cities_by_province.json'
+output_path = 'static/data/city_locations.json'
+
+# definir urls de la api de openweathermap
+geocoding_url = 'http://api.openweathermap.org/geo/1.0/direct'
+weather_url = 'http://api.openweathermap.org/data/2.5/weather'
+
+# nombres de provincia que el geocodificador de openweathermap reconoce distinto
+state_names = {
+    'CABA': 'Buenos Aires F.D.',
+    'Islas Malvinas': 'Falkland Islands',
+}
+
+
+def resolve_city(session, api_key, city, province):
+    """
+    resolver una ciudad a coordenadas e id de openweathermap.
+
+    busca primero con el nombre de la provincia y el codigo de pais 'AR' para
+    desambiguar nombres repetidos ("San Justo", "Merlo"), y descarta resultados
+    fuera de argentina (salvo malvinas).
+
+    returns:
+        dict: {"id", "lat", "lon", "name", "province"} o None si no se pudo resolver.
+    """
+    country = 'FK' if province == 'Islas Malvinas' else 'AR'
+    queries = [f"{city},{state_names.get(province, province)},{country}", f"{city},{country}"]
+
+    for query in queries:
+        res = session.get(geocoding_url, params={'q': query, 'limit': 5, 'appid': api_key}, timeout=10)
+        res.raise_for_status()
+        candidates = [c for c in res.json() if c.get('country') == country]
+        if candidates:
+            break
+    else:
+        return None
+
+    best = candidates[0]
+    location = {
+        'lat': round(best['lat'], 4),
+        'lon': round(best['lon'], 4),
+        'name': best.get('local_names', {}).get('es', best['name']),
+        'province': province,
+    }
+
+    # obtener el id de ciudad de openweathermap para consultar por id
+    res = session.get(weather_url, params={'lat': location['lat'], 'lon': location['lon'], 'appid': api_key}, timeout=10)
+    res.raise_for_status()
+    location['id'] = res.json().get('id')
+    return location
+
+
+def migrate_table(table):
+    """
+    convertir una tabla de versiones anteriores, indexada solo por nombre de ciudad,
+    al formato agrupado por provincia ({provincia: {ciudad: ubicacion}}).
+
+    las ciudades homonimas de distintas provincias se pisaban en el formato anterior,
+    asi que se conserva cada ubicacion solo bajo la provincia con la que se resolvio.
+    """
+    migrated = {}
+    for key, value in table.items():
+        if isinstance(value, dict) and isinstance(value.get('province'), str):
+            # formato anterior: nombre -> ubicacion con su provincia
+            migrated.setdefault(value['province'], {})[key] = value
+        else:
+            migrated.setdefault(key, {}).update(value)
+    return migrated
+
+
+def main():
+    load_dotenv()
+    api_key = os.getenv('OPENWEATHER_API_KEY')
+    if not api_key:
+        print("error: falta la variable de entorno OPENWEATHER_API_KEY.")
+        sys.exit(1)
+
+    with open(cities_path, 'r', encoding='utf-8') as f:
+        cities_data = json.load(f)
+
+    # conservar las ciudades ya resueltas para no gastar cuota en cada ejecucion
+    table = {}
+    if os.path.exists(output_path):
+        with open(output_path, 'r', encoding='utf-8') as f:
+            table = migrate_table(json.load(f))
+
+    session = requests.Session()
+    unresolved = []
+    for province, cities in cities_data.items():
+        for city in cities:
+            name = city['name']
+            if name in table.get(province, {}):
+                continue
+            try:
+                location = resolve_city(session, api_key, name, province)
+            except requests.exceptions.RequestException as e:
+                print(f"error al resolver '{name}' ({province}): {e}")
+                unresolved.append(f"{name} ({province})")
+                continue
+            if location is None:
+                print(f"sin resultados en argentina para '{name}' ({province})")
+                unresolved.append(f"{name} ({province})")
+                continue
+            table.setdefault(province, {})[name] = location
+            print(f"{name} ({province}) -> id {location['id']} ({location['lat']}, {location['lon']})")
+            # respetar el limite de 60 llamadas por minuto del plan gratuito
+            time.sleep(2)
+
+    # exportar tabla ordenada por provincia y ciudad para que los cambios sean faciles de revisar
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {province: dict(sorted(cities.items())) for province, cities in sorted(table.items())},
+            f, ensure_ascii=False, indent=2,
+        )
+
+    # mostrar resumen de la resolucion
+    print(f"\ntabla de ubicaciones generada en: {output_path}")
+    resolved = sum(len(cities) for cities in table.values())
+    print(f"ciudades resueltas: {resolved}, sin resolver: {len(unresolved)}")
+    if unresolved:
+        print("sin resolver: " + ", ".join(unresolved))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import argparse # importar modulo argparse
+import gzip # importar modulo gzip
+import hashlib # importar modulo hashlib
+import json # importar modulo json
+import math # importar modulo math
+import os # importar modulo os
+import sys # importar modulo sys
+
+import geopandas as gpd # importar libreria geopandas
+
+try:
+    import topojson as tp # simplificacion sobre arcos compartidos y salida topojson (opcional)
+except ImportError:
+    tp = None
+
+try:
+    import brotli # compresion brotli (opcional)
+except ImportError:
+    brotli = None
+
+from convertGEOJSON import convert_provinces
+from convert_malvinas import convert_malvinas
+
+# definir conjuntos de datos a procesar: geojson de origen y conversion desde shapefile
+datasets = [
+    {
+        'name': 'argentina_provincias',
+        'source': 'static/data/argentina_provincias/argentina_provincias.geojson',
+        'shapefile': 'static/data/argentina_provincias/ar.shp',
+        'convert': convert_provinces,
+    },
+    {
+        'name': 'islas_malvinas',
+        'source': 'static/data/islas_malvinas/islas_malvinas.geojson',
+        'shapefile': 'static/data/islas_malvinas/islas_malvinas/fk.shp',
+        'convert': convert_malvinas,
+    },
+]
+
+# manifiesto de variantes precomprimidas que lee weather_app/services/static_assets.py:
+# ruta relativa a static -> hash del contenido del original comprimido
+STATIC_ROOT = 'static'
+MANIFEST_PATH = os.path.join(STATIC_ROOT, 'precompressed.json')
+
+# definir niveles de detalle: nombre por zoom de leaflet -> tolerancia de simplificacion en grados
+levels = {
+    'z5': 0.02,
+    'z6': 0.008,
+    'z8': 0.002,
+}
+
+
+def decimals_for(tolerance):
+    """
+    calcular cuantos decimales conservar para una tolerancia (una decima de la tolerancia).
+    """
+    return max(0, math.ceil(-math.log10(tolerance)) + 1)
+
+
+def quantize_ring(ring, decimals):
+    """
+    redondear las coordenadas de un anillo y quitar puntos consecutivos repetidos.
+
+    returns:
+        list: anillo cuantizado, o None si quedo con menos de 4 puntos (o vacio).
+    """
+    result = []
+    for x, y, *_ in ring:
+        point = [round(x, decimals), round(y, decimals)]
+        if not result or point != result[-1]:
+            result.append(point)
+    if not result:
+        # la simplificacion puede dejar anillos sin puntos
+        return None
+    if result[0] != result[-1]:
+        result.append(result[0])
+    return result if len(result) >= 4 else None
+
+
+def quantize_geometry(geometry, decimals):
+    """
+    cuantizar un poligono o multipoligono geojson, descartando anillos degenerados.
+
+    returns:
+        dict: geometria cuantizada, o la recibida si no es un poligono (ej. None o vacia
+              despues de simplificar); verify() informa las que quedaron sin coordenadas.
+    """
+    if not geometry or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+        return geometry
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    else:
+        polygons = geometry['coordinates']
+
+    quantized = []
+    for polygon in polygons:
+        if not polygon:
+            continue
+        exterior = quantize_ring(polygon[0], decimals)
+        if exterior is None:
+            continue
+        holes = [ring for ring in (quantize_ring(r, decimals) for r in polygon[1:]) if ring is not None]
+        quantized.append([exterior] + holes)
+
+    if geometry['type'] == 'Polygon' or len(quantized) == 1:
+        return {'type': 'Polygon', 'coordinates': quantized[0] if quantized else []}
+    return {'type': 'MultiPolygon', 'coordinates': quantized}
+
+
+def simplify(gdf, tolerance):
+    """
+    simplificar las geometrias conservando la topologia.
+
+    con el paquete topojson se simplifican los arcos compartidos una sola vez, asi
+    los limites entre provincias vecinas siguen coincidiendo sin huecos ni solapes.
+    sin topojson se simplifica cada geometria por separado con shapely.
+
+    returns:
+        tuple: (featurecollection geojson como dict, topologia o None).
+    """
+    if tp is not None:
+        topo = tp.Topology(gdf, prequantize=False, toposimplify=tolerance, prevent_oversimplify=True)
+        return json.loads(topo.to_geojson()), topo
+
+    simplified = gdf.copy()
+    simplified['geometry'] = gdf.geometry.simplify(tolerance, preserve_topology=True)
+    return json.loads(simplified.to_json()), None
+
+
+def verify(feature_collection, expected_names):
+    """
+    verificar que cada nombre de origen siga presente con una geometria no vacia.
+
+    returns:
+        list: nombres perdidos o con geometria vacia.
+    """
+    present = {
+        f['properties'].get('name')
+        for f in feature_collection['features']
+        if f.get('geometry') and f['geometry']['coordinates']
+    }
+    return sorted(name for name in expected_names if name not in present)
+
+
+def content_hash(data):
+    """
+    calcular el hash del contenido igual que el servidor de archivos estaticos (16 caracteres hex de sha256).
+    """
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2)
+        f.write('\n')
+
+
+def write_variants(path, data, compress, manifest, write_raw=True):
+    """
+    escribir un archivo y, si se pide, sus variantes .gz y .br precomprimidas.
+
+    registra en el manifiesto el hash del contenido comprimido: el servidor solo
+    envia las variantes si el original sigue teniendo ese hash.
+
+    returns:
+        dict: tamaño en bytes de cada variante escrita.
+    """
+    if write_raw:
+        with open(path, 'wb') as f:
+            f.write(data)
+    sizes = {'raw': len(data)}
+
+    if compress:
+        # mtime=0 para que el .gz sea identico entre ejecuciones
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz)
+        sizes['gz'] = len(gz)
+
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as f:
+                f.write(br)
+            sizes['br'] = len(br)
+        manifest[os.path.relpath(path, STATIC_ROOT).replace(os.sep, '/')] = content_hash(data)
+    return sizes
+
+
+def dump(feature_collection):
+    return json.dumps(feature_collection, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def build_dataset(dataset, args, manifest):
+    """
+    generar los niveles de detalle de un conjunto de datos.
+
+    returns:
+        tuple: (filas del reporte, nombres perdidos).
+    """
+    # regenerar el geojson de origen si se pide y el shapefile existe
+    if args.from_shapefiles and os.path.exists(dataset['shapefile']):
+        dataset['convert']()
+
+    source = dataset['source']
+    gdf = gpd.read_file(source)
+    expected_names = set(gdf['name'])
+    source_size = os.path.getsize(source)
+    base, _ = os.path.splitext(source)
+
+    # comprimir tambien el original a resolucion completa
+    with open(source, 'rb') as f:
+        original = f.read()
+    report = [(os.path.basename(source), 'original', write_variants(source, original, args.compress, manifest, write_raw=False))]
+    missing = []
+
+    for level, tolerance in levels.items():
+        feature_collection, topo = simplify(gdf, tolerance)
+        decimals = decimals_for(tolerance)
+        for feature in feature_collection['features']:
+            feature['geometry'] = quantize_geometry(feature['geometry'], decimals)
+
+        lost = verify(feature_collection, expected_names)
+        missing += [f"{dataset['name']}.{level}: {name}" for name in lost]
+
+        path = f"{base}.{level}.geojson"
+        report.append((os.path.basename(path), f"tol {tolerance}, {decimals} dec", write_variants(path, dump(feature_collection), args.compress, manifest)))
+
+        if args.topojson:
+            if topo is None:
+                print("aviso: instalar el paquete 'topojson' para generar salidas topojson.")
+            else:
+                topo_path = f"{base}.{level}.topojson"
+                data = topo.topoquantize(10 ** decimals).to_json().encode('utf-8')
+                report.append((os.path.basename(topo_path), 'topojson', write_variants(topo_path, data, args.compress, manifest)))
+
+    return [(name, detail, sizes, source_size) for name, detail, sizes in report], missing
+
+
+def print_report(rows):
+    """
+    mostrar el tamaño de cada archivo generado y la reduccion respecto del original.
+    """
+    print(f"\n{'archivo':<42} {'detalle':<18} {'bytes':>9} {'gz':>9} {'br':>9} {'reduccion':>10}")
+    for name, detail, sizes, source_size in rows:
+        smallest = min(sizes.values())
+        reduction = 100 * (1 - smallest / source_size)
+        print(
+            f"{name:<42} {detail:<18} {sizes['raw']:>9} {sizes.get('gz', '-'):>9} "
+            f"{sizes.get('br', '-'):>9} {reduction:>9.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generar geometrias simplificadas, cuantizadas y comprimidas del mapa.")
+    parser.add_argument('--from-shapefiles', action='store_true', help="regenerar los geojson de origen desde los shapefiles")
+    parser.add_argument('--topojson', action='store_true', help="generar tambien salidas topojson")
+    parser.add_argument('--no-compress', dest='compress', action='store_false', help="no generar variantes .gz/.br")
+    args = parser.parse_args()
+
+    if tp is None:
+        print("aviso: paquete 'topojson' no instalado; se simplifica cada provincia por separado y los limites compartidos pueden no coincidir.")
+    if args.compress and brotli is None:
+        print("aviso: paquete 'brotli' no instalado; solo se generan variantes .gz.")
+
+    rows, missing = [], []
+    manifest = load_manifest()
+    for dataset in datasets:
+        dataset_rows, dataset_missing = build_dataset(dataset, args, manifest)
+        rows += dataset_rows
+        missing += dataset_missing
+    save_manifest(manifest)
+
+    print_report(rows)
+
+    if missing:
+        print("\nerror: provincias perdidas o vacias despues de simplificar:")
+        for name in missing:
+            print(f"  {name}")
+        sys.exit(1)
+    print("\ntodas las provincias se conservaron en todos los niveles.")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,15 +11,24 @@ shapefile_path = os.path.join(input_folder_path, shapefile_name)
 # definir ruta de guardado para geojson de salida
 output_geojson_path = 'static/data/islas_malvinas/islas_malvinas.geojson'
 
-# mostrar mensaje de busqueda de shapefile
-print(f"buscando shapefile en: {shapefile_path}")
-
-# verificar si shapefile existe
-if not os.path.exists(shapefile_path):
-    # mostrar error si no se encuentra shapefile
-    print(f"error: no se encontro el shapefile en la ruta especificada: {shapefile_path}")
-    print("asegurar descargar y descomprimir el archivo .shp en la carpeta 'static/data/islas_malvinas/'.")
-else:
+
+def convert_malvinas(shapefile_path=shapefile_path, output_geojson_path=output_geojson_path):
+    """
+    convertir el shapefile de islas malvinas a geojson en utf-8 con la columna 'name'.
+
+    returns:
+        str: ruta del geojson generado, o None si no se pudo generar.
+    """
+    # mostrar mensaje de busqueda de shapefile
+    print(f"buscando shapefile en: {shapefile_path}")
+
+    # verificar si shapefile existe
+    if not os.path.exists(shapefile_path):
+        # mostrar error si no se encuentra shapefile
+        print(f"error: no se encontro el shapefile en la ruta especificada: {shapefile_path}")
+        print("asegurar descargar y descomprimir el archivo .shp en la carpeta 'static/data/islas_malvinas/'.")
+        return None
+
     try:
         # leer shapefile con codificacion 'latin1'
         gdf_malvinas = gpd.read_file(shapefile_path, encoding='latin1')
@@ -42,4 +51,11 @@ else:
 
     except Exception as e:
         # manejar errores durante el procesamiento
-        print(f"ocurrio un error al procesar el shapefile: {e}")
\ No newline at end of file
+        print(f"ocurrio un error al procesar el shapefile: {e}")
+        return None
+
+    return output_geojson_path
+
+
+if __name__ == '__main__':
+    convert_malvinas()
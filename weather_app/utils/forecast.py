@@ -1,18 +1,30 @@
 # weather_app/utils/forecast.py
 
+from datetime import date
+from operator import itemgetter
+
 from weather_app.exceptions.server_errors import InternalServerError # importar error de servidor
+from weather_app.services.metrics import timed
+
+# ordinal del 1970-01-01, para convertir dias desde epoch en fechas
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400
+# dia local (dias desde epoch) -> "aaaa-mm-dd"; las ciudades comparten los mismos pocos dias
+_date_names = {}
+_DATE_NAMES_MAX = 64
+
 
-def group_forecast_by_day(forecast_data):
+def group_forecast_by_day(forecast_data, max_days=7):
     """
     agrupar el pronostico por dia a partir de datos horarios.
 
     esta funcion procesa una lista de pronosticos horarios y los agrupa
-    para obtener los datos diarios, incluyendo la temperatura maxima y minima,
-    la descripcion del clima, el icono y el volumen de lluvia acumulada.
+    para obtener los datos diarios (ver aggregate_forecast).
 
     args:
         forecast_data (dict): un diccionario que contiene los datos del pronostico,
                               obtenidos de la api. se espera que contenga la clave "list".
+        max_days (int): cantidad maxima de dias a devolver.
 
     returns:
         list: una lista de diccionarios, donde cada diccionario representa el pronostico
@@ -22,48 +34,169 @@ def group_forecast_by_day(forecast_data):
     raises:
         internalservererror: si la estructura de los datos de pronostico no es la esperada.
     """
-    daily = {}
+    with timed("group_forecast"):
+        return aggregate_forecast(forecast_data, max_days=max_days)
+
+
+def aggregate_forecast(forecast_data, max_days=7):
+    """
+    agrupar por dia el pronostico de una ciudad en una sola pasada por su lista.
+
+    cada intervalo de 3 horas se asigna al dia local de la ciudad, usando el
+    desplazamiento horario 'city.timezone' de la respuesta (no la fecha utc de
+    'dt_txt'), asi los intervalos de la noche no quedan en el dia siguiente.
+
+    por cada dia se calcula:
+        temp_max / temp_min: extremos de la temperatura.
+        temp_mean: temperatura media de los intervalos.
+        humidity_max: humedad maxima (%).
+        wind_speed_max: velocidad maxima del viento.
+        pop: probabilidad maxima de precipitacion (0 a 1).
+        rain_volume_mm: lluvia acumulada.
+        description / icon: condicion dominante (la mas frecuente; ante empate, la primera),
+                            con el icono diurno si la condicion aparece de dia.
+
+    args:
+        forecast_data (dict): respuesta de /data/2.5/forecast.
+        max_days (int): cantidad maxima de dias.
+
+    returns:
+        list: dias ordenados por fecha.
+
+    raises:
+        internalservererror: si la estructura del pronostico no es la esperada.
+    """
     try:
-        # iterar sobre cada item de pronostico en la lista
-        for item in forecast_data["list"]:
-            # extraer la fecha del item de pronostico (solo la parte de la fecha)
-            date = item["dt_txt"].split(" ")[0]
-            # obtener temperatura maxima
-            temp_max = item["main"]["temp_max"]
-            # obtener temperatura minima
-            temp_min = item["main"]["temp_min"]
-            # obtener descripcion del clima
-            desc = item["weather"][0]["description"]
-            # obtener icono del clima
-            icon = item["weather"][0]["icon"]
-            # obtener volumen de lluvia (si existe, si no, 0)
-            rain_mm = item.get("rain", {}).get("3h", 0)
-
-            # si la fecha no esta en el diccionario diario, inicializarla
-            if date not in daily:
-                daily[date] = {
-                    "temp_max": temp_max,
-                    "temp_min": temp_min,
-                    "description": desc,
-                    "icon": icon,
-                    "rain_volume_mm": rain_mm,
-                }
-            else:
-                # actualizar temperatura maxima y minima si se encuentra un valor mas extremo
-                daily[date]["temp_max"] = max(daily[date]["temp_max"], temp_max)
-                daily[date]["temp_min"] = min(daily[date]["temp_min"], temp_min)
-                # acumular volumen de lluvia
-                daily[date]["rain_volume_mm"] += rain_mm
-
-    except (KeyError, TypeError) as e:
+        offset = (forecast_data.get("city") or {}).get("timezone") or 0
+        return _aggregate_days(forecast_data["list"], offset, max_days)
+    except (KeyError, TypeError, IndexError) as e:
         # capturar errores si la estructura de los datos de pronostico es inesperada
         raise InternalServerError(f"error al procesar datos de pronostico: estructura de datos inesperada. detalle: {e}")
     except Exception as e:
         # capturar cualquier otra excepcion inesperada
         raise InternalServerError(f"error interno inesperado al agrupar pronostico: {e}")
 
-    # convertir el diccionario diario a una lista ordenada por fecha y limitar a los primeros 7 dias
-    forecast_list = [
-        {"date": d, **info} for d, info in sorted(daily.items())
-    ][:7]
-    return forecast_list
+
+def aggregate_forecasts(forecasts, max_days=7):
+    """
+    agrupar por dia el pronostico de varias ciudades (ver aggregate_forecast).
+
+    args:
+        forecasts (iterable): respuestas de /data/2.5/forecast, una por ciudad.
+        max_days (int): cantidad maxima de dias por ciudad.
+
+    returns:
+        list: una lista de dias por ciudad, en el mismo orden que forecasts.
+
+    raises:
+        internalservererror: si la estructura de algun pronostico no es la esperada.
+    """
+    return [aggregate_forecast(forecast_data, max_days) for forecast_data in forecasts]
+
+
+def _aggregate_days(items, offset, max_days):
+    """
+    recorrer los intervalos una vez, acumulando el dia local en curso en variables locales.
+
+    openweathermap devuelve los intervalos ordenados, asi cada dia es un tramo
+    contiguo de la lista: en vez de calcular el dia de cada intervalo se compara
+    'dt' con los limites utc del dia en curso. si la lista llega desordenada se
+    ordena por 'dt' y se vuelve a recorrer.
+    """
+    days = []
+    current = None
+    start = end = 0 # limites utc [start, end) del dia local en curso
+
+    for item in items:
+        main = item["main"]
+        weather = item["weather"][0]
+        dt = item["dt"]
+        temp_max = main["temp_max"]
+        temp_min = main["temp_min"]
+        try:
+            # camino rapido: openweathermap siempre envia estos campos
+            temp = main["temp"]
+            humidity = main["humidity"]
+            wind = item["wind"]["speed"]
+            pop = item["pop"]
+        except (KeyError, TypeError):
+            temp = main.get("temp", temp_max)
+            humidity = main.get("humidity", 0)
+            wind = item.get("wind")
+            wind = wind.get("speed", 0) if wind else 0
+            pop = item.get("pop", 0)
+        if "rain" in item:
+            rain = item["rain"]
+            rain_mm = rain.get("3h", 0) if rain else 0
+        else:
+            rain_mm = 0
+        description = weather["description"]
+
+        if not start <= dt < end:
+            day = (dt + offset) // _SECONDS_PER_DAY
+            start = day * _SECONDS_PER_DAY - offset
+            end = start + _SECONDS_PER_DAY
+            if current is not None:
+                if day < current:
+                    return _aggregate_days(sorted(items, key=itemgetter("dt")), offset, max_days)
+                days.append(_daily_summary(current, d_max, d_min, t_sum, count, h_max, w_max, p_max, r_sum, conditions))
+            current = day
+            d_max, d_min, t_sum, count = temp_max, temp_min, temp, 1
+            h_max, w_max, p_max, r_sum = humidity, wind, pop, rain_mm
+            # descripcion -> [apariciones, icono]
+            conditions = {description: [1, weather["icon"]]}
+            continue
+
+        if temp_max > d_max:
+            d_max = temp_max
+        if temp_min < d_min:
+            d_min = temp_min
+        t_sum += temp
+        count += 1
+        if humidity > h_max:
+            h_max = humidity
+        if wind > w_max:
+            w_max = wind
+        if pop > p_max:
+            p_max = pop
+        r_sum += rain_mm
+
+        if description in conditions:
+            condition = conditions[description]
+            condition[0] += 1
+            # preferir el icono diurno ("10d" antes que "10n")
+            icon = weather["icon"]
+            if icon[-1:] == "d":
+                condition[1] = icon
+        else:
+            conditions[description] = [1, weather["icon"]]
+
+    if current is not None:
+        days.append(_daily_summary(current, d_max, d_min, t_sum, count, h_max, w_max, p_max, r_sum, conditions))
+    return days[:max_days]
+
+
+def _daily_summary(day, temp_max, temp_min, temp_sum, count, humidity, wind, pop, rain_mm, conditions):
+    # max() devuelve la primera condicion con mas apariciones (los dict conservan el orden)
+    description, (_, icon) = max(conditions.items(), key=lambda c: c[1][0])
+    return {
+        "date": _date_name(day),
+        "temp_max": temp_max,
+        "temp_min": temp_min,
+        "temp_mean": round(temp_sum / count, 1),
+        "humidity_max": humidity,
+        "wind_speed_max": wind,
+        "pop": pop,
+        "rain_volume_mm": round(rain_mm, 2),
+        "description": description,
+        "icon": icon,
+    }
+
+
+def _date_name(day):
+    name = _date_names.get(day)
+    if name is None:
+        if len(_date_names) >= _DATE_NAMES_MAX:
+            _date_names.clear()
+        name = _date_names[day] = date.fromordinal(_EPOCH_ORDINAL + day).isoformat()
+    return name
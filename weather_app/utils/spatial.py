@@ -0,0 +1,133 @@
+# weather_app/utils/spatial.py
+
+import math
+
+# radio medio de la tierra en kilometros
+EARTH_RADIUS_KM = 6371.0088
+
+
+def ring_bbox(ring):
+    """
+    calcular la caja (min_x, min_y, max_x, max_y) de un anillo de coordenadas [x, y].
+    """
+    xs = [point[0] for point in ring]
+    ys = [point[1] for point in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def point_in_ring(x, y, ring):
+    """
+    comprobar si un punto esta dentro de un anillo cerrado (regla par-impar).
+
+    args:
+        x (float): longitud del punto.
+        y (float): latitud del punto.
+        ring (list): vertices [x, y] del anillo; el ultimo puede repetir el primero.
+
+    returns:
+        bool: true si el punto esta dentro.
+    """
+    inside = False
+    x1, y1 = ring[-1][0], ring[-1][1]
+    for point in ring:
+        x2, y2 = point[0], point[1]
+        # el lado cruza la horizontal del punto y el cruce queda a su derecha
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def point_in_polygon(x, y, rings):
+    """
+    comprobar si un punto esta dentro de un poligono geojson (anillo exterior y huecos).
+
+    args:
+        rings (list): anillo exterior seguido de los anillos de los huecos.
+    """
+    if not point_in_ring(x, y, rings[0]):
+        return False
+    return not any(point_in_ring(x, y, hole) for hole in rings[1:])
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    distancia en kilometros sobre la superficie terrestre entre dos coordenadas.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class STRtree:
+    """
+    r-tree estatico de cajas armado con el metodo sort-tile-recursive (str).
+
+    las cajas se ordenan por el centro en x, se cortan en franjas verticales, cada
+    franja se ordena por el centro en y y se agrupa en hojas de node_capacity
+    cajas; los niveles superiores se arman igual sobre las cajas de los nodos
+    de abajo. una consulta solo baja por los nodos cuya caja contiene el punto,
+    asi no recorre todas las cajas.
+    """
+    def __init__(self, items, node_capacity=8):
+        """
+        args:
+            items (list): tuplas (caja (min_x, min_y, max_x, max_y), valor).
+            node_capacity (int): hijos maximos por nodo.
+        """
+        self.node_capacity = max(2, node_capacity)
+        self.size = len(items)
+        # cada nodo es (caja, hijos, False); cada item es (caja, valor, True)
+        level = [(bbox, value, True) for bbox, value in items]
+        self.height = 0
+        while len(level) > 1:
+            level = self._pack(level)
+            self.height += 1
+        self.root = level[0] if level else None
+
+    def _pack(self, nodes):
+        """
+        agrupar una lista de nodos en nodos padre con el metodo str.
+        """
+        capacity = self.node_capacity
+        count = math.ceil(len(nodes) / capacity) # nodos padre
+        slices = math.ceil(math.sqrt(count)) # franjas verticales
+        per_slice = slices * capacity # nodos por franja
+
+        by_x = sorted(nodes, key=lambda node: node[0][0] + node[0][2])
+        parents = []
+        for start in range(0, len(by_x), per_slice):
+            strip = sorted(by_x[start:start + per_slice], key=lambda node: node[0][1] + node[0][3])
+            for group_start in range(0, len(strip), capacity):
+                children = strip[group_start:group_start + capacity]
+                bbox = (
+                    min(child[0][0] for child in children),
+                    min(child[0][1] for child in children),
+                    max(child[0][2] for child in children),
+                    max(child[0][3] for child in children),
+                )
+                parents.append((bbox, children, False))
+        return parents
+
+    def query_point(self, x, y):
+        """
+        obtener los valores cuya caja contiene el punto (x, y).
+
+        returns:
+            list: valores de los items candidatos.
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            bbox, children, is_item = stack.pop()
+            if not (bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]):
+                continue
+            if is_item:
+                found.append(children)
+            else:
+                stack.extend(children)
+        return found